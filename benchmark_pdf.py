@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+PDF batch rendering benchmark
+Renders full-page PDF receipts for generated sales with 1, 2, 4, ... worker
+processes and reports the cost per document and the speedup over one
+process
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmark_receipts import build_sales
+from database.models import DatabaseManager
+from utils.pdf_receipts import render_pdf_batch
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... up to and including max_workers"""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+def benchmark(document_count, lines_per_sale, max_workers):
+    """Render the same sales at each worker count"""
+    print("=== PDF Batch Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "pdf_benchmark.db")
+        db = DatabaseManager(db_path)
+
+        print(f"Creating {document_count} sales with {lines_per_sale} lines each...")
+        sale_ids = build_sales(db, document_count, lines_per_sale)
+        print(f"CPU cores: {os.cpu_count()}\n")
+
+        print(f"{'Workers':>7}  {'Seconds':>8}  {'Docs/s':>8}  {'ms/doc':>8}  {'Speedup':>7}")
+        baseline = None
+        for workers in worker_counts(max_workers):
+            output_dir = os.path.join(directory, f"pdf_{workers}")
+            start_time = time.perf_counter()
+            results = list(render_pdf_batch(db_path, sale_ids, output_dir, workers=workers))
+            elapsed = time.perf_counter() - start_time
+
+            errors = [result for result in results if result['error']]
+            if errors:
+                print(f"❌ {len(errors)} errors, first: {errors[0]['error']}")
+            baseline = baseline or elapsed
+            print(f"{workers:>7}  {elapsed:>8.2f}  {document_count / elapsed:>8.0f}  "
+                  f"{elapsed * 1000 / document_count:>8.2f}  {baseline / elapsed:>6.2f}x")
+
+        render_ms = statistics.median(result['seconds'] for result in results) * 1000
+        size_kb = statistics.mean(result['bytes'] for result in results) / 1024
+        print(f"\nMedian render time in a worker: {render_ms:.2f} ms, average size {size_kb:.1f} KB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch PDF rendering")
+    parser.add_argument('-n', '--documents', type=int, default=2000, help="Number of documents")
+    parser.add_argument('-l', '--lines', type=int, default=8, help="Lines per sale")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Largest worker count to try")
+    args = parser.parse_args()
+    benchmark(args.documents, args.lines, args.workers)
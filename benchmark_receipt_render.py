@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Receipt rendering benchmark
+Renders receipt text and ESC/POS bytes for generated sales, with no
+database, window or printer, and reports receipts per second for the
+compiled template and for formatting the text and converting it after
+"""
+
+import argparse
+import random
+import time
+
+from utils.receipt_generator import compile_receipt, receipt_to_escpos
+
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay']
+PRODUCTS = ['Hammer', 'Wrench', 'Drill Bit', 'Screws 100pk', 'Paint Roller', 'Tape Measure',
+            'Utility Knife', 'Sandpaper', 'Caulk Gun', 'Work Gloves']
+
+def build_sales(count, lines_per_sale):
+    """Sale dicts shaped like DatabaseManager.get_sale_for_receipt results"""
+    sales = []
+    for sale_id in range(1, count + 1):
+        items = []
+        for _ in range(lines_per_sale):
+            quantity = random.randint(1, 3)
+            price = random.randint(50, 8000)  # Cents
+            if random.random() < 0.1:
+                items.append({'product': None, 'name': 'Misc hardware', 'upc_code': None,
+                              'brand': None, 'description': None, 'quantity': quantity,
+                              'discounted_price': price, 'total': quantity * price})
+            else:
+                product = random.choice(PRODUCTS)
+                items.append({'product': product, 'name': product,
+                              'upc_code': f"{random.randrange(10 ** 12):012d}",
+                              'brand': random.choice(BRANDS),
+                              'description': f"{random.choice(PRODUCTS)} for general purpose use",
+                              'quantity': quantity, 'discounted_price': price,
+                              'total': quantity * price})
+        total = sum(item['total'] for item in items)
+        sales.append({'id': sale_id, 'sale_date': '2026-10-19 14:32:05.123456',
+                      'customer_name': f"Customer {sale_id % 500}",
+                      'customer_phone': f"555-{sale_id % 10000:04d}",
+                      'total_amount': total, 'paid_amount': 0, 'payment_status': 'pay_later',
+                      'items': items})
+    return sales
+
+def rate(function, sales):
+    """Receipts per second for a render function"""
+    start_time = time.perf_counter()
+    for sale in sales:
+        function(sale)
+    return len(sales) / (time.perf_counter() - start_time)
+
+def benchmark(count, lines_per_sale, width):
+    """Time both render paths over the same sales"""
+    print("=== Receipt Rendering Benchmark ===\n")
+    print(f"Generating {count} sales with {lines_per_sale} lines each, width {width}...")
+    sales = build_sales(count, lines_per_sale)
+    template = compile_receipt(width)
+
+    def text_then_escpos(sale):
+        text = template.render_text(sale)
+        return text, receipt_to_escpos(text)
+
+    text_rate = rate(template.render_text, sales)
+    template_rate = rate(template.render, sales)
+    convert_rate = rate(text_then_escpos, sales)
+
+    print("\nReceipts per second:")
+    print(f"  Compiled template, text only:     {text_rate:,.0f}")
+    print(f"  Compiled template, text + ESC/POS: {template_rate:,.0f}")
+    print(f"  Text, then receipt_to_escpos:     {convert_rate:,.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark headless receipt rendering")
+    parser.add_argument('-n', '--sales', type=int, default=100000, help="Number of receipts")
+    parser.add_argument('-l', '--lines', type=int, default=3, help="Lines per sale")
+    parser.add_argument('-w', '--width', type=int, default=48, help="Receipt width in characters")
+    args = parser.parse_args()
+    benchmark(args.sales, args.lines, args.width)
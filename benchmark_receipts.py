@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Receipt reprint benchmark
+Compares re-rendering a receipt from the sales tables with reading the
+stored copy, and reports the receipts table size per 100,000 receipts
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from database.models import DatabaseManager
+from utils.helpers import gtin_check_digit
+from utils.receipt_store import render_receipt, load_receipt, store_receipt
+
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Hooli', 'Vandelay']
+PRODUCTS = ['Hammer', 'Wrench', 'Drill Bit', 'Screws 100pk', 'Paint Roller', 'Tape Measure',
+            'Utility Knife', 'Sandpaper', 'Caulk Gun', 'Work Gloves']
+
+def build_sales(db, sale_count, lines_per_sale):
+    """Create customers, items and sales with realistic line counts"""
+    customer_ids = [db.add_customer(f"555-{i:04d}", f"Customer {i}") for i in range(200)]
+
+    items = []
+    for i in range(500):
+        upc = f"{i:011d}"
+        upc += str(gtin_check_digit(upc))
+        db.add_item_full(upc, random.choice(BRANDS), random.choice(PRODUCTS),
+                         f"{random.choice(PRODUCTS)} for general purpose use", 1.25, 2.99)
+        items.append(db.get_item_by_upc(upc))
+
+    sale_ids = []
+    for _ in range(sale_count):
+        cart = []
+        for item in random.sample(items, lines_per_sale):
+            quantity = random.randint(1, 3)
+            cart.append({
+                'name': item['name'], 'upc_code': item['upc_code'], 'quantity': quantity,
+                'unit_price': item['price'], 'discounted_price': item['price'],
+                'is_xt_item': False, 'brand': item['brand'],
+                'description': item['description'], 'cost': item['cost']
+            })
+        total = sum(line['quantity'] * line['unit_price'] for line in cart)
+        sale_ids.append(db.record_sale(random.choice(customer_ids), total, 0, 'pay_later', cart))
+    return sale_ids
+
+def time_ms(function, sale_ids):
+    """Median milliseconds per call over the given sales"""
+    timings = []
+    for sale_id in sale_ids:
+        start_time = time.perf_counter()
+        function(sale_id)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+def benchmark(sale_count, lines_per_sale):
+    """Run the reprint benchmark on a temporary database"""
+    print("=== Receipt Reprint Benchmark ===\n")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "receipts_benchmark.db"))
+
+        print(f"Creating {sale_count} sales with {lines_per_sale} lines each...")
+        sale_ids = build_sales(db, sale_count, lines_per_sale)
+
+        print("Storing rendered receipts...")
+        start_time = time.perf_counter()
+        for sale_id in sale_ids:
+            store_receipt(db, sale_id)
+        store_time = time.perf_counter() - start_time
+        print(f"✅ Stored {sale_count} receipts in {store_time:.2f} seconds\n")
+
+        sample = random.sample(sale_ids, min(500, sale_count))
+        render_ms = time_ms(lambda sale_id: render_receipt(db, sale_id), sample)
+        reprint_ms = time_ms(lambda sale_id: load_receipt(db, sale_id), sample)
+        print("Reprint latency (median):")
+        print(f"  Re-render from sales tables: {render_ms:.3f} ms")
+        print(f"  Stored receipt:              {reprint_ms:.3f} ms\n")
+
+        conn = db.get_connection()
+        text_bytes, escpos_bytes = conn.execute(
+            "SELECT SUM(LENGTH(receipt_text)), SUM(LENGTH(escpos)) FROM receipts"
+        ).fetchone()
+        conn.close()
+        raw_bytes = statistics.mean(len(load_receipt(db, sale_id)['text']) for sale_id in sample)
+
+        per_receipt = (text_bytes + escpos_bytes) / sale_count
+        print("Storage:")
+        print(f"  Uncompressed text per receipt: {raw_bytes:.0f} bytes")
+        print(f"  Compressed text:               {text_bytes / sale_count:.0f} bytes")
+        print(f"  Compressed ESC/POS:            {escpos_bytes / sale_count:.0f} bytes")
+        print(f"  Per 100,000 receipts:          {per_receipt * 100000 / 1024 / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark stored receipt reprints")
+    parser.add_argument('-n', '--sales', type=int, default=5000, help="Number of sales")
+    parser.add_argument('-l', '--lines', type=int, default=8, help="Lines per sale")
+    args = parser.parse_args()
+    benchmark(args.sales, args.lines)
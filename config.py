@@ -11,6 +11,7 @@ DATABASE_PATH = "database/pos_system.db"
 APP_NAME = "POS System"
 APP_VERSION = "1.0.0"
 APP_WINDOW_SIZE = "1000x800"
+TERMINAL_ID = "1"  # Name of this register, saved with each sale
 
 # Receipt settings
 RECEIPT_COMPANY_NAME = "Hardware store"
@@ -23,9 +24,39 @@ BARCODE_PREFIX = ""  # Some scanners add prefix/suffix characters
 BARCODE_SUFFIX = ""
 
 # Printer settings
-PRINTER_NAME = "default"  # Use "default" for default printer
+# "default" (OS default printer), an OS printer name, or a backend:
+# "escpos" (direct to PRINTER_DEVICE), "pdf" (files in PRINTER_PDF_PATH), "null" (discard)
+PRINTER_NAME = "default"
 RECEIPT_WIDTH = 48  # Receipt width in characters (80 for thermal printers)
 
+# Direct ESC/POS printing (PRINTER_NAME = "escpos")
+# USB: "/dev/usb/lp0"   Serial: "/dev/ttyUSB0" or "COM3"   Network: "tcp://192.168.1.50:9100"
+PRINTER_DEVICE = ""
+PRINTER_BAUDRATE = 9600  # Serial printers only
+PRINTER_TIMEOUT = 5  # Seconds to wait for the printer to accept data
+PRINTER_ENCODING = "cp437"  # Printer code page
+
+# Receipt images on ESC/POS printers
+PRINTER_DOTS = 576  # Printable dots per line (576 for 80 mm paper, 384 for 58 mm)
+PRINTER_DPI = 203  # Print head resolution
+RECEIPT_LOGO_PATH = ""  # Image printed above the header, e.g. "assets/logo.png"
+RECEIPT_LOGO_WIDTH_MM = 50  # Printed logo width
+RECEIPT_SALE_CODE = "code128"  # Sale number printed as "code128", "qr" or "" for none
+
+# PDF receipts (PRINTER_NAME = "pdf")
+PRINTER_PDF_PATH = "temp/receipts/"
+
+# Full-page PDF receipts and quotes
+PDF_DOCUMENT_TITLE = "QUOTE"  # Title printed on PDF documents, e.g. "RECEIPT"
+PDF_OUTPUT_PATH = "temp/pdf/"  # Batch output directory
+PDF_FONT_PATH = ""  # TrueType font for names outside Latin-1; Helvetica if empty
+
+# Customer statements
+STATEMENT_PATH = "temp/statements/"  # One subdirectory per statement date
+
+# Columnar sales history cache for reports (utils.analytics)
+ANALYTICS_PATH = "temp/analytics/"
+
 # UI Colors
 COLORS = {
     'primary': '#2196F3',
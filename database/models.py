@@ -1,9 +1,75 @@
 import sqlite3
 import os
-from datetime import datetime
+import zlib
+import sys
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.helpers import (normalize_upc, to_gtin14, to_gtin14_batch, canonical_code,
+                           canonical_code_batch, phone_digits)
+
+# Bump when adding a migration to DatabaseManager.MIGRATIONS
+SCHEMA_VERSION = 15
+
 class DatabaseManager:
+    # Customer list sort orders: (sort value, tiebreak id, direction, FROM clause)
+    # The FROM clause uses CROSS JOIN so SQLite walks the sort index first
+    CUSTOMER_SORTS = {
+        'name': ('c.name COLLATE NOCASE', 'c.id', 'ASC',
+                 'customers c CROSS JOIN customer_summary s ON s.customer_id = c.id'),
+        'balance': ('s.balance_due', 's.customer_id', 'DESC',
+                    'customer_summary s CROSS JOIN customers c ON c.id = s.customer_id'),
+        'last_sale': ("COALESCE(s.last_sale_date, '')", 's.customer_id', 'DESC',
+                      'customer_summary s CROSS JOIN customers c ON c.id = s.customer_id'),
+    }
+    
+    # Aging buckets: (column, heading, lower bound in days before the report date)
+    AGING_BUCKETS = [
+        ('current', 'Current', 0),
+        ('days_30', '31-60', 30),
+        ('days_60', '61-90', 60),
+        ('days_90', '91-120', 90),
+        ('days_120', '120+', 120),
+    ]
+    
+    # Per-period sales rollup columns, in sales_hourly and sales_daily.
+    # paid and on_account are as tendered at checkout; later payments on
+    # account (apply_payment) don't change them, so past Z-reports stay fixed
+    ROLLUP_COLUMNS = ['sale_count', 'gross', 'paid', 'on_account', 'catalog_items', 'xt_items']
+    ROLLUP_MONEY = {'gross', 'paid', 'on_account'}
+    
+    # Money columns, all integer cents since migrate_integer_cents
+    MONEY_COLUMNS = {
+        'items': ['cost', 'price'],
+        'sales': ['total_amount', 'paid_amount'],
+        'sale_items': ['unit_price', 'discounted_price', 'cost'],
+        'sales_hourly': ['gross', 'paid', 'on_account'],
+        'sales_daily': ['gross', 'paid', 'on_account'],
+        'item_sales_daily': ['revenue', 'costed_revenue', 'cost'],
+    }
+    
+    # (version, method name) - run in order on databases older than version
+    MIGRATIONS = [
+        (1, 'migrate_item_gtin'),
+        (2, 'migrate_item_barcodes'),
+        (3, 'migrate_item_search'),
+        (4, 'migrate_customer_search'),
+        (5, 'migrate_customer_paging'),
+        (6, 'migrate_sale_item_snapshot'),
+        (7, 'migrate_receipts'),
+        (8, 'migrate_sales_date_index'),
+        (9, 'migrate_open_sales_index'),
+        (10, 'migrate_sales_rollups'),
+        (11, 'migrate_item_sales_rollup'),
+        (12, 'migrate_sale_terminal'),
+        (13, 'migrate_integer_cents'),
+        (14, 'migrate_item_barcode_triggers'),
+        (15, 'migrate_local_time_rollups'),
+    ]
+    
     def __init__(self, db_path: str = "database/pos_system.db"):
         self.db_path = db_path
         self.ensure_db_directory()
@@ -33,6 +99,7 @@ class DatabaseManager:
         ''')
         
         # Items table - UPDATED with new fields
+        # Money columns here and below are integer cents
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS items (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -40,8 +107,8 @@ class DatabaseManager:
                 brand VARCHAR(100),
                 product VARCHAR(200) NOT NULL,
                 description TEXT,
-                cost DECIMAL(10,2) NOT NULL,
-                price DECIMAL(10,2) NOT NULL,
+                cost INTEGER NOT NULL,
+                price INTEGER NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
@@ -51,8 +118,8 @@ class DatabaseManager:
             CREATE TABLE IF NOT EXISTS sales (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 customer_id INTEGER NOT NULL,
-                total_amount DECIMAL(10,2) NOT NULL,
-                paid_amount DECIMAL(10,2) NOT NULL DEFAULT 0,
+                total_amount INTEGER NOT NULL,
+                paid_amount INTEGER NOT NULL DEFAULT 0,
                 payment_status VARCHAR(20) NOT NULL DEFAULT 'pay_later',
                 sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (customer_id) REFERENCES customers(id)
@@ -67,24 +134,525 @@ class DatabaseManager:
                 item_name VARCHAR(200) NOT NULL,
                 upc_code VARCHAR(50),
                 quantity INTEGER NOT NULL DEFAULT 1,
-                unit_price DECIMAL(10,2) NOT NULL,
-                discounted_price DECIMAL(10,2),
+                unit_price INTEGER NOT NULL,
+                discounted_price INTEGER,
                 is_xt_item BOOLEAN DEFAULT FALSE,
                 FOREIGN KEY (sale_id) REFERENCES sales(id)
             )
         ''')
         
         conn.commit()
+        
+        self.migrate_database(conn)
         conn.close()
     
+    def migrate_database(self, conn):
+        """Bring the schema up to SCHEMA_VERSION using PRAGMA user_version"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        for target_version, method_name in self.MIGRATIONS:
+            if version < target_version:
+                with conn:
+                    getattr(self, method_name)(conn)
+                    conn.execute(f"PRAGMA user_version = {target_version}")
+    
+    def table_exists(self, conn, table: str) -> bool:
+        """Check whether a table (or virtual table) exists"""
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+    
+    def column_exists(self, conn, table: str, column: str) -> bool:
+        """Check whether a table has a column"""
+        return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+    
+    def migrate_item_gtin(self, conn):
+        """Add items.gtin, the GTIN-14 key used for barcode lookups"""
+        if not self.column_exists(conn, 'items', 'gtin'):
+            conn.execute("ALTER TABLE items ADD COLUMN gtin VARCHAR(14)")
+        
+        conn.create_function('to_gtin14', 1, to_gtin14, deterministic=True)
+        conn.execute("UPDATE items SET gtin = to_gtin14(upc_code)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_items_gtin ON items(gtin)")
+    
+    def migrate_item_barcodes(self, conn):
+        """Add item_barcodes, every barcode (primary and alias) that scans to an item
+        
+        canonical_code is the GTIN-14 (or stripped SKU) with a unique index,
+        so a scan is one indexed probe whichever barcode was scanned. The
+        primary barcode rows are kept in sync with items by triggers.
+        """
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS item_barcodes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                canonical_code VARCHAR(50) NOT NULL,
+                upc_code VARCHAR(50) NOT NULL,
+                is_primary BOOLEAN NOT NULL DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (item_id) REFERENCES items(id)
+            )
+        ''')
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_item_barcodes_code ON item_barcodes(canonical_code)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_item_barcodes_item ON item_barcodes(item_id)")
+        
+        self.create_item_barcode_triggers(conn)
+        
+        conn.execute('''
+            INSERT OR IGNORE INTO item_barcodes (item_id, canonical_code, upc_code, is_primary)
+            SELECT id, COALESCE(gtin, TRIM(upc_code)), upc_code, TRUE FROM items ORDER BY id
+        ''')
+    
+    def create_item_barcode_triggers(self, conn):
+        """Create the triggers that keep primary item_barcodes rows in sync with items
+        
+        The insert is a plain INSERT, so an item whose barcode already scans
+        to another item fails on the unique canonical_code index instead of
+        being saved without a barcode row. Writers set items.gtin whenever
+        they write upc_code; the triggers can't compute it themselves.
+        """
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_barcode_insert AFTER INSERT ON items
+            BEGIN
+                INSERT INTO item_barcodes (item_id, canonical_code, upc_code, is_primary)
+                VALUES (NEW.id, COALESCE(NEW.gtin, TRIM(NEW.upc_code)), NEW.upc_code, TRUE);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_barcode_update AFTER UPDATE OF upc_code, gtin ON items
+            BEGIN
+                DELETE FROM item_barcodes WHERE item_id = OLD.id AND is_primary;
+                INSERT INTO item_barcodes (item_id, canonical_code, upc_code, is_primary)
+                VALUES (NEW.id, COALESCE(NEW.gtin, TRIM(NEW.upc_code)), NEW.upc_code, TRUE);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_barcode_delete AFTER DELETE ON items
+            BEGIN
+                DELETE FROM item_barcodes WHERE item_id = OLD.id;
+            END
+        ''')
+    
+    def migrate_item_search(self, conn):
+        """Add items_fts, a trigram full-text index for typeahead item search
+        
+        The index uses items as external content and is kept in sync by
+        triggers. SQLite builds without FTS5 trigram support (older than
+        3.34) skip it and search_items falls back to LIKE scans.
+        """
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                    product, brand, description, upc_code,
+                    content='items', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            return
+        
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items
+            BEGIN
+                INSERT INTO items_fts (rowid, product, brand, description, upc_code)
+                VALUES (NEW.id, NEW.product, NEW.brand, NEW.description, NEW.upc_code);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items
+            BEGIN
+                INSERT INTO items_fts (items_fts, rowid, product, brand, description, upc_code)
+                VALUES ('delete', OLD.id, OLD.product, OLD.brand, OLD.description, OLD.upc_code);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS items_fts_update
+            AFTER UPDATE OF product, brand, description, upc_code ON items
+            BEGIN
+                INSERT INTO items_fts (items_fts, rowid, product, brand, description, upc_code)
+                VALUES ('delete', OLD.id, OLD.product, OLD.brand, OLD.description, OLD.upc_code);
+                INSERT INTO items_fts (rowid, product, brand, description, upc_code)
+                VALUES (NEW.id, NEW.product, NEW.brand, NEW.description, NEW.upc_code);
+            END
+        ''')
+        conn.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+    
+    def migrate_customer_search(self, conn):
+        """Add indexed customer search and the customer_summary table
+        
+        - phone_digits / phone_digits_rev: digits-only phone, forward and
+          reversed, so both prefix and last-digits searches are index ranges
+        - customers_fts: trigram index on names for substring search
+        - customer_summary: per-customer sale count, totals, balance and last
+          sale date, maintained by triggers on sales so lists never need to
+          aggregate the sales table
+        """
+        for column in ('phone_digits', 'phone_digits_rev'):
+            if not self.column_exists(conn, 'customers', column):
+                conn.execute(f"ALTER TABLE customers ADD COLUMN {column} VARCHAR(20)")
+        
+        conn.create_function('phone_digits', 1, phone_digits, deterministic=True)
+        conn.create_function('phone_digits_rev', 1, lambda phone: phone_digits(phone)[::-1],
+                             deterministic=True)
+        conn.execute('''
+            UPDATE customers
+            SET phone_digits = phone_digits(phone), phone_digits_rev = phone_digits_rev(phone)
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_phone_digits ON customers(phone_digits)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_phone_digits_rev ON customers(phone_digits_rev)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name COLLATE NOCASE)")
+        
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+                    name, content='customers', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers
+                BEGIN
+                    INSERT INTO customers_fts (rowid, name) VALUES (NEW.id, NEW.name);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers
+                BEGIN
+                    INSERT INTO customers_fts (customers_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF name ON customers
+                BEGIN
+                    INSERT INTO customers_fts (customers_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+                    INSERT INTO customers_fts (rowid, name) VALUES (NEW.id, NEW.name);
+                END
+            ''')
+            conn.execute("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            pass  # No FTS5 trigram support, search_customers uses LIKE
+        
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_customer ON sales(customer_id, sale_date)")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS customer_summary (
+                customer_id INTEGER PRIMARY KEY,
+                sale_count INTEGER NOT NULL DEFAULT 0,
+                total_sales INTEGER NOT NULL DEFAULT 0,
+                balance_due INTEGER NOT NULL DEFAULT 0,
+                last_sale_date TIMESTAMP,
+                FOREIGN KEY (customer_id) REFERENCES customers(id)
+            )
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS customer_summary_customer_insert AFTER INSERT ON customers
+            BEGIN
+                INSERT OR IGNORE INTO customer_summary (customer_id) VALUES (NEW.id);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS customer_summary_sale_insert AFTER INSERT ON sales
+            BEGIN
+                INSERT OR IGNORE INTO customer_summary (customer_id) VALUES (NEW.customer_id);
+                UPDATE customer_summary SET
+                    sale_count = sale_count + 1,
+                    total_sales = total_sales + NEW.total_amount,
+                    balance_due = balance_due + NEW.total_amount - NEW.paid_amount,
+                    last_sale_date = MAX(COALESCE(last_sale_date, ''), COALESCE(NEW.sale_date, ''))
+                WHERE customer_id = NEW.customer_id;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS customer_summary_sale_update
+            AFTER UPDATE OF customer_id, total_amount, paid_amount, sale_date ON sales
+            BEGIN
+                UPDATE customer_summary SET
+                    sale_count = sale_count - 1,
+                    total_sales = total_sales - OLD.total_amount,
+                    balance_due = balance_due - (OLD.total_amount - OLD.paid_amount)
+                WHERE customer_id = OLD.customer_id;
+                INSERT OR IGNORE INTO customer_summary (customer_id) VALUES (NEW.customer_id);
+                UPDATE customer_summary SET
+                    sale_count = sale_count + 1,
+                    total_sales = total_sales + NEW.total_amount,
+                    balance_due = balance_due + NEW.total_amount - NEW.paid_amount,
+                    last_sale_date = (SELECT MAX(sale_date) FROM sales WHERE customer_id = NEW.customer_id)
+                WHERE customer_id = NEW.customer_id;
+                UPDATE customer_summary SET
+                    last_sale_date = (SELECT MAX(sale_date) FROM sales WHERE customer_id = OLD.customer_id)
+                WHERE customer_id = OLD.customer_id AND OLD.customer_id != NEW.customer_id;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS customer_summary_sale_delete AFTER DELETE ON sales
+            BEGIN
+                UPDATE customer_summary SET
+                    sale_count = sale_count - 1,
+                    total_sales = total_sales - OLD.total_amount,
+                    balance_due = balance_due - (OLD.total_amount - OLD.paid_amount),
+                    last_sale_date = (SELECT MAX(sale_date) FROM sales WHERE customer_id = OLD.customer_id)
+                WHERE customer_id = OLD.customer_id;
+            END
+        ''')
+        conn.execute('''
+            INSERT OR REPLACE INTO customer_summary
+                (customer_id, sale_count, total_sales, balance_due, last_sale_date)
+            SELECT
+                c.id,
+                COUNT(s.id),
+                COALESCE(SUM(s.total_amount), 0),
+                COALESCE(SUM(s.total_amount - s.paid_amount), 0),
+                MAX(s.sale_date)
+            FROM customers c
+            LEFT JOIN sales s ON c.id = s.customer_id
+            GROUP BY c.id
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_summary_balance ON customer_summary(balance_due)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_summary_last_sale ON customer_summary(last_sale_date)")
+    
+    def migrate_customer_paging(self, conn):
+        """Index the customer list sort orders for keyset pagination
+        
+        Customers without sales have no last_sale_date; the expression index
+        sorts them as '' so every sort key is comparable.
+        """
+        conn.execute("DROP INDEX IF EXISTS idx_customer_summary_last_sale")
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_customer_summary_recent
+            ON customer_summary(COALESCE(last_sale_date, ''), customer_id)
+        ''')
+    
+    def migrate_sale_item_snapshot(self, conn):
+        """Snapshot brand, description and cost into sale_items
+        
+        Brands and descriptions repeat across thousands of sale lines, so
+        they are stored once in sale_text and referenced by id. Existing
+        lines are filled from the current catalog, the best we still know.
+        """
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sale_text (
+                id INTEGER PRIMARY KEY,
+                value TEXT NOT NULL UNIQUE
+            )
+        ''')
+        for column, column_type in (('brand_id', 'INTEGER'), ('description_id', 'INTEGER'),
+                                    ('cost', 'INTEGER')):
+            if not self.column_exists(conn, 'sale_items', column):
+                conn.execute(f"ALTER TABLE sale_items ADD COLUMN {column} {column_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id)")
+        
+        conn.create_function('canonical_code', 1, canonical_code, deterministic=True)
+        conn.execute('''
+            CREATE TEMP TABLE sale_item_catalog AS
+            SELECT si.id AS sale_item_id, i.brand, i.description, i.cost
+            FROM sale_items si
+            JOIN item_barcodes b ON b.canonical_code = canonical_code(si.upc_code)
+            JOIN items i ON i.id = b.item_id
+            WHERE si.is_xt_item = 0 AND si.upc_code IS NOT NULL AND si.upc_code != ''
+        ''')
+        conn.execute("CREATE INDEX temp.idx_sale_item_catalog ON sale_item_catalog(sale_item_id)")
+        conn.execute('''
+            INSERT OR IGNORE INTO sale_text (value)
+            SELECT brand FROM sale_item_catalog WHERE brand IS NOT NULL AND brand != ''
+            UNION
+            SELECT description FROM sale_item_catalog WHERE description IS NOT NULL AND description != ''
+        ''')
+        conn.execute('''
+            UPDATE sale_items SET
+                brand_id = (SELECT t.id FROM sale_item_catalog c JOIN sale_text t ON t.value = c.brand
+                            WHERE c.sale_item_id = sale_items.id),
+                description_id = (SELECT t.id FROM sale_item_catalog c JOIN sale_text t ON t.value = c.description
+                                  WHERE c.sale_item_id = sale_items.id),
+                cost = (SELECT c.cost FROM sale_item_catalog c WHERE c.sale_item_id = sale_items.id)
+            WHERE id IN (SELECT sale_item_id FROM sale_item_catalog)
+        ''')
+        conn.execute("DROP TABLE sale_item_catalog")
+    
+    def migrate_receipts(self, conn):
+        """Add the receipts table of rendered, zlib-compressed receipts"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS receipts (
+                sale_id INTEGER PRIMARY KEY,
+                receipt_text BLOB NOT NULL,
+                escpos BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (sale_id) REFERENCES sales(id)
+            )
+        ''')
+    
+    def migrate_sales_date_index(self, conn):
+        """Index sales by date for date range batches and reports"""
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date)")
+    
+    def migrate_open_sales_index(self, conn):
+        """Partial covering index of unpaid sales for aging and statements
+        
+        Only sales that are not fully paid are in it, so it stays small as
+        paid history grows, and it holds every column the aging report reads.
+        """
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sales_open
+            ON sales(customer_id, sale_date, total_amount, paid_amount)
+            WHERE payment_status != 'fully_paid'
+        ''')
+    
+    def migrate_sales_rollups(self, conn):
+        """Add the sales_hourly and sales_daily rollup tables
+        
+        Each row totals the sales of one local hour ('YYYY-MM-DD HH') or
+        day (sale_date is stored in UTC), so reports read a handful of rows
+        however much history is kept. Sales
+        are added once, in order of ID, up to the watermark in
+        rollup_watermarks; existing sales are rolled up here.
+        """
+        for table, key in (('sales_hourly', 'hour'), ('sales_daily', 'day')):
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {key} TEXT PRIMARY KEY,
+                    sale_count INTEGER NOT NULL DEFAULT 0,
+                    gross INTEGER NOT NULL DEFAULT 0,
+                    paid INTEGER NOT NULL DEFAULT 0,
+                    on_account INTEGER NOT NULL DEFAULT 0,
+                    catalog_items INTEGER NOT NULL DEFAULT 0,
+                    xt_items INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_watermarks (
+                name TEXT PRIMARY KEY,
+                last_id INTEGER NOT NULL
+            )
+        ''')
+        self.update_sales_rollups(conn.cursor())
+    
+    def migrate_item_sales_rollup(self, conn):
+        """Add item_sales_daily, units, revenue and cost per UPC per day
+        
+        Catalog sale lines are rolled up once, from their own watermark, so
+        velocity reports over months read one row per UPC per day instead of
+        every sale line. Lines without a cost snapshot count toward revenue
+        but not costed_revenue, so margins only cover what has a known cost.
+        """
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS item_sales_daily (
+                day TEXT NOT NULL,
+                upc_code VARCHAR(50) NOT NULL,
+                brand_id INTEGER,
+                item_name VARCHAR(200) NOT NULL,
+                units INTEGER NOT NULL DEFAULT 0,
+                revenue INTEGER NOT NULL DEFAULT 0,
+                costed_revenue INTEGER NOT NULL DEFAULT 0,
+                cost INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, upc_code)
+            ) WITHOUT ROWID
+        ''')
+        self.update_item_rollups(conn.cursor())
+    
+    def migrate_sale_terminal(self, conn):
+        """Record which register (config TERMINAL_ID) rang up each sale
+        
+        Sales from before this are left NULL, an unknown terminal.
+        """
+        if not self.column_exists(conn, 'sales', 'terminal'):
+            conn.execute("ALTER TABLE sales ADD COLUMN terminal VARCHAR(20)")
+    
+    def migrate_integer_cents(self, conn):
+        """Convert every money column (MONEY_COLUMNS) from dollars to integer cents
+        
+        Amounts were floats, so totals drifted by fractions of a cent and
+        every sum had to be rounded. Each stored amount is rounded to the
+        cent it stood for. The sales update trigger would adjust
+        customer_summary once per sale, so it is set aside while sales are
+        converted and customer_summary is totalled again from sales.
+        """
+        trigger = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'customer_summary_sale_update'"
+        ).fetchone()
+        if trigger:
+            conn.execute("DROP TRIGGER customer_summary_sale_update")
+        
+        for table, columns in self.MONEY_COLUMNS.items():
+            if self.table_exists(conn, table):
+                conn.execute(f'''
+                    UPDATE {table} SET
+                    {', '.join(f"{column} = CAST(ROUND({column} * 100) AS INTEGER)" for column in columns)}
+                ''')
+        
+        if trigger:
+            conn.execute(trigger[0])
+        if self.table_exists(conn, 'customer_summary'):
+            conn.execute('''
+                UPDATE customer_summary SET
+                    total_sales = COALESCE((SELECT SUM(total_amount) FROM sales
+                                            WHERE customer_id = customer_summary.customer_id), 0),
+                    balance_due = COALESCE((SELECT SUM(total_amount - paid_amount) FROM sales
+                                            WHERE customer_id = customer_summary.customer_id), 0)
+            ''')
+    
+    def migrate_item_barcode_triggers(self, conn):
+        """Replace the item_barcodes triggers that silently dropped conflicting barcodes
+        
+        The old triggers used INSERT OR IGNORE, so an item whose barcode
+        already scanned to another item was saved with no barcode row.
+        Stale gtins and primary rows are repaired first; items whose code
+        belongs to another item are left without a row, as before.
+        """
+        conn.execute("DROP TRIGGER IF EXISTS items_barcode_insert")
+        conn.execute("DROP TRIGGER IF EXISTS items_barcode_update")
+        
+        conn.create_function('to_gtin14', 1, to_gtin14, deterministic=True)
+        conn.execute("UPDATE items SET gtin = to_gtin14(upc_code) WHERE gtin IS NOT to_gtin14(upc_code)")
+        conn.execute('''
+            DELETE FROM item_barcodes
+            WHERE is_primary
+              AND canonical_code IS NOT (SELECT COALESCE(gtin, TRIM(upc_code)) FROM items
+                                         WHERE id = item_barcodes.item_id)
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO item_barcodes (item_id, canonical_code, upc_code, is_primary)
+            SELECT id, COALESCE(gtin, TRIM(upc_code)), upc_code, TRUE FROM items ORDER BY id
+        ''')
+        
+        self.create_item_barcode_triggers(conn)
+    
+    def migrate_local_time_rollups(self, conn):
+        """Re-key the rollup tables on local hours and days
+        
+        They were keyed on sale_date as stored, in UTC, while the Z-report
+        and the report windows ask for local days, so evening sales landed
+        on the next day. Hourly rows are moved to their local hour rather
+        than rebuilt from sales, so paid/on_account keep their checkout
+        figures (in half-hour timezones an hour goes to the local hour it
+        starts in). Days are summed again from the hours; item_sales_daily
+        has no hours and is rebuilt from sale lines.
+        """
+        sums = ', '.join(f"SUM({column})" for column in self.ROLLUP_COLUMNS)
+        columns = ', '.join(self.ROLLUP_COLUMNS)
+        conn.execute(f'''
+            CREATE TEMP TABLE local_hourly AS
+            SELECT strftime('%Y-%m-%d %H', hour || ':00:00', 'localtime') AS hour, {sums}
+            FROM sales_hourly
+            GROUP BY 1
+        ''')
+        conn.execute("DELETE FROM sales_hourly")
+        conn.execute(f"INSERT INTO sales_hourly (hour, {columns}) SELECT * FROM local_hourly")
+        conn.execute("DROP TABLE local_hourly")
+        conn.execute("DELETE FROM sales_daily")
+        conn.execute(f"INSERT INTO sales_daily (day, {columns}) "
+                     f"SELECT substr(hour, 1, 10), {sums} FROM sales_hourly GROUP BY 1")
+        
+        conn.execute("DELETE FROM item_sales_daily")
+        conn.execute("DELETE FROM rollup_watermarks WHERE name = 'item_sales'")
+        self.update_item_rollups(conn.cursor())
+    
     # Customer operations
     def add_customer(self, phone: str, name: str) -> int:
         """Add a new customer and return customer ID"""
+        digits = phone_digits(phone)
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO customers (phone, name) VALUES (?, ?)",
-            (phone, name)
+            "INSERT INTO customers (phone, name, phone_digits, phone_digits_rev) VALUES (?, ?, ?, ?)",
+            (phone, name, digits, digits[::-1])
         )
         customer_id = cursor.lastrowid
         conn.commit()
@@ -111,47 +679,370 @@ class DatabaseManager:
             }
         return None
     
-    def get_customer_balance(self, customer_id: int) -> float:
-        """Get customer's outstanding balance"""
+    def search_customers(self, term: str, limit: int = 200) -> List[Dict]:
+        """Search customers by name or phone, with totals from customer_summary
+        
+        Terms made of phone characters match digit prefixes or the last
+        digits of the phone number (e.g. the last 4). Other terms match
+        names: substrings of 3+ characters via the trigram index, shorter
+        terms by name prefix.
+        """
+        term = term.strip()
+        if not term:
+            return []
+        
+        select = '''
+            SELECT c.id, c.name, c.phone, s.sale_count, s.total_sales, s.balance_due, s.last_sale_date
+            FROM customers c
+            JOIN customer_summary s ON s.customer_id = c.id
+        '''
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        digits = phone_digits(term)
+        if digits and all(ch.isdigit() or ch in ' -().+' for ch in term):
+            reversed_digits = digits[::-1]
+            cursor.execute(f'''
+                {select}
+                WHERE c.id IN (
+                    SELECT id FROM customers WHERE phone_digits >= ? AND phone_digits < ?
+                    UNION
+                    SELECT id FROM customers WHERE phone_digits_rev >= ? AND phone_digits_rev < ?
+                )
+                ORDER BY c.name COLLATE NOCASE
+                LIMIT ?
+            ''', (digits, digits + ':', reversed_digits, reversed_digits + ':', limit))
+        elif len(term) >= 3 and self.table_exists(conn, 'customers_fts'):
+            # Each word (or the whole term, if every word is short) is a quoted FTS5 string
+            words = [word for word in term.split() if len(word) >= 3] or [term]
+            match = ' AND '.join('"' + word.replace('"', '""') + '"' for word in words)
+            cursor.execute(f'''
+                {select}
+                WHERE c.id IN (SELECT rowid FROM customers_fts WHERE customers_fts MATCH ?)
+                ORDER BY c.name COLLATE NOCASE
+                LIMIT ?
+            ''', (match, limit))
+        else:
+            # LIKE is case-insensitive and uses the NOCASE name index for prefixes
+            cursor.execute(f'''
+                {select}
+                WHERE c.name LIKE ?
+                ORDER BY c.name COLLATE NOCASE
+                LIMIT ?
+            ''', (term.replace('%', '').replace('_', '') + '%' if len(term) < 3 else f'%{term}%', limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [self._customer_summary_row(row) for row in rows]
+    
+    def get_customers_page(self, sort: str = 'name', after: tuple = None,
+                           before: tuple = None, limit: int = 100) -> List[Dict]:
+        """Get one page of customers with totals, using keyset pagination
+        
+        ``after``/``before`` are the 'sort_key' of the last/first row already
+        shown; rows are always returned in display order. Each page is an
+        index range scan, so its cost does not grow with the customer count.
+        """
+        value, tiebreak, direction, source = self.CUSTOMER_SORTS[sort]
+        forward = before is None
+        key = after if forward else before
+        
+        # Walk the index backwards when paging towards the top of the list
+        descending = (direction == 'DESC') == forward
+        order = 'DESC' if descending else 'ASC'
+        
+        where = ''
+        params = []
+        if key is not None:
+            # Spelled out rather than as a row value so SQLite uses an index range
+            op = '<' if descending else '>'
+            where = f"WHERE {value} {op}= ? AND ({value} {op} ? OR {tiebreak} {op} ?)"
+            params = [key[0], key[0], key[1]]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT c.id, c.name, c.phone, s.sale_count, s.total_sales, s.balance_due,
+                   s.last_sale_date, {value}
+            FROM {source}
+            {where}
+            ORDER BY {value} {order}, {tiebreak} {order}
+            LIMIT ?
+        ''', params + [limit])
+        rows = cursor.fetchall()
+        conn.close()
+        
+        if not forward:
+            rows.reverse()
+        
+        customers = []
+        for row in rows:
+            customer = self._customer_summary_row(row)
+            customer['sort_key'] = (row[7], row[0])
+            customers.append(customer)
+        return customers
+    
+    def _customer_summary_row(self, row) -> Dict:
+        """Convert a customer/customer_summary row to a dict"""
+        return {
+            'id': row[0],
+            'name': row[1],
+            'phone': row[2],
+            'sale_count': row[3],
+            'total_sales': row[4],
+            'balance_due': row[5],
+            'last_sale_date': row[6]
+        }
+    
+    def get_customer_balance(self, customer_id: int) -> int:
+        """Get customer's outstanding balance in cents"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT balance_due FROM customer_summary WHERE customer_id = ?",
+            (customer_id,)
+        )
+        result = cursor.fetchone()
+        conn.close()
+        return result[0] if result and result[0] else 0
+    
+    def get_customer_summary(self, customer_id: int) -> Optional[Dict]:
+        """Get one customer with totals from customer_summary"""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT SUM(total_amount - paid_amount) 
+            SELECT c.id, c.name, c.phone, s.sale_count, s.total_sales, s.balance_due, s.last_sale_date
+            FROM customers c
+            JOIN customer_summary s ON s.customer_id = c.id
+            WHERE c.id = ?
+        ''', (customer_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return self._customer_summary_row(row) if row else None
+    
+    def apply_payment(self, customer_id: int, amount: int) -> int:
+        """Apply a payment in cents to a customer's unpaid sales, oldest first
+        
+        Runs in one transaction and returns the amount actually applied.
+        Stored receipts of the sales paid are dropped, so they are rendered
+        again with the new paid amount and balance.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, total_amount, paid_amount 
             FROM sales 
             WHERE customer_id = ? AND payment_status != 'fully_paid'
+            ORDER BY sale_date ASC
         ''', (customer_id,))
-        result = cursor.fetchone()[0]
+        
+        remaining_payment = amount
+        for sale_id, total_amount, paid_amount in cursor.fetchall():
+            if remaining_payment <= 0:
+                break
+            
+            outstanding = total_amount - paid_amount
+            payment_for_this_sale = min(remaining_payment, outstanding)
+            new_paid_amount = paid_amount + payment_for_this_sale
+            
+            # Update payment status
+            if new_paid_amount >= total_amount:
+                status = 'fully_paid'
+            else:
+                status = 'partial'
+            
+            cursor.execute('''
+                UPDATE sales 
+                SET paid_amount = ?, payment_status = ?
+                WHERE id = ?
+            ''', (new_paid_amount, status, sale_id))
+            cursor.execute("DELETE FROM receipts WHERE sale_id = ?", (sale_id,))
+            
+            remaining_payment -= payment_for_this_sale
+        
+        conn.commit()
         conn.close()
-        return result if result else 0.0
+        return amount - remaining_payment
     
+    def get_statement_customers(self, after_id: int = None, limit: int = 1000,
+                                as_of: str = None) -> List[Dict]:
+        """Get one page of customers who owe money, by customer ID
+        
+        A customer owes money if a sale made on or before ``as_of``
+        ('YYYY-MM-DD', default today) is still unpaid, the same sales
+        get_open_sales lists. Payments are not dated, so a sale paid since
+        ``as_of`` counts as paid. Pass the last ID of the previous page as
+        ``after_id`` to continue.
+        """
+        as_of = as_of or datetime.now().strftime('%Y-%m-%d')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # The subquery walks idx_sales_open in customer order
+        cursor.execute('''
+            SELECT c.id, c.name, c.phone, s.sale_count, s.total_sales, s.balance_due, s.last_sale_date
+            FROM (
+                SELECT customer_id FROM sales
+                WHERE payment_status != 'fully_paid' AND customer_id > ?
+                  AND total_amount - paid_amount > 0 AND sale_date < date(?, '+1 day')
+                GROUP BY customer_id
+                ORDER BY customer_id
+                LIMIT ?
+            ) o
+            JOIN customers c ON c.id = o.customer_id
+            JOIN customer_summary s ON s.customer_id = o.customer_id
+            ORDER BY o.customer_id
+        ''', (after_id or 0, as_of, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [self._customer_summary_row(row) for row in rows]
+    
+    def get_open_sales(self, customer_ids: List[int], as_of: str = None) -> Dict[int, List[Dict]]:
+        """Get sales with a balance for several customers, oldest first
+        
+        Returns {customer_id: [sale, ...]} with each sale aged in calendar
+        days to ``as_of`` ('YYYY-MM-DD', default today); sales made after
+        ``as_of`` are left out. One query covers the whole list, so a
+        statement run reads a page of customers at a time.
+        """
+        as_of = as_of or datetime.now().strftime('%Y-%m-%d')
+        open_sales = {customer_id: [] for customer_id in customer_ids}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(customer_ids), 500):
+            chunk = customer_ids[start:start + 500]
+            cursor.execute(f'''
+                SELECT customer_id, id, sale_date, total_amount, paid_amount,
+                       CAST(julianday(?) - julianday(date(sale_date)) AS INTEGER)
+                FROM sales
+                WHERE customer_id IN ({','.join('?' * len(chunk))})
+                  AND payment_status != 'fully_paid' AND total_amount - paid_amount > 0
+                  AND sale_date < date(?, '+1 day')
+                ORDER BY customer_id, sale_date, id
+            ''', [as_of] + chunk + [as_of])
+            for row in cursor.fetchall():
+                open_sales[row[0]].append({
+                    'id': row[1],
+                    'sale_date': row[2],
+                    'total_amount': row[3],
+                    'paid_amount': row[4],
+                    'balance': row[3] - row[4],
+                    'age_days': max(row[5] or 0, 0)
+                })
+        
+        conn.close()
+        return open_sales
+    
+    def get_aging_report(self, as_of: str = None) -> Dict:
+        """Accounts receivable aging per customer and in total, in one pass
+        
+        Unpaid sales are read from the partial index idx_sales_open and
+        bucketed by calendar days before ``as_of`` ('YYYY-MM-DD', default
+        today), one conditional sum per bucket in a single grouped scan.
+        Returns {'as_of', 'buckets', 'rows', 'totals'}, amounts in cents;
+        rows are sorted by amount due, largest first.
+        """
+        as_of = as_of or datetime.now().strftime('%Y-%m-%d')
+        as_of_date = datetime.strptime(as_of, '%Y-%m-%d')
+        
+        # Sales on or after each cutoff are younger than the bucket's lower bound
+        cutoffs = [(as_of_date - timedelta(days=days)).strftime('%Y-%m-%d')
+                   for _, _, days in self.AGING_BUCKETS[1:]]
+        bucket_sums = []
+        for index, (key, _, _) in enumerate(self.AGING_BUCKETS):
+            conditions = []
+            if index < len(cutoffs):
+                conditions.append(f"sale_date >= '{cutoffs[index]}'")
+            if index > 0:
+                conditions.append(f"sale_date < '{cutoffs[index - 1]}'")
+            bucket_sums.append(
+                f"COALESCE(SUM(CASE WHEN {' AND '.join(conditions)} "
+                f"THEN total_amount - paid_amount END), 0) AS {key}"
+            )
+        keys = [key for key, _, _ in self.AGING_BUCKETS]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT a.customer_id, c.name, c.phone, a.open_sales,
+                   CAST(julianday(?) - julianday(date(a.oldest)) AS INTEGER),
+                   {', '.join(f'a.{key}' for key in keys)}
+            FROM (
+                SELECT customer_id, COUNT(*) AS open_sales, MIN(sale_date) AS oldest,
+                       {', '.join(bucket_sums)}
+                FROM sales
+                WHERE payment_status != 'fully_paid' AND total_amount - paid_amount > 0
+                  AND sale_date < ?
+                GROUP BY customer_id
+            ) a
+            JOIN customers c ON c.id = a.customer_id
+        ''', (as_of, (as_of_date + timedelta(days=1)).strftime('%Y-%m-%d')))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        # Totals and sorting are cheaper here than as window columns and an
+        # ORDER BY, which repeat the totals on every row
+        columns = ['id', 'name', 'phone', 'open_sales', 'oldest_days'] + keys
+        report_rows = []
+        totals = dict.fromkeys(['customers', 'open_sales'] + keys + ['total'], 0)
+        for row in rows:
+            report_row = dict(zip(columns, row))
+            report_row['total'] = sum(row[5:])
+            report_rows.append(report_row)
+            totals['open_sales'] += row[3]
+        totals['customers'] = len(report_rows)
+        for index, key in enumerate(keys, 5):
+            totals[key] = sum(row[index] for row in rows)
+        totals['total'] = sum(totals[key] for key in keys)
+        report_rows.sort(key=lambda row: (-row['total'], row['id']))
+        
+        return {
+            'as_of': as_of,
+            'buckets': [(key, label) for key, label, _ in self.AGING_BUCKETS],
+            'rows': report_rows,
+            'totals': totals
+        }
+        
     # Item operations - UPDATED methods
-    def add_item(self, upc_code: str, name: str, price: float) -> int:
-        """Add a new item (legacy method - maps to new schema)"""
+    def add_item(self, upc_code: str, name: str, price: int) -> int:
+        """Add a new item (legacy method - maps to new schema)
+        
+        Raises sqlite3.IntegrityError if the barcode already scans to another item.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO items (upc_code, brand, product, description, cost, price) VALUES (?, ?, ?, ?, ?, ?)",
-            (upc_code, "", name, "", price, price)  # Empty brand/desc, cost=price for legacy
+            "INSERT INTO items (upc_code, gtin, brand, product, description, cost, price) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (upc_code, to_gtin14(upc_code), "", name, "", price, price)  # Empty brand/desc, cost=price for legacy
         )
         item_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return item_id
     
-    def add_item_full(self, upc_code: str, brand: str, product: str, description: str, cost: float, price: float) -> int:
-        """Add item with full details"""
+    def add_item_full(self, upc_code: str, brand: str, product: str, description: str, cost: int, price: int) -> int:
+        """Add item with full details, cost and price in cents
+        
+        Raises sqlite3.IntegrityError if the barcode already scans to another item.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO items (upc_code, brand, product, description, cost, price) VALUES (?, ?, ?, ?, ?, ?)",
-            (upc_code, brand, product, description, cost, price)
+            "INSERT INTO items (upc_code, gtin, brand, product, description, cost, price) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (upc_code, to_gtin14(upc_code), brand, product, description, cost, price)
         )
         item_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return item_id
     
-    def update_item_full(self, upc_code: str, brand: str, product: str, description: str, cost: float, price: float) -> bool:
+    def update_item_full(self, upc_code: str, brand: str, product: str, description: str, cost: int, price: int) -> bool:
         """Update existing item with full details"""
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -164,44 +1055,42 @@ class DatabaseManager:
         conn.close()
         return success
     
+    def update_item_upc(self, item_id: int, upc_code: str) -> bool:
+        """Change an item's primary barcode, returns False if the barcode is already in use"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # gtin is written with upc_code so the trigger files the new canonical code
+        try:
+            cursor.execute(
+                "UPDATE items SET upc_code = ?, gtin = ? WHERE id = ?",
+                (upc_code, to_gtin14(upc_code), item_id)
+            )
+        except sqlite3.IntegrityError:
+            conn.close()
+            return False
+        success = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return success
+    
     def normalize_upc(self, upc_code: str) -> str:
-        """Normalize UPC code - pad with leading zero if 11 digits"""
-        upc_clean = upc_code.strip()
-        if len(upc_clean) == 11:
-            return '0' + upc_clean
-        return upc_clean
+        """Normalize UPC code to the stored form - see utils.helpers.normalize_upc"""
+        return normalize_upc(upc_code)
 
     def get_item_by_upc(self, upc_code: str) -> Optional[Dict]:
-        """Get item by UPC code - handles leading zeros"""
-        # Try original UPC first
-        normalized_upc = self.normalize_upc(upc_code)
-        
+        """Get item by UPC code - handles leading zeros, EAN/UPC-E forms and alias barcodes"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Try normalized UPC first
-        cursor.execute(
-            "SELECT id, upc_code, brand, product, description, cost, price FROM items WHERE upc_code = ?",
-            (normalized_upc,)
-        )
+        # One indexed probe on the canonical code covers primary and alias barcodes
+        cursor.execute('''
+            SELECT i.id, i.upc_code, i.brand, i.product, i.description, i.cost, i.price
+            FROM item_barcodes b
+            JOIN items i ON i.id = b.item_id
+            WHERE b.canonical_code = ?
+        ''', (canonical_code(upc_code),))
         row = cursor.fetchone()
         
-        # If not found and original was different, try original
-        if not row and normalized_upc != upc_code:
-            cursor.execute(
-                "SELECT id, upc_code, brand, product, description, cost, price FROM items WHERE upc_code = ?",
-                (upc_code,)
-            )
-            row = cursor.fetchone()
-        
-        # If still not found, try without leading zero
-        if not row and upc_code.startswith('0'):
-            cursor.execute(
-                "SELECT id, upc_code, brand, product, description, cost, price FROM items WHERE upc_code = ?",
-                (upc_code[1:],)
-            )
-            row = cursor.fetchone()
-        
         conn.close()
         
         if row:
@@ -216,8 +1105,9 @@ class DatabaseManager:
                 'name': row[3]  # For backward compatibility
             }
         return None
-    def update_item_price(self, upc_code: str, new_price: float) -> bool:
-        """Update item price"""
+    
+    def update_item_price(self, upc_code: str, new_price: int) -> bool:
+        """Update item price, in cents"""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute(
@@ -229,6 +1119,137 @@ class DatabaseManager:
         conn.close()
         return success
     
+    def search_items(self, query: str, limit: int = 20) -> List[Dict]:
+        """Search items by product, brand, description or UPC prefix for typeahead
+        
+        Numeric queries list UPC prefix matches first. Text matching uses
+        the trigram index, so every word of 3+ characters must appear
+        somewhere in the item (substring match, case insensitive).
+        
+        FTS5's bm25 ORDER BY rank scores every match and takes ~100 ms for
+        common words on a 500k item catalog, so instead the first few
+        hundred matches are fetched unordered (the index stops early) and
+        ranked here: product/brand starting with the query first.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        rows = []
+        
+        if query.isdigit():
+            # ':' sorts right after '9', so this is an index range scan for the prefix
+            cursor.execute('''
+                SELECT id, upc_code, brand, product, description, cost, price
+                FROM items
+                WHERE upc_code >= ? AND upc_code < ?
+                ORDER BY upc_code
+                LIMIT ?
+            ''', (query, query + ':', limit))
+            rows = cursor.fetchall()
+        
+        words = [word for word in query.split() if len(word) >= 3]
+        if len(rows) < limit and words:
+            seen_ids = [row[0] for row in rows]
+            exclude = f"AND i.id NOT IN ({','.join('?' * len(seen_ids))})" if seen_ids else ''
+            
+            if self.table_exists(conn, 'items_fts'):
+                match = ' AND '.join('"' + word.replace('"', '""') + '"' for word in words)
+                cursor.execute(f'''
+                    SELECT i.id, i.upc_code, i.brand, i.product, i.description, i.cost, i.price
+                    FROM items_fts f
+                    JOIN items i ON i.id = f.rowid
+                    WHERE items_fts MATCH ? {exclude}
+                    LIMIT ?
+                ''', (match, *seen_ids, max(limit * 10, 200)))
+                
+                first_word = words[0].lower()
+                
+                def relevance(row):
+                    product = (row[3] or '').lower()
+                    brand = (row[2] or '').lower()
+                    return (not product.startswith(first_word),
+                            not brand.startswith(first_word),
+                            product)
+                
+                rows += sorted(cursor.fetchall(), key=relevance)[:limit - len(rows)]
+            else:
+                conditions = ' AND '.join(
+                    "(i.product || ' ' || COALESCE(i.brand, '') || ' ' || "
+                    "COALESCE(i.description, '') || ' ' || i.upc_code) LIKE ?"
+                    for _ in words
+                )
+                cursor.execute(f'''
+                    SELECT i.id, i.upc_code, i.brand, i.product, i.description, i.cost, i.price
+                    FROM items i
+                    WHERE {conditions} {exclude}
+                    ORDER BY i.product
+                    LIMIT ?
+                ''', (*[f'%{word}%' for word in words], *seen_ids, limit - len(rows)))
+                rows += cursor.fetchall()
+        
+        conn.close()
+        
+        return [
+            {
+                'id': row[0],
+                'upc_code': row[1],
+                'brand': row[2],
+                'product': row[3],
+                'description': row[4],
+                'cost': row[5],
+                'price': row[6],
+                'name': row[3]  # For backward compatibility
+            }
+            for row in rows
+        ]
+    
+    def add_item_barcode(self, item_id: int, upc_code: str) -> bool:
+        """Add an alias barcode to an item, returns False if the barcode is already in use"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR IGNORE INTO item_barcodes (item_id, canonical_code, upc_code, is_primary)
+            VALUES (?, ?, ?, FALSE)
+        ''', (item_id, canonical_code(upc_code), normalize_upc(upc_code)))
+        success = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return success
+    
+    def remove_item_barcode(self, upc_code: str) -> bool:
+        """Remove an alias barcode (primary barcodes can't be removed)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM item_barcodes WHERE canonical_code = ? AND NOT is_primary",
+            (canonical_code(upc_code),)
+        )
+        success = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return success
+    
+    def get_item_barcodes(self, item_id: int) -> List[Dict]:
+        """Get all barcodes that scan to an item, primary first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT upc_code, canonical_code, is_primary
+            FROM item_barcodes
+            WHERE item_id = ?
+            ORDER BY is_primary DESC, id
+        ''', (item_id,))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [
+            {'upc_code': row[0], 'canonical_code': row[1], 'is_primary': bool(row[2])}
+            for row in rows
+        ]
+    
     def get_all_items(self) -> List[Dict]:
         """Get all items - UPDATED to return all fields"""
         conn = self.get_connection()
@@ -251,6 +1272,110 @@ class DatabaseManager:
             for row in rows
         ]
     
+    def import_items(self, items: List[Dict], mode: str = 'insert') -> Dict:
+        """Bulk import items from CSV rows in one transaction
+        
+        In 'insert' mode items whose barcode already exists are skipped;
+        in 'update' mode existing items are updated and new ones added.
+        Each row's optional 'aliases' are added as extra barcodes for the item.
+        Rows whose barcode already scans to a different item (another form
+        of the same GTIN, or an alias) are not imported and are returned in
+        'conflicts' as (barcode, barcode it scans to) pairs.
+        Returns counts of inserted, updated, skipped items and aliases added.
+        """
+        upcs = [item['upc'] for item in items]
+        gtins = to_gtin14_batch(upcs) if items else []
+        codes = canonical_code_batch(upcs) if items else []
+        rows = [
+            {
+                'upc': item['upc'], 'gtin': str(gtin) or None, 'code': str(code),
+                'brand': item['brand'], 'product': item['product'],
+                'description': item['description'], 'cost': item['cost'], 'price': item['price']
+            }
+            for item, gtin, code in zip(items, gtins, codes)
+        ]
+        
+        # Within the file, the first row for a canonical code wins
+        first_upcs = {}
+        conflicts = []
+        for row in rows:
+            first_upc = first_upcs.setdefault(row['code'], row['upc'])
+            if first_upc != row['upc']:
+                conflicts.append((row['upc'], first_upc))
+        
+        alias_rows = []
+        for row, item in zip(rows, items):
+            for alias in item.get('aliases', []):
+                alias_rows.append({
+                    'upc': row['upc'],
+                    'code': row['code'],
+                    'alias_code': canonical_code(alias),
+                    'alias_upc': normalize_upc(alias)
+                })
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        before = cursor.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        
+        try:
+            # Then against the database, joining a temp table of the file's codes
+            cursor.execute("CREATE TEMP TABLE import_codes (code TEXT, upc TEXT)")
+            cursor.executemany("INSERT INTO import_codes VALUES (:code, :upc)", rows)
+            conflicts += cursor.execute('''
+                SELECT c.upc, i.upc_code
+                FROM import_codes c
+                JOIN item_barcodes b ON b.canonical_code = c.code
+                JOIN items i ON i.id = b.item_id
+                WHERE i.upc_code != c.upc
+            ''').fetchall()
+            cursor.execute("DROP TABLE import_codes")
+            
+            conflicting = {upc for upc, _ in conflicts}
+            rows = [row for row in rows if row['upc'] not in conflicting]
+            alias_rows = [alias for alias in alias_rows if alias['upc'] not in conflicting]
+            
+            if mode == 'insert':
+                cursor.executemany('''
+                    INSERT INTO items (upc_code, gtin, brand, product, description, cost, price)
+                    SELECT :upc, :gtin, :brand, :product, :description, :cost, :price
+                    WHERE NOT EXISTS (SELECT 1 FROM items WHERE upc_code = :upc)
+                ''', rows)
+            else:
+                cursor.executemany('''
+                    INSERT INTO items (upc_code, gtin, brand, product, description, cost, price)
+                    VALUES (:upc, :gtin, :brand, :product, :description, :cost, :price)
+                    ON CONFLICT(upc_code) DO UPDATE SET
+                        brand = excluded.brand,
+                        product = excluded.product,
+                        description = excluded.description,
+                        cost = excluded.cost,
+                        price = excluded.price
+                ''', rows)
+            after = cursor.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            
+            # Aliases attach to whichever item the row's barcode resolves to
+            changes_before = conn.total_changes
+            cursor.executemany('''
+                INSERT OR IGNORE INTO item_barcodes (item_id, canonical_code, upc_code, is_primary)
+                SELECT item_id, :alias_code, :alias_upc, FALSE
+                FROM item_barcodes WHERE canonical_code = :code
+            ''', alias_rows)
+            aliases_added = conn.total_changes - changes_before
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        inserted = after - before
+        if mode == 'insert':
+            return {'inserted': inserted, 'updated': 0, 'skipped': len(rows) - inserted,
+                    'aliases': aliases_added, 'conflicts': conflicts}
+        return {'inserted': inserted, 'updated': len(rows) - inserted, 'skipped': 0,
+                'aliases': aliases_added, 'conflicts': conflicts}
+    
     def clear_all_items(self) -> None:
         """Delete all items from database"""
         conn = self.get_connection()
@@ -260,8 +1385,8 @@ class DatabaseManager:
         conn.close()
     
     # Sale operations
-    def create_sale(self, customer_id: int, total_amount: float, 
-                   paid_amount: float = 0, payment_status: str = 'pay_later') -> int:
+    def create_sale(self, customer_id: int, total_amount: int, 
+                   paid_amount: int = 0, payment_status: str = 'pay_later') -> int:
         """Create a new sale and return sale ID"""
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -275,21 +1400,312 @@ class DatabaseManager:
         return sale_id
     
     def add_sale_item(self, sale_id: int, item_name: str, quantity: int, 
-                     unit_price: float, upc_code: str = None, 
-                     discounted_price: float = None, is_xt_item: bool = False) -> int:
+                     unit_price: int, upc_code: str = None, 
+                     discounted_price: int = None, is_xt_item: bool = False,
+                     brand: str = None, description: str = None, cost: int = None) -> int:
         """Add item to sale"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        text_ids = self.intern_sale_text(cursor, [brand, description])
         cursor.execute('''
             INSERT INTO sale_items (sale_id, item_name, upc_code, quantity, 
-                                  unit_price, discounted_price, is_xt_item)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (sale_id, item_name, upc_code, quantity, unit_price, discounted_price, is_xt_item))
+                                  unit_price, discounted_price, is_xt_item,
+                                  brand_id, description_id, cost)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (sale_id, item_name, upc_code, quantity, unit_price, discounted_price, is_xt_item,
+              text_ids.get(brand), text_ids.get(description), cost))
         item_id = cursor.lastrowid
         conn.commit()
         conn.close()
         return item_id
     
+    def intern_sale_text(self, cursor, values) -> Dict[str, int]:
+        """Get sale_text ids for brand/description strings, adding new ones"""
+        values = {value for value in values if value}
+        if not values:
+            return {}
+        
+        cursor.executemany(
+            "INSERT OR IGNORE INTO sale_text (value) VALUES (?)",
+            [(value,) for value in values]
+        )
+        placeholders = ', '.join('?' * len(values))
+        cursor.execute(f"SELECT value, id FROM sale_text WHERE value IN ({placeholders})",
+                       list(values))
+        return dict(cursor.fetchall())
+    
+    def record_sale(self, customer_id: int, total_amount: int, paid_amount: int,
+                    payment_status: str, items: List[Dict], terminal: str = None) -> int:
+        """Write a sale and all its lines in one transaction and return the sale ID
+        
+        Each item is a cart dict: name, upc_code, quantity, unit_price,
+        discounted_price, is_xt_item and the catalog snapshot taken when it
+        was scanned (brand, description, cost). Amounts are in cents.
+        ``terminal`` names the register the sale was rung up on.
+        """
+        conn = self.get_connection()
+        try:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO sales (customer_id, total_amount, paid_amount, payment_status, terminal)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (customer_id, total_amount, paid_amount, payment_status, terminal))
+                sale_id = cursor.lastrowid
+                
+                text_ids = self.intern_sale_text(
+                    cursor,
+                    [item.get('brand') for item in items] + [item.get('description') for item in items]
+                )
+                cursor.executemany('''
+                    INSERT INTO sale_items (sale_id, item_name, upc_code, quantity, 
+                                          unit_price, discounted_price, is_xt_item,
+                                          brand_id, description_id, cost)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [
+                    (sale_id, item['name'], item['upc_code'], item['quantity'],
+                     item['unit_price'], item['discounted_price'], item['is_xt_item'],
+                     text_ids.get(item.get('brand')), text_ids.get(item.get('description')),
+                     item.get('cost'))
+                    for item in items
+                ])
+                self.update_sales_rollups(cursor)
+                self.update_item_rollups(cursor)
+        finally:
+            conn.close()
+        
+        return sale_id
+    
+    def update_sales_rollups(self, cursor) -> int:
+        """Add sales after the rollup watermark to sales_hourly and sales_daily
+        
+        Runs in the caller's transaction: record_sale calls it for each
+        checkout, and refresh_sales_rollups catches up on sales written any
+        other way. Only the new sales are read, by ID range. Returns the
+        number of sales added.
+        """
+        last_id, max_id = self._rollup_range(cursor, 'sales')
+        if max_id <= last_id:
+            return 0
+        
+        cursor.execute('''
+            SELECT strftime('%Y-%m-%d %H', s.sale_date, 'localtime'), COUNT(*),
+                   SUM(s.total_amount), SUM(s.paid_amount),
+                   SUM(s.total_amount - s.paid_amount),
+                   COALESCE(SUM(i.catalog_items), 0), COALESCE(SUM(i.xt_items), 0)
+            FROM sales s
+            LEFT JOIN (
+                SELECT sale_id,
+                       SUM(CASE WHEN is_xt_item THEN 0 ELSE quantity END) AS catalog_items,
+                       SUM(CASE WHEN is_xt_item THEN quantity ELSE 0 END) AS xt_items
+                FROM sale_items
+                WHERE sale_id > ? AND sale_id <= ?
+                GROUP BY sale_id
+            ) i ON i.sale_id = s.id
+            WHERE s.id > ? AND s.id <= ?
+            GROUP BY 1
+        ''', (last_id, max_id, last_id, max_id))
+        hours = cursor.fetchall()
+        
+        days = {}
+        for hour in hours:
+            day = days.setdefault(hour[0][:10], [0] * len(self.ROLLUP_COLUMNS))
+            for index, value in enumerate(hour[1:]):
+                day[index] += value
+        
+        updates = ', '.join(f"{column} = {column} + excluded.{column}" for column in self.ROLLUP_COLUMNS)
+        placeholders = ', '.join('?' * (len(self.ROLLUP_COLUMNS) + 1))
+        for table, key, periods in (('sales_hourly', 'hour', [(hour[0], hour[1:]) for hour in hours]),
+                                    ('sales_daily', 'day', days.items())):
+            cursor.executemany(f'''
+                INSERT INTO {table} ({key}, {', '.join(self.ROLLUP_COLUMNS)})
+                VALUES ({placeholders})
+                ON CONFLICT ({key}) DO UPDATE SET {updates}
+            ''', [[period] + list(values) for period, values in periods])
+        
+        self._set_watermark(cursor, 'sales', max_id)
+        return sum(hour[1] for hour in hours)
+    
+    def update_item_rollups(self, cursor) -> int:
+        """Add catalog lines of sales after the item watermark to item_sales_daily
+        
+        Called with update_sales_rollups; XT items have no UPC and are left
+        out. Returns the number of (day, UPC) rows added or updated.
+        """
+        last_id, max_id = self._rollup_range(cursor, 'item_sales')
+        if max_id <= last_id:
+            return 0
+        
+        line_revenue = "si.quantity * COALESCE(si.discounted_price, si.unit_price)"
+        cursor.execute(f'''
+            INSERT INTO item_sales_daily
+                (day, upc_code, brand_id, item_name, units, revenue, costed_revenue, cost)
+            SELECT date(s.sale_date, 'localtime'), si.upc_code, MAX(si.brand_id), MAX(si.item_name),
+                   SUM(si.quantity), SUM({line_revenue}),
+                   COALESCE(SUM(CASE WHEN si.cost IS NOT NULL THEN {line_revenue} END), 0),
+                   COALESCE(SUM(si.quantity * si.cost), 0)
+            FROM sale_items si
+            JOIN sales s ON s.id = si.sale_id
+            WHERE si.sale_id > ? AND si.sale_id <= ?
+              AND NOT si.is_xt_item AND si.upc_code IS NOT NULL AND si.upc_code != ''
+            GROUP BY 1, 2
+            ON CONFLICT (day, upc_code) DO UPDATE SET
+                brand_id = COALESCE(excluded.brand_id, brand_id),
+                item_name = excluded.item_name,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue,
+                costed_revenue = costed_revenue + excluded.costed_revenue,
+                cost = cost + excluded.cost
+        ''', (last_id, max_id))
+        
+        rows = cursor.rowcount
+        self._set_watermark(cursor, 'item_sales', max_id)
+        return rows
+    
+    def _rollup_range(self, cursor, name: str) -> Tuple[int, int]:
+        """(watermark, newest sale ID) for a rollup; sales in between are new"""
+        cursor.execute("SELECT last_id FROM rollup_watermarks WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        cursor.execute("SELECT MAX(id) FROM sales")
+        return (row[0] if row else 0), (cursor.fetchone()[0] or 0)
+    
+    def _set_watermark(self, cursor, name: str, last_id: int):
+        """Record the last sale ID a rollup includes"""
+        cursor.execute('''
+            INSERT INTO rollup_watermarks (name, last_id) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id
+        ''', (name, last_id))
+    
+    def refresh_sales_rollups(self) -> int:
+        """Catch the rollup tables up with sales and return how many were added"""
+        conn = self.get_connection()
+        try:
+            with conn:
+                cursor = conn.cursor()
+                self.update_item_rollups(cursor)
+                return self.update_sales_rollups(cursor)
+        finally:
+            conn.close()
+    
+    def get_z_report(self, day: str = None) -> Dict:
+        """End-of-day totals for one local day, 'YYYY-MM-DD' (default today)
+        
+        Built from the rollup tables after catching them up, so it reads one
+        daily row and at most 24 hourly rows. Returns {'day', 'totals',
+        'hours'}; totals and each hour are dicts of ROLLUP_COLUMNS. paid and
+        on_account are the day's sales as tendered at checkout, not payments
+        taken on account that day.
+        """
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        self.refresh_sales_rollups()
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        columns = ', '.join(self.ROLLUP_COLUMNS)
+        cursor.execute(f"SELECT {columns} FROM sales_daily WHERE day = ?", (day,))
+        row = cursor.fetchone()
+        cursor.execute(f'''
+            SELECT hour, {columns} FROM sales_hourly
+            WHERE hour BETWEEN ? AND ?
+            ORDER BY hour
+        ''', (f"{day} 00", f"{day} 23"))
+        hours = cursor.fetchall()
+        conn.close()
+        
+        return {
+            'day': day,
+            'totals': dict(zip(self.ROLLUP_COLUMNS, row or [0] * len(self.ROLLUP_COLUMNS))),
+            'hours': [dict(zip(['hour'] + self.ROLLUP_COLUMNS, hour)) for hour in hours]
+        }
+    
+    def get_product_velocity(self, start_date: str, end_date: str, by: str = 'upc',
+                             limit: int = None) -> List[Dict]:
+        """Units, revenue and margin per UPC or per brand, best sellers first
+        
+        Reads item_sales_daily for the days from ``start_date`` to
+        ``end_date`` ('YYYY-MM-DD', inclusive) after catching it up. ``by``
+        is 'upc' or 'brand'; ``limit`` keeps only the top rows. Money is in
+        cents. Margins cover lines with a cost snapshot; margin_pct is None
+        without any.
+        """
+        self.refresh_sales_rollups()
+        days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days + 1
+        if by == 'brand':
+            group, columns = 'brand_id', "brand_id, COUNT(DISTINCT upc_code), ''"
+        else:
+            group, columns = 'upc_code', 'MAX(brand_id) AS brand_id, upc_code, MAX(item_name)'
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT t.value, v.*
+            FROM (
+                SELECT {columns}, SUM(units) AS units, SUM(revenue) AS revenue,
+                       SUM(costed_revenue), SUM(cost)
+                FROM item_sales_daily
+                WHERE day BETWEEN ? AND ?
+                GROUP BY {group}
+                ORDER BY units DESC, revenue DESC, {group}
+                LIMIT ?
+            ) v
+            LEFT JOIN sale_text t ON t.id = v.brand_id
+            ORDER BY v.units DESC, v.revenue DESC, v.{group}
+        ''', (start_date, end_date, -1 if limit is None else limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        velocity = []
+        for brand, _, key, name, units, revenue, costed_revenue, cost in rows:
+            margin = costed_revenue - cost
+            row = {
+                'brand': brand or '',
+                'units': units,
+                'units_per_day': round(units / days, 2),
+                'revenue': revenue,
+                'margin': margin,
+                'margin_pct': round(margin * 100 / costed_revenue, 1) if costed_revenue else None
+            }
+            if by == 'brand':
+                row['products'] = key
+            else:
+                row['upc_code'] = key
+                row['name'] = name
+            velocity.append(row)
+        return velocity
+    
+    def get_slow_movers(self, start_date: str, end_date: str, limit: int = 100) -> List[Dict]:
+        """Catalog items that sold the fewest units between two dates, unsold first"""
+        self.refresh_sales_rollups()
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT i.upc_code, i.product, i.brand, COALESCE(v.units, 0) AS units,
+                   COALESCE(v.revenue, 0) AS revenue, v.last_day
+            FROM items i
+            LEFT JOIN (
+                SELECT upc_code, SUM(units) AS units, SUM(revenue) AS revenue, MAX(day) AS last_day
+                FROM item_sales_daily
+                WHERE day BETWEEN ? AND ?
+                GROUP BY upc_code
+            ) v ON v.upc_code = i.upc_code
+            ORDER BY units, revenue, i.upc_code
+            LIMIT ?
+        ''', (start_date, end_date, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [
+            {
+                'upc_code': row[0],
+                'name': row[1],
+                'brand': row[2] or '',
+                'units': row[3],
+                'revenue': row[4],
+                'last_sold': row[5] or ''
+            }
+            for row in rows
+        ]
+    
     def get_customer_sales(self, customer_id: int) -> List[Dict]:
         """Get all sales for a customer"""
         conn = self.get_connection()
@@ -315,14 +1731,236 @@ class DatabaseManager:
             for row in rows
         ]
     
+    def get_customer_sales_page(self, customer_id: int, after: tuple = None,
+                                before: tuple = None, limit: int = 50) -> List[Dict]:
+        """Get one page of a customer's sales, newest first, using keyset pagination
+        
+        ``after``/``before`` are the 'sort_key' of the last/first sale already
+        shown. Pages are index range scans on sales(customer_id, sale_date),
+        so the newest page costs the same for 10 or 10,000 sales.
+        """
+        forward = before is None
+        key = after if forward else before
+        op, order = ('<', 'DESC') if forward else ('>', 'ASC')
+        
+        where = ''
+        params = [customer_id]
+        if key is not None:
+            where = f"AND sale_date {op}= ? AND (sale_date {op} ? OR id {op} ?)"
+            params += [key[0], key[0], key[1]]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id, total_amount, paid_amount, payment_status, sale_date
+            FROM sales 
+            WHERE customer_id = ? {where}
+            ORDER BY sale_date {order}, id {order}
+            LIMIT ?
+        ''', params + [limit])
+        rows = cursor.fetchall()
+        conn.close()
+        
+        if not forward:
+            rows.reverse()
+        
+        return [
+            {
+                'id': row[0],
+                'total_amount': row[1],
+                'paid_amount': row[2],
+                'payment_status': row[3],
+                'sale_date': row[4],
+                'balance': row[1] - row[2],
+                'sort_key': (row[4], row[0])
+            }
+            for row in rows
+        ]
+    
+    def get_sale_for_receipt(self, sale_id: int) -> Optional[Dict]:
+        """Get a sale, its customer and all lines in one query
+        
+        Line details come from the snapshot taken at checkout, never the
+        live catalog. Returns None if the sale does not exist. XT items have
+        'product' set to None.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT s.id, s.total_amount, s.paid_amount, s.payment_status, s.sale_date,
+                   c.name, c.phone,
+                   si.id, si.item_name, si.upc_code, si.quantity, si.unit_price,
+                   si.discounted_price, si.is_xt_item,
+                   b.value, d.value, si.cost
+            FROM sales s
+            JOIN customers c ON c.id = s.customer_id
+            LEFT JOIN sale_items si ON si.sale_id = s.id
+            LEFT JOIN sale_text b ON b.id = si.brand_id
+            LEFT JOIN sale_text d ON d.id = si.description_id
+            WHERE s.id = ?
+            ORDER BY si.id
+        ''', (sale_id,))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        if not rows:
+            return None
+        
+        header = rows[0]
+        sale = {
+            'id': header[0],
+            'total_amount': header[1],
+            'paid_amount': header[2],
+            'payment_status': header[3],
+            'sale_date': header[4],
+            'customer_name': header[5],
+            'customer_phone': header[6],
+            'items': []
+        }
+        
+        for row in rows:
+            if row[7] is None:
+                continue  # Sale without lines
+            price = row[12] or row[11]
+            is_catalog_item = bool(row[9]) and not row[13]
+            sale['items'].append({
+                'name': row[8],
+                'upc_code': row[9],
+                'quantity': row[10],
+                'unit_price': row[11],
+                'discounted_price': price,
+                'is_xt_item': row[13],
+                'total': row[10] * price,
+                'brand': row[14],
+                'product': row[8] if is_catalog_item else None,
+                'description': row[15],
+                'cost': row[16]
+            })
+        
+        return sale
+    
+    def get_sale_ids(self, start_date: str = None, end_date: str = None,
+                     customer_id: int = None) -> List[int]:
+        """Get sale IDs in a date range and/or for one customer, oldest first
+        
+        Dates are 'YYYY-MM-DD' and both ends are inclusive.
+        """
+        where = []
+        params = []
+        if customer_id is not None:
+            where.append("customer_id = ?")
+            params.append(customer_id)
+        if start_date:
+            where.append("sale_date >= ?")
+            params.append(start_date)
+        if end_date:
+            where.append("sale_date < date(?, '+1 day')")
+            params.append(end_date)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT id FROM sales
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY sale_date, id
+        ''', params)
+        sale_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return sale_ids
+    
+    def iter_new_sales(self, after_id: int = 0, chunk_size: int = 50000):
+        """Yield sales with ID above ``after_id`` and their lines, a chunk of sales at a time
+        
+        Each chunk is (sales, lines), oldest sale first. A sale is (id,
+        epoch seconds, customer_id, terminal, total in cents); a line is
+        (sale_items id, sale_id, upc_code, brand_id, quantity, unit price,
+        price sold at and cost in cents, is_xt_item), with cost None when
+        no cost was snapshotted. Only fields fixed at checkout are read, so
+        a chunk never has to be read again.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute('''
+                    SELECT id, CAST(strftime('%s', sale_date) AS INTEGER), customer_id,
+                           COALESCE(terminal, ''), total_amount
+                    FROM sales
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (after_id, chunk_size))
+                sales = cursor.fetchall()
+                if not sales:
+                    return
+                
+                cursor.execute('''
+                    SELECT id, sale_id, COALESCE(upc_code, ''), COALESCE(brand_id, 0), quantity,
+                           unit_price, COALESCE(discounted_price, unit_price), cost, is_xt_item
+                    FROM sale_items
+                    WHERE sale_id > ? AND sale_id <= ?
+                ''', (after_id, sales[-1][0]))
+                yield sales, cursor.fetchall()
+                after_id = sales[-1][0]
+        finally:
+            conn.close()
+    
+    def get_sale_lines(self, line_ids) -> Dict[int, Dict]:
+        """Get sale lines by sale_items id, with their sale's date and terminal"""
+        line_ids = list(line_ids)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        lines = {}
+        for start in range(0, len(line_ids), 500):
+            chunk = line_ids[start:start + 500]
+            cursor.execute(f'''
+                SELECT si.id, si.sale_id, s.sale_date, s.terminal, si.upc_code, si.item_name,
+                       si.quantity, si.unit_price, si.discounted_price, si.cost
+                FROM sale_items si
+                JOIN sales s ON s.id = si.sale_id
+                WHERE si.id IN ({', '.join('?' * len(chunk))})
+            ''', chunk)
+            for row in cursor.fetchall():
+                lines[row[0]] = {
+                    'sale_id': row[1],
+                    'sale_date': row[2],
+                    'terminal': row[3] or '',
+                    'upc_code': row[4],
+                    'name': row[5],
+                    'quantity': row[6],
+                    'unit_price': row[7],
+                    'discounted_price': row[8],
+                    'cost': row[9]
+                }
+        conn.close()
+        return lines
+    
+    def get_sale_text(self, text_ids) -> Dict[int, str]:
+        """Look up sale_text values (brands, descriptions) by id"""
+        text_ids = list(text_ids)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        values = {}
+        for start in range(0, len(text_ids), 500):
+            chunk = text_ids[start:start + 500]
+            cursor.execute(f"SELECT id, value FROM sale_text WHERE id IN ({', '.join('?' * len(chunk))})",
+                           chunk)
+            values.update(cursor.fetchall())
+        conn.close()
+        return values
+    
     def get_sale_items(self, sale_id: int) -> List[Dict]:
-        """Get all items for a specific sale"""
+        """Get all items for a specific sale, with their checkout snapshot"""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT item_name, upc_code, quantity, unit_price, discounted_price, is_xt_item
-            FROM sale_items 
-            WHERE sale_id = ?
+            SELECT si.item_name, si.upc_code, si.quantity, si.unit_price, si.discounted_price,
+                   si.is_xt_item, b.value, d.value, si.cost
+            FROM sale_items si
+            LEFT JOIN sale_text b ON b.id = si.brand_id
+            LEFT JOIN sale_text d ON d.id = si.description_id
+            WHERE si.sale_id = ?
+            ORDER BY si.id
         ''', (sale_id,))
         rows = cursor.fetchall()
         conn.close()
@@ -335,7 +1973,61 @@ class DatabaseManager:
                 'unit_price': row[3],
                 'discounted_price': row[4] or row[3],
                 'is_xt_item': row[5],
-                'total': row[2] * (row[4] or row[3])
+                'total': row[2] * (row[4] or row[3]),
+                'brand': row[6],
+                'description': row[7],
+                'cost': row[8]
             }
             for row in rows
-        ]
\ No newline at end of file
+        ]
+    
+    # Stored receipts
+    def save_receipt(self, sale_id: int, receipt_text: str, escpos: bytes):
+        """Store a rendered receipt, replacing any earlier rendering
+        
+        The ESC/POS bytes are mostly the receipt text again, so they are
+        compressed with the text as a preset dictionary and cost only a few
+        bytes more than the text alone.
+        """
+        text_bytes = receipt_text.encode('utf-8')
+        compressor = zlib.compressobj(zdict=text_bytes)
+        escpos_blob = compressor.compress(escpos) + compressor.flush()
+        
+        conn = self.get_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO receipts (sale_id, receipt_text, escpos) VALUES (?, ?, ?)",
+            (sale_id, zlib.compress(text_bytes), escpos_blob)
+        )
+        conn.commit()
+        conn.close()
+    
+    def get_stored_receipt(self, sale_id: int) -> Optional[Dict]:
+        """Get a stored receipt's text and ESC/POS bytes, or None if not stored"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT receipt_text, escpos FROM receipts WHERE sale_id = ?",
+            (sale_id,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        
+        if not row:
+            return None
+        
+        text_bytes = zlib.decompress(row[0])
+        decompressor = zlib.decompressobj(zdict=text_bytes)
+        return {
+            'sale_id': sale_id,
+            'text': text_bytes.decode('utf-8'),
+            'escpos': decompressor.decompress(row[1]) + decompressor.flush()
+        }
+    
+    def get_last_sale_id(self) -> Optional[int]:
+        """Get the ID of the most recent sale"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(id) FROM sales")
+        result = cursor.fetchone()[0]
+        conn.close()
+        return result
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Fake network receipt printer
+Listens on a raw TCP port like an ESC/POS printer's port 9100 and records
+every byte it receives, for testing printing without paper
+
+Usage:
+    python fake_printer.py [--port 9100] [--output received.bin]
+    then set PRINTER_NAME = "escpos" and PRINTER_DEVICE = "tcp://127.0.0.1:9100" in config.py
+"""
+
+import argparse
+import socketserver
+import threading
+
+# GS V 66 0 - every receipt ends with a cut
+CUT = b'\x1dVB\x00'
+
+class FakePrinterServer:
+    """Threaded TCP server that records the ESC/POS byte stream"""
+
+    def __init__(self, host='127.0.0.1', port=0, output_path=None):
+        self.received = bytearray()
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.output_path = output_path
+        self.thread = None
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with server.lock:
+                    server.connections += 1
+                while True:
+                    data = self.request.recv(65536)
+                    if not data:
+                        break
+                    server.record(data)
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def address(self):
+        """Device string for config.PRINTER_DEVICE"""
+        host, port = self.server.server_address
+        return f"tcp://{host}:{port}"
+
+    def record(self, data):
+        """Keep received bytes and append them to the output file"""
+        with self.lock:
+            self.received.extend(data)
+            if self.output_path:
+                with open(self.output_path, 'ab') as file:
+                    file.write(data)
+
+    def receipts(self):
+        """Split the recorded stream into receipts at each paper cut"""
+        with self.lock:
+            data = bytes(self.received)
+        return [part + CUT for part in data.split(CUT)[:-1]]
+
+    def start(self):
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    """Run the fake printer until interrupted"""
+    parser = argparse.ArgumentParser(description="Fake ESC/POS network printer")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=9100, help="TCP port (default 9100)")
+    parser.add_argument('--output', default=None, help="Append received bytes to this file")
+    args = parser.parse_args()
+
+    printer = FakePrinterServer(args.host, args.port, args.output)
+    print(f"🖨️  Fake printer listening on {printer.address}")
+    try:
+        printer.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        printer.server.server_close()
+        print(f"Received {len(printer.received)} bytes, {len(printer.receipts())} receipts "
+              f"over {printer.connections} connections")
+
+if __name__ == "__main__":
+    main()
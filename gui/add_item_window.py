@@ -154,6 +154,8 @@ COLUMN ORDER (must be exact):
    4. Description    - Product description
    5. Cost           - Your cost price (numbers only)
    6. Price          - Selling price (numbers only)
+   7+. Alias UPCs    - Optional extra barcodes for the same item
+                       (case pack, old packaging), one per column
 
 DATA REQUIREMENTS:
    • UPC: 11-12 digit numbers only (e.g., 51141347042 or 051141347042)
@@ -170,8 +172,8 @@ IMPORT LIMITS:
 
 EXAMPLE FORMAT:
    Row 1: [BLANK]
-   Row 2: UPC,Brand,Product,Description,Cost,Price
-   Row 3: 051141347042,Coca-Cola,12oz Can,Classic Coke,0.75,1.25
+   Row 2: UPC,Brand,Product,Description,Cost,Price,Alias UPC
+   Row 3: 051141347042,Coca-Cola,12oz Can,Classic Coke,0.75,1.25,10051141347049
    Row 4: 123456789012,Samsung,Galaxy Phone,Smartphone,400.00,599.99"""
         
         # Create scrollable text widget for instructions
@@ -8,6 +8,9 @@ import platform
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.models import DatabaseManager
+from utils.barcode_scanner import clean_scanned_code
+from gui.item_search import ItemSearchDropdown
+from utils.helpers import to_cents, format_cents
 
 class ChangePriceWindow:
     def __init__(self, parent=None):
@@ -192,6 +195,9 @@ class ChangePriceWindow:
         self.upc_entry.pack(side='left', padx=(10, 5))
         self.upc_entry.bind('<Return>', self.lookup_item)
         
+        # Typing a product, brand or description shows matching items
+        self.item_search = ItemSearchDropdown(self.upc_entry, self.db, self.show_item_details)
+        
         lookup_btn = self.create_button(
             upc_frame,
             text="Lookup Item",
@@ -206,7 +212,7 @@ class ChangePriceWindow:
         # Instructions
         instructions = tk.Label(
             lookup_frame,
-            text="Scan or enter UPC code to find item",
+            text="Scan or enter UPC code, or type a product, brand or description to search",
             font=("Arial", 10),
             bg='white',
             fg='#666666'
@@ -334,7 +340,9 @@ class ChangePriceWindow:
     
     def lookup_item(self, event=None):
         """Look up item by UPC code"""
-        upc = self.upc_entry.get().strip()
+        self.item_search.cancel()
+        
+        upc = clean_scanned_code(self.upc_entry.get())
         if not upc:
             messagebox.showwarning("Warning", "Please enter a UPC code")
             return
@@ -344,7 +352,7 @@ class ChangePriceWindow:
         
         if item:
             self.show_item_details(item)
-        else:
+        elif not self.item_search.search_now():
             self.show_item_not_found(upc)
     
     def show_item_details(self, item):
@@ -361,7 +369,7 @@ class ChangePriceWindow:
         self.item_upc_label.config(text=f"UPC: {item['upc_code']}")
         self.item_upc_label.pack(anchor='w', pady=(0, 5))
         
-        self.current_price_label.config(text=f"Current Price: ${item['price']:.2f}")
+        self.current_price_label.config(text=f"Current Price: ${format_cents(item['price'])}")
         self.current_price_label.pack(anchor='w', pady=(0, 10))
         
         # Show price change section
@@ -369,7 +377,7 @@ class ChangePriceWindow:
         
         # Pre-fill new price with current price
         self.new_price_entry.delete(0, tk.END)
-        self.new_price_entry.insert(0, f"{item['price']:.2f}")
+        self.new_price_entry.insert(0, format_cents(item['price']))
         self.new_price_entry.select_range(0, tk.END)
         
         # Enable update button
@@ -413,7 +421,7 @@ class ChangePriceWindow:
         
         # Validate price
         try:
-            new_price = float(new_price_str)
+            new_price = to_cents(new_price_str)
             if new_price <= 0:
                 raise ValueError("Price must be positive")
         except ValueError:
@@ -430,8 +438,8 @@ class ChangePriceWindow:
         result = messagebox.askyesno(
             "Confirm Price Change",
             f"Change price for '{self.current_item['name']}'?\n\n"
-            f"From: ${old_price:.2f}\n"
-            f"To: ${new_price:.2f}"
+            f"From: ${format_cents(old_price)}\n"
+            f"To: ${format_cents(new_price)}"
         )
         
         if not result:
@@ -446,12 +454,12 @@ class ChangePriceWindow:
                 self.current_item['price'] = new_price
                 
                 # Update display
-                self.current_price_label.config(text=f"Current Price: ${new_price:.2f}")
+                self.current_price_label.config(text=f"Current Price: ${format_cents(new_price)}")
                 
                 # Show success message
                 messagebox.showinfo("Success", f"Price updated successfully!\n\n"
                                               f"Item: {self.current_item['name']}\n"
-                                              f"New Price: ${new_price:.2f}")
+                                              f"New Price: ${format_cents(new_price)}")
                 
                 # Clear UPC entry for next item
                 self.upc_entry.delete(0, tk.END)
@@ -8,11 +8,20 @@ import platform
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.models import DatabaseManager
+from gui.paged_treeview import PagedTreeview, list_fetch
+from utils import events
+from utils.helpers import to_cents, format_cents
+from utils.receipt_store import flush_receipts
 
 class CustomerWindow:
+    # Wait this long after the last keystroke before searching
+    SEARCH_DELAY_MS = 250
+    
     def __init__(self, parent=None):
         self.parent = parent
         self.db = DatabaseManager()
+        self.pending_search = None
+        self.customer_sort = 'name'
         
         # Detect platform
         self.is_mac = platform.system() == 'Darwin'
@@ -35,6 +44,10 @@ class CustomerWindow:
         
         # Load customers
         self.load_customers()
+        
+        # Refresh rows when payments, sales or new customers happen anywhere
+        events.subscribe(events.CUSTOMER_CHANGED, self.on_customer_changed)
+        self.window.bind('<Destroy>', self.on_destroy, add='+')
     
     def setup_styles(self):
         """Setup ttk styles for cross-platform consistency"""
@@ -206,7 +219,8 @@ class CustomerWindow:
             insertbackground="black"
         )
         self.search_entry.pack(side='left', padx=(10, 5))
-        self.search_entry.bind('<KeyRelease>', self.search_customers)
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
+        self.search_entry.bind('<Return>', self.search_customers)
         
         refresh_btn = self.create_button(
             controls_frame,
@@ -243,12 +257,15 @@ class CustomerWindow:
         self.customer_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12,
                                          style="Treeview")
         
-        # Configure columns
-        self.customer_tree.heading('Name', text='Customer Name')
+        # Configure columns (click Name, Balance Due or Last Sale to sort)
+        self.customer_tree.heading('Name', text='Customer Name',
+                                   command=lambda: self.sort_customers('name'))
         self.customer_tree.heading('Phone', text='Phone Number')
         self.customer_tree.heading('Total Sales', text='Total Sales')
-        self.customer_tree.heading('Balance Due', text='Balance Due')
-        self.customer_tree.heading('Last Sale', text='Last Sale Date')
+        self.customer_tree.heading('Balance Due', text='Balance Due',
+                                   command=lambda: self.sort_customers('balance'))
+        self.customer_tree.heading('Last Sale', text='Last Sale Date',
+                                   command=lambda: self.sort_customers('last_sale'))
         
         # Column widths
         self.customer_tree.column('Name', width=200)
@@ -262,7 +279,12 @@ class CustomerWindow:
                                    style="Vertical.TScrollbar")
         h_scrollbar = ttk.Scrollbar(list_frame, orient='horizontal', command=self.customer_tree.xview,
                                    style="Horizontal.TScrollbar")
-        self.customer_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.customer_tree.configure(xscrollcommand=h_scrollbar.set)
+        
+        # Only a window of rows lives in the tree, pages load as the list scrolls
+        self.customer_list = PagedTreeview(self.customer_tree, v_scrollbar,
+                                           self.fetch_customers, self.format_customer_row)
+        self.customer_tree.tag_configure('has_balance', background="#cd8181")
         
         # Pack treeview and scrollbars
         self.customer_tree.grid(row=0, column=0, sticky='nsew', padx=(10, 0), pady=10)
@@ -348,133 +370,92 @@ class CustomerWindow:
             self.receipt_tree.heading(col, text=col)
             self.receipt_tree.column(col, width=80)
         
+        receipt_scrollbar = ttk.Scrollbar(receipt_frame, orient='vertical', command=self.receipt_tree.yview,
+                                         style="Vertical.TScrollbar")
+        receipt_scrollbar.pack(side='right', fill='y')
         self.receipt_tree.pack(fill='both', expand=True)
         self.receipt_tree.bind('<Double-1>', self.view_receipt_details)
+        
+        # Newest receipts first, older pages load on scroll
+        self.receipt_list = PagedTreeview(self.receipt_tree, receipt_scrollbar,
+                                          lambda after=None, before=None, limit=None: [],
+                                          self.format_receipt_row, page_size=50, max_rows=200)
     
     def load_customers(self):
-        """Load all customers into the tree"""
-        # Clear existing items
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
-        
-        # Get all customers with their sales data
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT 
-                c.id,
-                c.name,
-                c.phone,
-                COALESCE(SUM(s.total_amount), 0) as total_sales,
-                COALESCE(SUM(s.total_amount - s.paid_amount), 0) as balance_due,
-                MAX(s.sale_date) as last_sale
-            FROM customers c
-            LEFT JOIN sales s ON c.id = s.customer_id
-            GROUP BY c.id, c.name, c.phone
-            ORDER BY c.name
-        ''')
-        
-        customers = cursor.fetchall()
-        conn.close()
-        
-        # Add customers to tree
-        for customer in customers:
-            customer_id, name, phone, total_sales, balance_due, last_sale = customer
-            last_sale_date = last_sale[:10] if last_sale else 'Never'
-            
-            # Color code based on balance (using light pink for balance due)
-            tags = []
-            if balance_due > 0:
-                tags = ['has_balance']
-            
-            self.customer_tree.insert('', 'end', values=(
-                name,
-                phone,
-                f"${total_sales:.2f}",
-                f"${balance_due:.2f}",
-                last_sale_date
-            ), tags=tags)
-        
-        # Configure tag colors (light pink background for customers with balance)
-        self.customer_tree.tag_configure('has_balance', background="#cd8181")
+        """Show the first page of all customers"""
+        if self.pending_search:
+            self.window.after_cancel(self.pending_search)
+            self.pending_search = None
+        
+        self.customer_list.load(self.fetch_customers)
+    
+    def fetch_customers(self, after=None, before=None, limit=100):
+        """Fetch a page of customers in the current sort order"""
+        return self.db.get_customers_page(self.customer_sort, after, before, limit)
+    
+    def sort_customers(self, sort):
+        """Change the customer sort order and reload from the top"""
+        self.customer_sort = sort
+        self.search_entry.delete(0, tk.END)
+        self.load_customers()
+    
+    def format_customer_row(self, customer):
+        """Format a customer summary as tree values and tags"""
+        last_sale = customer['last_sale_date']
+        last_sale_date = last_sale[:10] if last_sale else 'Never'
+        
+        # Color code based on balance (using light pink for balance due)
+        tags = []
+        if customer['balance_due'] > 0:
+            tags = ['has_balance']
+        
+        values = (
+            customer['name'],
+            customer['phone'],
+            f"${format_cents(customer['total_sales'])}",
+            f"${format_cents(customer['balance_due'])}",
+            last_sale_date
+        )
+        return values, tags
+    
+    def schedule_search(self, event=None):
+        """Search once typing pauses instead of on every keystroke"""
+        # Return has already searched through its own binding
+        if event is not None and event.keysym == 'Return':
+            return
+        if self.pending_search:
+            self.window.after_cancel(self.pending_search)
+        self.pending_search = self.window.after(self.SEARCH_DELAY_MS, self.search_customers)
     
     def search_customers(self, event=None):
         """Search customers by name or phone"""
-        search_term = self.search_entry.get().strip().lower()
-        
-        # Clear existing items
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
+        if self.pending_search:
+            self.window.after_cancel(self.pending_search)
+            self.pending_search = None
+        search_term = self.search_entry.get().strip()
         
         if not search_term:
             self.load_customers()
             return
         
-        # Get filtered customers
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT 
-                c.id,
-                c.name,
-                c.phone,
-                COALESCE(SUM(s.total_amount), 0) as total_sales,
-                COALESCE(SUM(s.total_amount - s.paid_amount), 0) as balance_due,
-                MAX(s.sale_date) as last_sale
-            FROM customers c
-            LEFT JOIN sales s ON c.id = s.customer_id
-            WHERE LOWER(c.name) LIKE ? OR c.phone LIKE ?
-            GROUP BY c.id, c.name, c.phone
-            ORDER BY c.name
-        ''', (f'%{search_term}%', f'%{search_term}%'))
-        
-        customers = cursor.fetchall()
-        conn.close()
-        
-        # Add filtered customers to tree
-        for customer in customers:
-            customer_id, name, phone, total_sales, balance_due, last_sale = customer
-            last_sale_date = last_sale[:10] if last_sale else 'Never'
-            
-            tags = []
-            if balance_due > 0:
-                tags = ['has_balance']
-            
-            self.customer_tree.insert('', 'end', values=(
-                name,
-                phone,
-                f"${total_sales:.2f}",
-                f"${balance_due:.2f}",
-                last_sale_date
-            ), tags=tags)
+        # Search results come back in one query and are paged from memory
+        results = self.db.search_customers(search_term)
+        self.customer_list.load(list_fetch(results))
     
     def on_customer_select(self, event=None):
         """Handle customer selection"""
-        selection = self.customer_tree.selection()
-        if not selection:
-            return
-        
-        # Get selected customer data
-        item = self.customer_tree.item(selection[0])
-        values = item['values']
-        
-        if not values:
+        customer = self.customer_list.selected_row()
+        if not customer:
             return
         
-        customer_name = values[0]
-        customer_phone = values[1]
-        balance_due = values[3]
-        
         # Update customer info display
         self.customer_info_label.config(
-            text=f"Customer: {customer_name} ({customer_phone}) | Balance: {balance_due}"
+            text=f"Customer: {customer['name']} ({customer['phone']}) | "
+                 f"Balance: ${format_cents(customer['balance_due'])}"
         )
         
         # Enable/disable pay balance button
-        balance_amount = float(balance_due.replace('$', ''))
-        if balance_amount > 0:
+        if customer['balance_due'] > 0:
             if self.is_mac:
                 # Re-create button if needed on Mac
                 if not self.pay_balance_btn.winfo_viewable():
@@ -488,127 +469,114 @@ class CustomerWindow:
                 self.pay_balance_btn.config(state='disabled')
         
         # Load customer receipts
-        self.load_customer_receipts(customer_phone)
+        self.load_customer_receipts(customer['id'])
     
-    def load_customer_receipts(self, phone):
-        """Load receipts for selected customer"""
-        # Clear existing receipts
-        for item in self.receipt_tree.get_children():
-            self.receipt_tree.delete(item)
-        
-        # Get customer
-        customer = self.db.get_customer_by_phone(phone)
-        if not customer:
-            return
-        
-        # Get customer sales
-        sales = self.db.get_customer_sales(customer['id'])
+    def load_customer_receipts(self, customer_id):
+        """Load the newest page of receipts for the selected customer"""
+        def fetch(after=None, before=None, limit=50):
+            return self.db.get_customer_sales_page(customer_id, after, before, limit)
         
-        # Add sales to receipt tree
-        for sale in sales:
-            status = sale['payment_status'].replace('_', ' ').title()
-            
-            self.receipt_tree.insert('', 'end', values=(
-                sale['id'],
-                sale['sale_date'][:10] if sale['sale_date'] else 'N/A',
-                f"${sale['total_amount']:.2f}",
-                f"${sale['paid_amount']:.2f}",
-                f"${sale['balance']:.2f}",
-                status
-            ))
+        self.receipt_list.load(fetch)
+    
+    def format_receipt_row(self, sale):
+        """Format a sale as receipt tree values and tags"""
+        status = sale['payment_status'].replace('_', ' ').title()
+        
+        values = (
+            sale['id'],
+            sale['sale_date'][:10] if sale['sale_date'] else 'N/A',
+            f"${format_cents(sale['total_amount'])}",
+            f"${format_cents(sale['paid_amount'])}",
+            f"${format_cents(sale['balance'])}",
+            status
+        )
+        return values, []
     
     def pay_balance(self, event=None):
         """Handle balance payment"""
-        selection = self.customer_tree.selection()
-        if not selection:
+        customer = self.customer_list.selected_row()
+        if not customer:
             messagebox.showwarning("Warning", "Please select a customer first")
             return
         
-        # Get selected customer
-        item = self.customer_tree.item(selection[0])
-        values = item['values']
-        customer_phone = values[1]
-        balance_str = values[3]
-        balance_amount = float(balance_str.replace('$', ''))
+        balance_amount = customer['balance_due']
+        balance_str = f"${format_cents(balance_amount)}"
         
         if balance_amount <= 0:
             messagebox.showinfo("Info", "This customer has no outstanding balance")
             return
         
         # Ask for payment amount
-        payment = simpledialog.askfloat(
+        payment = simpledialog.askstring(
             "Pay Balance",
-            f"Outstanding balance: {balance_str}\nEnter payment amount:",
-            minvalue=0.01,
-            maxvalue=balance_amount
+            f"Outstanding balance: {balance_str}\nEnter payment amount:"
         )
         
         if payment is None:
             return
-        
-        # Get customer and update payments
-        customer = self.db.get_customer_by_phone(customer_phone)
-        if not customer:
+        try:
+            payment = to_cents(payment)
+            if not 0 < payment <= balance_amount:
+                raise ValueError()
+        except ValueError:
+            messagebox.showwarning("Warning", f"Please enter an amount from 0.01 to {balance_str[1:]}")
             return
         
-        # Get unpaid sales and apply payment
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        # A receipt still queued from checkout would be stored after the
+        # payment drops it, with the old balance
+        flush_receipts()
+        self.db.apply_payment(customer['id'], payment)
         
-        cursor.execute('''
-            SELECT id, total_amount, paid_amount 
-            FROM sales 
-            WHERE customer_id = ? AND payment_status != 'fully_paid'
-            ORDER BY sale_date ASC
-        ''', (customer['id'],))
-        
-        unpaid_sales = cursor.fetchall()
-        remaining_payment = payment
-        
-        for sale_id, total_amount, paid_amount in unpaid_sales:
-            if remaining_payment <= 0:
-                break
-            
-            outstanding = total_amount - paid_amount
-            payment_for_this_sale = min(remaining_payment, outstanding)
-            new_paid_amount = paid_amount + payment_for_this_sale
-            
-            # Update payment status
-            if new_paid_amount >= total_amount:
-                status = 'fully_paid'
+        # Refresh this customer's row and receipts, and any other open window
+        events.publish(events.CUSTOMER_CHANGED, customer_id=customer['id'])
+        messagebox.showinfo("Success", f"Payment of ${format_cents(payment)} applied successfully!")
+    
+    def on_customer_changed(self, customer_id):
+        """Redraw one customer's row, and their details if selected"""
+        row = self.customer_list.get_row(str(customer_id))
+        if not row:
+            # A new customer, or one outside the rows shown: fetch what is
+            # shown again so it appears if it belongs there
+            if self.search_entry.get().strip():
+                self.search_customers()
             else:
-                status = 'partial'
-            
-            cursor.execute('''
-                UPDATE sales 
-                SET paid_amount = ?, payment_status = ?
-                WHERE id = ?
-            ''', (new_paid_amount, status, sale_id))
-            
-            remaining_payment -= payment_for_this_sale
+                self.customer_list.reload()
+            return
         
-        conn.commit()
-        conn.close()
+        customer = self.db.get_customer_summary(customer_id)
+        if not customer:
+            return
         
-        # Refresh displays
-        self.load_customers()
-        messagebox.showinfo("Success", f"Payment of ${payment:.2f} applied successfully!")
+        # Keep the row's place in the list until the next reload
+        customer['sort_key'] = row.get('sort_key')
+        self.customer_list.update_row(customer)
+        
+        selected = self.customer_list.selected_row()
+        if selected and selected['id'] == customer_id:
+            self.on_customer_select()
     
     def view_receipt_details(self, event=None):
         """View detailed receipt"""
-        selection = self.receipt_tree.selection()
-        if not selection:
+        sale = self.receipt_list.selected_row()
+        if not sale:
             return
-        
-        item = self.receipt_tree.item(selection[0])
-        sale_id = item['values'][0]
+        sale_id = sale['id']
         
         # Import and show receipt window
         from gui.sale_window import ReceiptWindow
         receipt_window = ReceiptWindow(self.window, self.db, sale_id)
     
+    def on_destroy(self, event):
+        """Stop listening for changes once the window is gone"""
+        if event.widget is self.window:
+            events.unsubscribe(events.CUSTOMER_CHANGED, self.on_customer_changed)
+    
     def close_window(self):
         """Close the customer window"""
+        if self.pending_search:
+            self.window.after_cancel(self.pending_search)
+        self.customer_list.cancel()
+        self.receipt_list.cancel()
         self.window.destroy()
 
 # Main function to test the customer window
@@ -4,9 +4,12 @@ import csv
 import sys
 import os
 import platform
+import queue
+import threading
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.models import DatabaseManager
+from utils.helpers import normalize_upc, is_valid_gtin_batch, to_cents, format_cents
 
 class ImportItemsWindow:
     def __init__(self, parent=None):
@@ -268,9 +271,12 @@ class ImportItemsWindow:
         )
         self.status_label.pack(pady=5)
         
-        # Import button
+        # Action buttons
+        action_frame = tk.Frame(self.window, bg='white')
+        action_frame.pack(pady=10)
+        
         self.import_btn = self.create_button(
-            self.window, 
+            action_frame, 
             text="IMPORT ITEMS", 
             command=self.import_items,
             bg_color='#28a745', 
@@ -278,7 +284,18 @@ class ImportItemsWindow:
             font=("Arial", 12, "bold"), 
             height=2
         )
-        self.import_btn.pack(pady=10)
+        self.import_btn.pack(side='left', padx=5)
+        
+        decode_btn = self.create_button(
+            action_frame,
+            text="DECODE BARCODE IMAGES",
+            command=self.decode_barcode_images,
+            bg_color='#007bff',
+            fg_color='white',
+            font=("Arial", 12, "bold"),
+            height=2
+        )
+        decode_btn.pack(side='left', padx=5)
     
     def browse_file(self):
         file_path = filedialog.askopenfilename(
@@ -312,10 +329,8 @@ class ImportItemsWindow:
                 
                 for row in data_rows:
                     if len(row) >= 6:  # Ensure we have all required columns
-                        # Normalize UPC - pad with 0 if 11 digits
-                        upc = row[0].strip()
-                        if len(upc) == 11:
-                            upc = '0' + upc
+                        # Normalize UPC - pads 11 digit codes, expands UPC-E
+                        upc = normalize_upc(row[0])
                         
                         try:
                             item_data = {
@@ -323,8 +338,10 @@ class ImportItemsWindow:
                                 'brand': row[1].strip(),
                                 'product': row[2].strip(),
                                 'description': row[3].strip(),
-                                'cost': float(row[4].strip()),
-                                'price': float(row[5].strip())
+                                'cost': to_cents(row[4]),
+                                'price': to_cents(row[5]),
+                                # Columns after Price are extra barcodes for the same item
+                                'aliases': [code.strip() for code in row[6:] if code.strip()]
                             }
                             self.csv_data.append(item_data)
                             
@@ -339,17 +356,26 @@ class ImportItemsWindow:
                                     item_data['brand'],
                                     item_data['product'],
                                     desc_display,
-                                    f"${item_data['cost']:.2f}",
-                                    f"${item_data['price']:.2f}"
+                                    f"${format_cents(item_data['cost'])}",
+                                    f"${format_cents(item_data['price'])}"
                                 ))
                         except ValueError as e:
                             print(f"Skipping invalid row: {row} - Error: {e}")
                             continue
                 
+                # Flag barcodes whose check digit is wrong (usually typos)
+                bad_check_digits = 0
+                if self.csv_data:
+                    valid = is_valid_gtin_batch([item['upc'] for item in self.csv_data])
+                    bad_check_digits = int((~valid).sum())
+                
                 # Update status
+                status_text = f"Loaded {len(self.csv_data)} valid items"
+                if bad_check_digits:
+                    status_text += f" ({bad_check_digits} with invalid barcode check digits)"
                 self.status_label.config(
-                    text=f"Loaded {len(self.csv_data)} valid items", 
-                    fg='#28a745'
+                    text=status_text, 
+                    fg='#28a745' if not bad_check_digits else '#FF9800'
                 )
                 
                 if len(self.csv_data) == 0:
@@ -378,73 +404,30 @@ class ImportItemsWindow:
             return
         
         try:
-            success_count = 0
-            error_count = 0
-            duplicate_count = 0
-            
-            # Progress tracking
-            total_items = len(self.csv_data)
+            self.status_label.config(
+                text=f"Importing {len(self.csv_data)} items...",
+                fg='#007bff'
+            )
+            self.window.update()
             
-            for idx, item_data in enumerate(self.csv_data):
-                try:
-                    if mode == "insert":
-                        # Check if item already exists
-                        existing_item = self.db.get_item_by_upc(item_data['upc'])
-                        if existing_item:
-                            duplicate_count += 1
-                            continue  # Skip duplicates in insert mode
-                        
-                        self.db.add_item_full(
-                            item_data['upc'], 
-                            item_data['brand'], 
-                            item_data['product'],
-                            item_data['description'], 
-                            item_data['cost'], 
-                            item_data['price']
-                        )
-                        success_count += 1
-                    else:  # update mode
-                        success = self.db.update_item_full(
-                            item_data['upc'], 
-                            item_data['brand'], 
-                            item_data['product'],
-                            item_data['description'], 
-                            item_data['cost'], 
-                            item_data['price']
-                        )
-                        if success:
-                            success_count += 1
-                        else:
-                            # Item doesn't exist, insert it
-                            self.db.add_item_full(
-                                item_data['upc'], 
-                                item_data['brand'], 
-                                item_data['product'],
-                                item_data['description'], 
-                                item_data['cost'], 
-                                item_data['price']
-                            )
-                            success_count += 1
-                            
-                except Exception as e:
-                    error_count += 1
-                    print(f"Error with item {item_data['upc']}: {e}")
-                
-                # Update status every 100 items
-                if (idx + 1) % 100 == 0:
-                    self.status_label.config(
-                        text=f"Processing... {idx + 1}/{total_items} items",
-                        fg='#007bff'
-                    )
-                    self.window.update()
+            counts = self.db.import_items(self.csv_data, mode)
+            success_count = counts['inserted'] + counts['updated']
             
             # Final result message
             result_msg = f"Import Complete!\n\n"
             result_msg += f"✅ Successfully imported: {success_count}\n"
-            if error_count > 0:
-                result_msg += f"❌ Errors: {error_count}\n"
-            if duplicate_count > 0:
-                result_msg += f"⏭️ Duplicates skipped: {duplicate_count}\n"
+            if counts['updated'] > 0:
+                result_msg += f"🔄 Updated existing: {counts['updated']}\n"
+            if counts['skipped'] > 0:
+                result_msg += f"⏭️ Duplicates skipped: {counts['skipped']}\n"
+            if counts['aliases'] > 0:
+                result_msg += f"🏷️ Alias barcodes added: {counts['aliases']}\n"
+            if counts['conflicts']:
+                result_msg += f"❌ Barcode conflicts, not imported: {len(counts['conflicts'])}\n"
+                for upc, existing_upc in counts['conflicts'][:10]:
+                    result_msg += f"    {upc} already scans as {existing_upc}\n"
+                if len(counts['conflicts']) > 10:
+                    result_msg += f"    ...and {len(counts['conflicts']) - 10} more\n"
             
             messagebox.showinfo("Import Complete", result_msg)
             
@@ -464,6 +447,71 @@ class ImportItemsWindow:
             messagebox.showerror("Error", f"Import failed: {str(e)}")
             self.status_label.config(text="Import failed", fg='#dc3545')
 
+    def decode_barcode_images(self):
+        """Decode barcodes from a directory of receiving photos into a results CSV"""
+        directory = filedialog.askdirectory(title="Select Folder of Barcode Images")
+        if not directory:
+            return
+        
+        output_path = filedialog.asksaveasfilename(
+            title="Save Results CSV",
+            defaultextension=".csv",
+            initialfile="barcode_results.csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not output_path:
+            return
+        
+        # Decoding runs in a worker thread; Tk widgets are only touched from
+        # the main loop by polling this queue
+        self.decode_queue = queue.Queue()
+        
+        def worker():
+            from utils.barcode_scanner import decode_directory_to_csv
+            try:
+                stats = decode_directory_to_csv(
+                    directory, output_path, db=self.db,
+                    progress=lambda count: self.decode_queue.put(('progress', count))
+                )
+                self.decode_queue.put(('done', stats))
+            except Exception as e:
+                self.decode_queue.put(('error', str(e)))
+        
+        self.status_label.config(text="Decoding barcode images...", fg='#007bff')
+        threading.Thread(target=worker, daemon=True).start()
+        self.window.after(100, self.poll_decode_queue, output_path)
+    
+    def poll_decode_queue(self, output_path):
+        """Update status from the barcode decoding worker"""
+        try:
+            while True:
+                kind, payload = self.decode_queue.get_nowait()
+                if kind == 'progress':
+                    self.status_label.config(text=f"Decoded {payload} images...", fg='#007bff')
+                elif kind == 'done':
+                    self.status_label.config(
+                        text=f"Decoded {payload['images']} images: {payload['matched']} of "
+                             f"{payload['codes']} barcodes matched",
+                        fg='#28a745'
+                    )
+                    messagebox.showinfo(
+                        "Decode Complete",
+                        f"Images: {payload['images']}\n"
+                        f"Barcodes: {payload['codes']}\n"
+                        f"Matched items: {payload['matched']}\n"
+                        f"Errors: {payload['errors']}\n\n"
+                        f"Results saved to:\n{output_path}"
+                    )
+                    return
+                else:
+                    self.status_label.config(text="Barcode decoding failed", fg='#dc3545')
+                    messagebox.showerror("Error", f"Error decoding images: {payload}")
+                    return
+        except queue.Empty:
+            pass
+        
+        self.window.after(100, self.poll_decode_queue, output_path)
+
 # Main function to test
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,156 @@
+import tkinter as tk
+
+from utils.helpers import format_cents
+
+class ItemSearchDropdown:
+    """Debounced typeahead dropdown of catalog items under an Entry
+
+    Searches run DEBOUNCE_MS after the last keystroke, so a barcode scanner
+    typing a full code and pressing Return never triggers one. Call cancel()
+    from the entry's Return handler to drop any pending search.
+    """
+    DEBOUNCE_MS = 150
+    MIN_CHARS = 3
+    IGNORED_KEYS = ('Return', 'KP_Enter', 'Escape', 'Up', 'Down', 'Tab',
+                    'Shift_L', 'Shift_R', 'Control_L', 'Control_R')
+
+    def __init__(self, entry, db, on_select, limit=20):
+        self.entry = entry
+        self.db = db
+        self.on_select = on_select
+        self.limit = limit
+        self.results = []
+        self.pending_search = None
+        self.popup = None
+        self.listbox = None
+
+        self.entry.bind('<KeyRelease>', self.schedule_search, add='+')
+        self.entry.bind('<Down>', self.focus_results, add='+')
+        self.entry.bind('<Escape>', lambda e: self.cancel(), add='+')
+        self.entry.bind('<Destroy>', lambda e: self.cancel(), add='+')
+
+    def schedule_search(self, event=None):
+        """Restart the debounce timer on each keystroke"""
+        if event is not None and event.keysym in self.IGNORED_KEYS:
+            return
+
+        if self.pending_search:
+            self.entry.after_cancel(self.pending_search)
+        self.pending_search = self.entry.after(self.DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        """Search the catalog for the entry text and show the results"""
+        self.pending_search = None
+        query = self.entry.get().strip()
+        if len(query) < self.MIN_CHARS:
+            self.hide()
+            return
+
+        self.show_results(self.db.search_items(query, self.limit))
+
+    def search_now(self):
+        """Search immediately; returns True if any results are shown"""
+        if self.pending_search:
+            self.entry.after_cancel(self.pending_search)
+            self.pending_search = None
+
+        query = self.entry.get().strip()
+        results = self.db.search_items(query, self.limit) if len(query) >= self.MIN_CHARS else []
+        self.show_results(results)
+        if results:
+            self.focus_results()
+        return bool(results)
+
+    def show_results(self, results):
+        """Show search results in a borderless popup below the entry"""
+        self.results = results
+        if not results:
+            self.hide()
+            return
+
+        if not self.popup:
+            self.popup = tk.Toplevel(self.entry)
+            self.popup.overrideredirect(True)
+            self.popup.configure(bg='white')
+
+            self.listbox = tk.Listbox(
+                self.popup,
+                font=("Courier New", 10),
+                bg='white',
+                fg='black',
+                selectbackground='#0078d7',
+                selectforeground='white',
+                activestyle='none',
+                relief=tk.SOLID,
+                borderwidth=1
+            )
+            self.listbox.pack(fill='both', expand=True)
+            self.listbox.bind('<Return>', self.select_current)
+            self.listbox.bind('<Double-1>', self.select_current)
+            self.listbox.bind('<Escape>', lambda e: self.close_results())
+            self.listbox.bind('<Up>', self.on_listbox_up)
+
+        self.listbox.delete(0, tk.END)
+        for item in results:
+            brand = f"{item['brand']} " if item['brand'] else ''
+            self.listbox.insert(
+                tk.END,
+                f"{item['upc_code']:<14} {brand}{item['product']} - "
+                f"{(item['description'] or '')[:30]}  ${format_cents(item['price'])}"
+            )
+        self.listbox.configure(height=min(len(results), 10), width=80)
+
+        # Position under the entry
+        self.entry.update_idletasks()
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def focus_results(self, event=None):
+        """Move keyboard focus into the results list"""
+        if self.popup and self.results:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+        return 'break'
+
+    def on_listbox_up(self, event=None):
+        """Go back to the entry from the top of the list"""
+        if self.listbox.curselection() == (0,):
+            self.close_results()
+            return 'break'
+
+    def select_current(self, event=None):
+        """Pass the highlighted item to the callback"""
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        item = self.results[selection[0]]
+        self.close_results()
+        self.on_select(item)
+
+    def close_results(self):
+        """Hide the results and return focus to the entry"""
+        self.hide()
+        self.entry.focus_set()
+
+    def hide(self):
+        """Hide the results popup"""
+        if self.popup:
+            self.popup.withdraw()
+
+    def cancel(self):
+        """Drop any pending search and hide the popup"""
+        if self.pending_search:
+            try:
+                self.entry.after_cancel(self.pending_search)
+            except tk.TclError:
+                pass
+            self.pending_search = None
+        try:
+            self.hide()
+        except tk.TclError:
+            pass
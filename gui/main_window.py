@@ -136,6 +136,14 @@ class MainWindow:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Exit", command=self.root.quit)
         
+        # Reports menu
+        reports_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Reports", menu=reports_menu)
+        reports_menu.add_command(label="A/R Aging", command=lambda: self.open_report_window('aging'))
+        reports_menu.add_command(label="Z-Report", command=lambda: self.open_report_window('z_report'))
+        reports_menu.add_command(label="Product Velocity", command=lambda: self.open_report_window('velocity'))
+        reports_menu.add_command(label="Margins & Discounts", command=lambda: self.open_report_window('margins'))
+        
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -198,6 +206,17 @@ class MainWindow:
         except Exception as e:
             from tkinter import messagebox
             messagebox.showerror("Error", f"Error opening customer window: {str(e)}")
+    
+    def open_report_window(self, tab='aging'):
+        """Open the report window on one report"""
+        self.update_status("Opening Reports window...")
+        try:
+            from gui.report_window import ReportWindow
+            report_window = ReportWindow(self.root, tab)
+            self.update_status("Reports window opened")
+        except Exception as e:
+            from tkinter import messagebox
+            messagebox.showerror("Error", f"Error opening report window: {str(e)}")
                 
     def run(self):
         """Start the application"""
@@ -0,0 +1,204 @@
+import tkinter as tk
+
+class PagedTreeview:
+    """Virtual list on top of a ttk.Treeview using keyset pagination
+
+    Only a sliding window of at most ``max_rows`` rows lives in the tree.
+    Scrolling near either end fetches the next or previous page and trims
+    the far end, so opening and scrolling cost the same for 1k or 1M rows.
+
+    ``fetch(after=None, before=None, limit=...)`` returns rows (dicts with an
+    'id' and a 'sort_key') in display order: the rows following the
+    ``after`` key, the rows preceding the ``before`` key, or the first page
+    when both are None. ``format_row(row)`` returns ``(values, tags)``. The
+    row id is used as the Treeview iid.
+    """
+    PAGE_SIZE = 100
+    MAX_ROWS = 300
+    # Fetch more when the view is this close to either end of the window
+    EDGE = 0.2
+
+    def __init__(self, tree, scrollbar, fetch, format_row, page_size=None, max_rows=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch = fetch
+        self.format_row = format_row
+        self.page_size = page_size or self.PAGE_SIZE
+        self.max_rows = max_rows or self.MAX_ROWS
+        self.rows = {}
+        self.keys = []
+        self.more_before = False
+        self.more_after = False
+        self.pending_check = None
+
+        self.tree.configure(yscrollcommand=self.on_scroll)
+
+    def load(self, fetch=None):
+        """Clear the list and show the first page, optionally with a new fetch function"""
+        if fetch is not None:
+            self.fetch = fetch
+
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
+        self.keys = []
+
+        rows = self.fetch(after=None, before=None, limit=self.page_size)
+        self.insert_rows(rows, 'end')
+        self.more_before = False
+        self.more_after = len(rows) >= self.page_size
+        self.tree.yview_moveto(0)
+
+    def insert_rows(self, rows, position):
+        """Insert rows at the top (position 0) or bottom ('end') of the window"""
+        if position == 0:
+            rows = list(reversed(rows))
+        for row in rows:
+            iid = str(row['id'])
+            if iid in self.rows:
+                continue
+            values, tags = self.format_row(row)
+            self.tree.insert('', position, iid=iid, values=values, tags=tags)
+            self.rows[iid] = row
+            if position == 0:
+                self.keys.insert(0, row.get('sort_key'))
+            else:
+                self.keys.append(row.get('sort_key'))
+
+    def on_scroll(self, first, last):
+        """Update the scrollbar and fetch a page when nearing either end"""
+        self.scrollbar.set(first, last)
+
+        first, last = float(first), float(last)
+        near_end = self.more_after and last >= 1 - self.EDGE
+        near_start = self.more_before and first <= self.EDGE
+        if (near_end or near_start) and not self.pending_check:
+            # Fetch outside the scroll callback so the tree is not modified mid-redraw
+            self.pending_check = self.tree.after_idle(self.fetch_more)
+
+    def fetch_more(self):
+        """Extend the window in the direction the view is heading"""
+        self.pending_check = None
+        if not self.keys:
+            return
+
+        first, last = self.tree.yview()
+        count = len(self.keys)
+        top = round(first * count)
+
+        if self.more_after and last >= 1 - self.EDGE:
+            rows = self.fetch(after=self.keys[-1], before=None, limit=self.page_size)
+            self.more_after = len(rows) >= self.page_size
+            self.insert_rows(rows, 'end')
+
+            trimmed = self.trim(from_top=True)
+            if trimmed:
+                self.more_before = True
+                self.tree.yview_moveto((top - trimmed) / len(self.keys))
+        elif self.more_before and first <= self.EDGE:
+            rows = self.fetch(after=None, before=self.keys[0], limit=self.page_size)
+            self.more_before = len(rows) >= self.page_size
+            self.insert_rows(rows, 0)
+
+            if self.trim(from_top=False):
+                self.more_after = True
+            self.tree.yview_moveto((top + len(rows)) / len(self.keys))
+
+    def trim(self, from_top):
+        """Drop rows beyond max_rows from one end of the window, returns the count"""
+        excess = len(self.keys) - self.max_rows
+        if excess <= 0:
+            return 0
+
+        children = self.tree.get_children()
+        doomed = children[:excess] if from_top else children[-excess:]
+        self.tree.delete(*doomed)
+        for iid in doomed:
+            del self.rows[iid]
+        if from_top:
+            del self.keys[:excess]
+        else:
+            del self.keys[-excess:]
+        return excess
+
+    def get_row(self, iid):
+        """Get the row dict behind a tree item"""
+        return self.rows.get(iid)
+
+    def selected_row(self):
+        """Get the row dict of the first selected item, or None"""
+        selection = self.tree.selection()
+        return self.rows.get(selection[0]) if selection else None
+
+    def update_row(self, row):
+        """Redraw a row in place if it is in the window"""
+        iid = str(row['id'])
+        if iid not in self.rows:
+            return False
+        self.rows[iid] = row
+        values, tags = self.format_row(row)
+        self.tree.item(iid, values=values, tags=tags)
+        return True
+
+    def reload(self):
+        """Fetch the current window again in place, picking up added rows
+
+        The window is refetched from just after the row preceding it, so
+        the view stays where it was instead of jumping back to the top.
+        """
+        if not self.keys:
+            self.load()
+            return
+
+        after = None
+        if self.more_before:
+            previous = self.fetch(after=None, before=self.keys[0], limit=1)
+            after = previous[0]['sort_key'] if previous else None
+            self.more_before = bool(previous)
+        limit = len(self.keys) + 1
+        rows = self.fetch(after=after, before=None, limit=limit)
+
+        first, _ = self.tree.yview()
+        selection = list(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        self.rows = {}
+        self.keys = []
+        self.insert_rows(rows, 'end')
+        self.more_after = len(rows) >= limit
+        if self.trim(from_top=False):
+            self.more_after = True
+
+        selection = [iid for iid in selection if iid in self.rows]
+        if selection:
+            self.tree.selection_set(selection)
+        self.tree.yview_moveto(first)
+
+    def cancel(self):
+        """Drop any pending page fetch"""
+        if self.pending_check:
+            try:
+                self.tree.after_cancel(self.pending_check)
+            except tk.TclError:
+                pass
+            self.pending_check = None
+
+
+def list_fetch(rows):
+    """fetch function over rows already in memory, keyed by list position
+
+    For reports computed in one query: the whole result is held as a list
+    and the tree still only ever holds a window of it.
+    """
+    def fetch(after=None, before=None, limit=PagedTreeview.PAGE_SIZE):
+        if after is not None:
+            start = after + 1
+        elif before is not None:
+            start = max(before - limit, 0)
+        else:
+            start = 0
+        end = before if before is not None else start + limit
+
+        page = rows[start:end]
+        for position, row in enumerate(page, start):
+            row['sort_key'] = position
+        return page
+    return fetch
@@ -0,0 +1,689 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime, timedelta
+import csv
+import sys
+import os
+import platform
+import queue
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import DatabaseManager
+from gui.paged_treeview import PagedTreeview, list_fetch
+from utils.helpers import format_cents
+from utils.print_queue import get_print_queue
+from utils.receipt_generator import format_z_report, receipt_to_escpos
+
+class ReportWindow:
+    """Reports, one notebook tab each
+    
+    Each report is computed in a single query and held in memory; the grid
+    is a PagedTreeview over that list, so only the visible rows are drawn.
+    """
+    
+    # Product velocity grid columns per view: (id, heading, width, anchor)
+    VELOCITY_VIEWS = {
+        'upc': [('rank', '#', 45, 'e'), ('upc_code', 'UPC', 120, 'w'), ('name', 'Product', 220, 'w'),
+                ('brand', 'Brand', 140, 'w'), ('units', 'Units', 80, 'e'),
+                ('units_per_day', 'Units/Day', 80, 'e'), ('revenue', 'Revenue', 110, 'e'),
+                ('margin', 'Margin', 110, 'e'), ('margin_pct', 'Margin %', 75, 'e')],
+        'brand': [('rank', '#', 45, 'e'), ('brand', 'Brand', 220, 'w'), ('products', 'UPCs', 70, 'e'),
+                  ('units', 'Units', 80, 'e'), ('units_per_day', 'Units/Day', 80, 'e'),
+                  ('revenue', 'Revenue', 110, 'e'), ('margin', 'Margin', 110, 'e'),
+                  ('margin_pct', 'Margin %', 75, 'e')],
+        'slow': [('rank', '#', 45, 'e'), ('upc_code', 'UPC', 120, 'w'), ('name', 'Product', 260, 'w'),
+                 ('brand', 'Brand', 140, 'w'), ('units', 'Units', 80, 'e'),
+                 ('revenue', 'Revenue', 110, 'e'), ('last_sold', 'Last Sold', 100, 'w')],
+    }
+    # Columns in cents, shown and exported as dollars
+    MONEY_COLUMNS = ('revenue', 'margin', 'list_revenue', 'discount', 'below_cost_loss',
+                     'unit_price', 'discounted_price', 'cost', 'loss')
+    
+    # Margin analysis grid columns: the grouping column, then the measures
+    MARGIN_MEASURE_COLUMNS = [
+        ('lines', 'Lines', 70, 'e'), ('units', 'Units', 70, 'e'),
+        ('list_revenue', 'List Price', 105, 'e'), ('revenue', 'Sold For', 105, 'e'),
+        ('discount', 'Discount', 95, 'e'), ('discount_pct', 'Disc %', 60, 'e'),
+        ('margin', 'Margin', 105, 'e'), ('margin_pct', 'Margin %', 70, 'e'),
+        ('below_cost_lines', 'Below Cost', 75, 'e'), ('below_cost_loss', 'Under Cost', 90, 'e'),
+    ]
+    MARGIN_VIEWS = {
+        'day': [('day', 'Day', 100, 'w')] + MARGIN_MEASURE_COLUMNS,
+        'terminal': [('terminal', 'Terminal', 100, 'w')] + MARGIN_MEASURE_COLUMNS,
+        'brand': [('brand', 'Brand', 160, 'w')] + MARGIN_MEASURE_COLUMNS,
+        'below_cost': [('sale_date', 'Date', 140, 'w'), ('sale_id', 'Sale #', 70, 'e'),
+                       ('terminal', 'Terminal', 70, 'w'), ('upc_code', 'UPC', 120, 'w'),
+                       ('name', 'Product', 220, 'w'), ('quantity', 'Qty', 50, 'e'),
+                       ('unit_price', 'List', 80, 'e'), ('discounted_price', 'Sold At', 80, 'e'),
+                       ('cost', 'Cost', 80, 'e'), ('loss', 'Loss', 80, 'e')],
+    }
+    
+    def __init__(self, parent=None, tab='aging'):
+        self.parent = parent
+        self.db = DatabaseManager()
+        self.aging_report = None
+        self.aging_rows = []
+        self.aging_sort = ('total', True)
+        self.z_report_text = None
+        self.velocity_rows = []
+        self.velocity_view = None
+        self.margin_report = None
+        self.margin_rows = []
+        self.margin_view = None
+        self.margin_worker = None
+        
+        # Detect platform
+        self.is_mac = platform.system() == 'Darwin'
+        
+        # Create window
+        self.window = tk.Toplevel(parent) if parent else tk.Tk()
+        self.window.title("Reports - POS System")
+        self.window.geometry("1100x700")
+        self.window.configure(bg="#ffffff")
+        
+        self.setup_styles()
+        self.create_widgets()
+        self.show_tab(tab)
+        self.run_aging_report()
+        self.run_z_report()
+        self.run_velocity_report()
+    
+    def setup_styles(self):
+        """Setup ttk styles for cross-platform consistency"""
+        style = ttk.Style()
+        style.configure("Treeview",
+                       background="white",
+                       foreground="black",
+                       fieldbackground="white",
+                       borderwidth=1)
+        style.map('Treeview',
+                 background=[('selected', '#0078d7')],
+                 foreground=[('selected', 'white')])
+        style.configure("Treeview.Heading",
+                       background="#f0f0f0",
+                       foreground="black",
+                       borderwidth=1)
+    
+    def create_button(self, parent, text, command, bg_color="#007bff", fg_color="white", **kwargs):
+        """Create cross-platform button"""
+        if self.is_mac:
+            btn_frame = tk.Frame(parent, bg=bg_color, highlightbackground=bg_color, highlightthickness=1)
+            btn = tk.Label(btn_frame, text=text, bg=bg_color, fg=fg_color,
+                          cursor="hand2", padx=10, pady=5, **kwargs)
+            btn.pack()
+            btn.bind("<Button-1>", lambda e: command())
+            btn_frame.bind("<Button-1>", lambda e: command())
+            return btn_frame
+        else:
+            return tk.Button(parent, text=text, command=command,
+                           bg=bg_color, fg=fg_color, **kwargs)
+    
+    def create_widgets(self):
+        """Create the title bar and the report notebook"""
+        title_frame = tk.Frame(self.window, bg='white', relief=tk.RAISED, borderwidth=1)
+        title_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(
+            title_frame,
+            text="REPORTS",
+            font=("Arial", 18, "bold"),
+            bg='white',
+            fg="#333333"
+        ).pack(side='left', padx=10, pady=5)
+        
+        close_btn = self.create_button(
+            title_frame,
+            text="✕ Close",
+            command=self.close_window,
+            bg_color="#dc3545",
+            font=("Arial", 10, "bold")
+        )
+        close_btn.pack(side='right', padx=10, pady=5)
+        
+        self.notebook = ttk.Notebook(self.window)
+        self.notebook.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        # Report tabs by name
+        self.tabs = {}
+        self.create_aging_tab()
+        self.create_z_report_tab()
+        self.create_velocity_tab()
+        self.create_margin_tab()
+    
+    def show_tab(self, name):
+        """Bring a report tab to the front"""
+        if name in self.tabs:
+            self.notebook.select(self.tabs[name])
+    
+    def create_grid(self, parent, columns, fetch, format_row):
+        """Treeview with scrollbars and a PagedTreeview; columns are (id, heading, width, anchor)"""
+        grid_frame = tk.Frame(parent, bg='white', relief=tk.GROOVE, borderwidth=1)
+        grid_frame.pack(fill='both', expand=True, padx=5, pady=5)
+        
+        tree = ttk.Treeview(grid_frame, columns=[column[0] for column in columns],
+                            show='headings', style="Treeview")
+        for column_id, heading, width, anchor in columns:
+            tree.heading(column_id, text=heading)
+            tree.column(column_id, width=width, anchor=anchor)
+        
+        v_scrollbar = ttk.Scrollbar(grid_frame, orient='vertical', command=tree.yview)
+        h_scrollbar = ttk.Scrollbar(grid_frame, orient='horizontal', command=tree.xview)
+        tree.configure(xscrollcommand=h_scrollbar.set)
+        
+        tree.grid(row=0, column=0, sticky='nsew')
+        v_scrollbar.grid(row=0, column=1, sticky='ns')
+        h_scrollbar.grid(row=1, column=0, sticky='ew')
+        grid_frame.grid_rowconfigure(0, weight=1)
+        grid_frame.grid_columnconfigure(0, weight=1)
+        
+        return tree, PagedTreeview(tree, v_scrollbar, fetch, format_row)
+    
+    def export_value(self, column_id, value):
+        """A grid value as written to CSV: money in dollars, the rest as is"""
+        return format_cents(value) if column_id in self.MONEY_COLUMNS and value is not None else value
+    
+    def export_csv(self, default_name, headings, rows):
+        """Ask for a file name and write headings and rows to it"""
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".csv",
+            initialfile=default_name,
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not path:
+            return
+        
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(headings)
+                writer.writerows(rows)
+            messagebox.showinfo("Export", f"Saved {os.path.basename(path)}", parent=self.window)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save CSV: {e}", parent=self.window)
+    
+    # A/R aging
+    def create_aging_tab(self):
+        """Accounts receivable aging: one row per customer who owes money"""
+        tab = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(tab, text="A/R Aging")
+        self.tabs['aging'] = tab
+        
+        controls = tk.Frame(tab, bg='white')
+        controls.pack(fill='x', padx=5, pady=5)
+        
+        tk.Label(controls, text="As of:", font=("Arial", 10), bg='white').pack(side='left')
+        self.aging_date_entry = tk.Entry(controls, font=("Arial", 11), width=12)
+        self.aging_date_entry.insert(0, datetime.now().strftime('%Y-%m-%d'))
+        self.aging_date_entry.pack(side='left', padx=5)
+        self.aging_date_entry.bind('<Return>', lambda e: self.run_aging_report())
+        
+        self.create_button(controls, text="Run", command=self.run_aging_report,
+                           font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        self.create_button(controls, text="Export CSV", command=self.export_aging_csv,
+                           bg_color="#28a745", font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        
+        self.aging_status_label = tk.Label(controls, text="", font=("Arial", 9),
+                                           bg='white', fg='#666666')
+        self.aging_status_label.pack(side='right', padx=5)
+        
+        self.aging_totals_label = tk.Label(tab, text="", font=("Arial", 10, "bold"),
+                                           bg='white', fg='#333333', anchor='w')
+        self.aging_totals_label.pack(fill='x', padx=10)
+        
+        columns = [('name', 'Customer', 180, 'w'), ('phone', 'Phone', 110, 'w'),
+                   ('open_sales', 'Open', 50, 'e')]
+        columns += [(key, label, 85, 'e') for key, label, _ in self.db.AGING_BUCKETS]
+        columns += [('total', 'Total Due', 95, 'e'), ('oldest_days', 'Oldest (days)', 90, 'e')]
+        self.aging_columns = columns
+        
+        self.aging_tree, self.aging_list = self.create_grid(
+            tab, columns, list_fetch(self.aging_rows), self.format_aging_row)
+        for column_id, _, _, _ in columns:
+            self.aging_tree.heading(column_id, command=lambda c=column_id: self.sort_aging(c))
+        self.aging_tree.tag_configure('over_90', background="#f5c6cb")
+    
+    def run_aging_report(self):
+        """Compute the aging report and show it"""
+        as_of = self.aging_date_entry.get().strip()
+        try:
+            datetime.strptime(as_of, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Error", "Enter the date as YYYY-MM-DD", parent=self.window)
+            return
+        
+        start_time = time.perf_counter()
+        self.aging_report = self.db.get_aging_report(as_of)
+        elapsed = time.perf_counter() - start_time
+        
+        totals = self.aging_report['totals']
+        self.aging_totals_label.config(text="   ".join(
+            [f"{label}: ${format_cents(totals[key], True)}" for key, label in self.aging_report['buckets']]
+            + [f"Total: ${format_cents(totals['total'], True)}"]
+        ))
+        self.aging_status_label.config(
+            text=f"{totals['customers']:,} customers, {totals['open_sales']:,} open sales "
+                 f"({elapsed:.2f} s)"
+        )
+        self.show_aging_rows()
+    
+    def show_aging_rows(self):
+        """Sort the report rows and reload the grid from the top"""
+        column, descending = self.aging_sort
+        rows = self.aging_report['rows'] if self.aging_report else []
+        if column in ('name', 'phone'):
+            rows.sort(key=lambda row: (row[column] or '').lower(), reverse=descending)
+        else:
+            rows.sort(key=lambda row: row[column], reverse=descending)
+        
+        self.aging_rows[:] = rows
+        self.aging_list.load()
+    
+    def sort_aging(self, column):
+        """Sort by a column; clicking the same column again reverses the order"""
+        current, descending = self.aging_sort
+        if column == current:
+            self.aging_sort = (column, not descending)
+        else:
+            self.aging_sort = (column, column not in ('name', 'phone'))
+        self.show_aging_rows()
+    
+    def format_aging_row(self, row):
+        """Format a customer's aging as tree values and tags"""
+        keys = [key for key, _, _ in self.db.AGING_BUCKETS]
+        values = [row['name'], row['phone'], row['open_sales']]
+        values += [f"${format_cents(row[key], True)}" if row[key] else '' for key in keys]
+        values += [f"${format_cents(row['total'], True)}", row['oldest_days']]
+        tags = ['over_90'] if row['oldest_days'] > 90 else []
+        return values, tags
+    
+    def export_aging_csv(self):
+        """Save the aging report, with a total row, as CSV"""
+        if not self.aging_report:
+            messagebox.showwarning("Warning", "Run the report first", parent=self.window)
+            return
+        
+        keys = [column[0] for column in self.aging_columns]
+        money = {key for key, _ in self.aging_report['buckets']} | {'total'}
+        rows = [[row['id']] + [format_cents(row[key]) if key in money else row[key] for key in keys]
+                for row in self.aging_rows]
+        totals = self.aging_report['totals']
+        rows.append(['', 'TOTAL', '', totals['open_sales']]
+                    + [format_cents(totals[key]) for key, _ in self.aging_report['buckets']]
+                    + [format_cents(totals['total']), ''])
+        
+        self.export_csv(f"aging_{self.aging_report['as_of']}.csv",
+                        ['Customer ID'] + [column[1] for column in self.aging_columns], rows)
+    
+    # End-of-day Z-report
+    def create_z_report_tab(self):
+        """Z-report: the day's sales totals and sales by hour, from the rollups"""
+        tab = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(tab, text="Z-Report")
+        self.tabs['z_report'] = tab
+        
+        controls = tk.Frame(tab, bg='white')
+        controls.pack(fill='x', padx=5, pady=5)
+        
+        tk.Label(controls, text="Day:", font=("Arial", 10), bg='white').pack(side='left')
+        self.z_date_entry = tk.Entry(controls, font=("Arial", 11), width=12)
+        self.z_date_entry.insert(0, datetime.now().strftime('%Y-%m-%d'))
+        self.z_date_entry.pack(side='left', padx=5)
+        self.z_date_entry.bind('<Return>', lambda e: self.run_z_report())
+        
+        self.create_button(controls, text="Run", command=self.run_z_report,
+                           font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        self.create_button(controls, text="🖨️ Print", command=self.print_z_report,
+                           bg_color="#28a745", font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        
+        self.z_status_label = tk.Label(controls, text="", font=("Arial", 9),
+                                       bg='white', fg='#666666')
+        self.z_status_label.pack(side='right', padx=5)
+        
+        self.z_text = tk.Text(tab, font=("Courier New", 10), bg='white', fg='black',
+                              relief='flat', wrap='none', width=50)
+        self.z_text.pack(fill='y', expand=True, padx=10, pady=5, anchor='w')
+        self.z_text.config(state='disabled')
+    
+    def run_z_report(self):
+        """Build the Z-report for the chosen day and show it"""
+        day = self.z_date_entry.get().strip()
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Error", "Enter the date as YYYY-MM-DD", parent=self.window)
+            return
+        
+        start_time = time.perf_counter()
+        self.z_report_text = format_z_report(self.db.get_z_report(day))
+        elapsed = time.perf_counter() - start_time
+        
+        self.z_text.config(state='normal')
+        self.z_text.delete('1.0', tk.END)
+        self.z_text.insert('1.0', self.z_report_text)
+        self.z_text.config(state='disabled')
+        self.z_status_label.config(text=f"({elapsed * 1000:.0f} ms)")
+    
+    def print_z_report(self):
+        """Queue the Z-report for the receipt printer"""
+        if not self.z_report_text:
+            messagebox.showwarning("Warning", "Run the report first", parent=self.window)
+            return
+        get_print_queue().submit(self.z_report_text, receipt_to_escpos(self.z_report_text))
+        self.z_status_label.config(text="Z-report queued for printing")
+    
+    # Product velocity
+    def create_velocity_tab(self):
+        """Product velocity: top sellers by UPC or brand, and slow movers"""
+        tab = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(tab, text="Velocity")
+        self.tabs['velocity'] = tab
+        
+        controls = tk.Frame(tab, bg='white')
+        controls.pack(fill='x', padx=5, pady=5)
+        
+        today = datetime.now()
+        tk.Label(controls, text="From:", font=("Arial", 10), bg='white').pack(side='left')
+        self.velocity_start_entry = tk.Entry(controls, font=("Arial", 11), width=12)
+        self.velocity_start_entry.insert(0, (today - timedelta(days=29)).strftime('%Y-%m-%d'))
+        self.velocity_start_entry.pack(side='left', padx=5)
+        
+        tk.Label(controls, text="To:", font=("Arial", 10), bg='white').pack(side='left')
+        self.velocity_end_entry = tk.Entry(controls, font=("Arial", 11), width=12)
+        self.velocity_end_entry.insert(0, today.strftime('%Y-%m-%d'))
+        self.velocity_end_entry.pack(side='left', padx=5)
+        
+        self.velocity_view_var = tk.StringVar(value='upc')
+        for value, text in (('upc', "Top by UPC"), ('brand', "Top by Brand"), ('slow', "Slow Movers")):
+            tk.Radiobutton(controls, text=text, variable=self.velocity_view_var, value=value,
+                           bg='white', command=self.run_velocity_report).pack(side='left', padx=3)
+        
+        tk.Label(controls, text="Show:", font=("Arial", 10), bg='white').pack(side='left', padx=(10, 0))
+        self.velocity_limit_entry = tk.Entry(controls, font=("Arial", 11), width=6)
+        self.velocity_limit_entry.insert(0, "100")
+        self.velocity_limit_entry.pack(side='left', padx=5)
+        
+        for entry in (self.velocity_start_entry, self.velocity_end_entry, self.velocity_limit_entry):
+            entry.bind('<Return>', lambda e: self.run_velocity_report())
+        
+        self.create_button(controls, text="Run", command=self.run_velocity_report,
+                           font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        self.create_button(controls, text="Export CSV", command=self.export_velocity_csv,
+                           bg_color="#28a745", font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        
+        self.velocity_status_label = tk.Label(controls, text="", font=("Arial", 9),
+                                              bg='white', fg='#666666')
+        self.velocity_status_label.pack(side='right', padx=5)
+        
+        # One grid per view, only the current one is packed
+        self.velocity_grids = {}
+        for view, columns in self.VELOCITY_VIEWS.items():
+            frame = tk.Frame(tab, bg='white')
+            _, paged = self.create_grid(frame, columns, list_fetch(self.velocity_rows),
+                                        lambda row, c=columns: self.format_velocity_row(row, c))
+            self.velocity_grids[view] = (frame, paged)
+    
+    def run_velocity_report(self):
+        """Run the chosen velocity view for the date range"""
+        start_date = self.velocity_start_entry.get().strip()
+        end_date = self.velocity_end_entry.get().strip()
+        try:
+            datetime.strptime(start_date, '%Y-%m-%d')
+            datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Error", "Enter the dates as YYYY-MM-DD", parent=self.window)
+            return
+        limit_text = self.velocity_limit_entry.get().strip()
+        if limit_text and not limit_text.isdigit():
+            messagebox.showerror("Error", "Show must be a number of rows, or blank for all",
+                                 parent=self.window)
+            return
+        limit = int(limit_text) if limit_text else None
+        
+        view = self.velocity_view_var.get()
+        start_time = time.perf_counter()
+        if view == 'slow':
+            rows = self.db.get_slow_movers(start_date, end_date, -1 if limit is None else limit)
+        else:
+            rows = self.db.get_product_velocity(start_date, end_date, view, limit)
+        elapsed = time.perf_counter() - start_time
+        for index, row in enumerate(rows):
+            row['id'] = index
+        
+        if self.velocity_view and self.velocity_view != view:
+            self.velocity_grids[self.velocity_view][0].pack_forget()
+        frame, paged = self.velocity_grids[view]
+        frame.pack(fill='both', expand=True)
+        self.velocity_view = view
+        self.velocity_range = (start_date, end_date)
+        
+        self.velocity_rows[:] = rows
+        paged.load()
+        self.velocity_status_label.config(text=f"{len(rows):,} rows ({elapsed:.2f} s)")
+    
+    def format_velocity_row(self, row, columns):
+        """Format a velocity row for the columns of its view"""
+        values = []
+        for column_id, _, _, _ in columns:
+            if column_id == 'rank':
+                values.append(row['sort_key'] + 1)
+            elif column_id in self.MONEY_COLUMNS:
+                values.append(f"${format_cents(row[column_id], True)}")
+            elif column_id == 'margin_pct':
+                values.append('' if row['margin_pct'] is None else f"{row['margin_pct']:.1f}%")
+            else:
+                values.append(row[column_id])
+        return values, []
+    
+    def export_velocity_csv(self):
+        """Save the current velocity view as CSV"""
+        if not self.velocity_view:
+            messagebox.showwarning("Warning", "Run the report first", parent=self.window)
+            return
+        
+        columns = self.VELOCITY_VIEWS[self.velocity_view]
+        rows = [[index + 1] + [self.export_value(column[0], row[column[0]]) for column in columns[1:]]
+                for index, row in enumerate(self.velocity_rows)]
+        start_date, end_date = self.velocity_range
+        self.export_csv(f"velocity_{self.velocity_view}_{start_date}_{end_date}.csv",
+                        [column[1] for column in columns], rows)
+    
+    # Discount and margin analysis
+    def create_margin_tab(self):
+        """Margins: discount depth and margin by day, terminal or brand, and below-cost lines"""
+        tab = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(tab, text="Margins")
+        self.tabs['margins'] = tab
+        
+        controls = tk.Frame(tab, bg='white')
+        controls.pack(fill='x', padx=5, pady=5)
+        
+        today = datetime.now()
+        tk.Label(controls, text="From:", font=("Arial", 10), bg='white').pack(side='left')
+        self.margin_start_entry = tk.Entry(controls, font=("Arial", 11), width=12)
+        self.margin_start_entry.insert(0, (today - timedelta(days=29)).strftime('%Y-%m-%d'))
+        self.margin_start_entry.pack(side='left', padx=5)
+        
+        tk.Label(controls, text="To:", font=("Arial", 10), bg='white').pack(side='left')
+        self.margin_end_entry = tk.Entry(controls, font=("Arial", 11), width=12)
+        self.margin_end_entry.insert(0, today.strftime('%Y-%m-%d'))
+        self.margin_end_entry.pack(side='left', padx=5)
+        
+        self.create_button(controls, text="Run", command=self.run_margin_report,
+                           font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        
+        # Switching views regroups the last run without reading lines again
+        self.margin_view_var = tk.StringVar(value='day')
+        for value, text in (('day', "By Day"), ('terminal', "By Terminal"), ('brand', "By Brand"),
+                            ('below_cost', "Below Cost")):
+            tk.Radiobutton(controls, text=text, variable=self.margin_view_var, value=value,
+                           bg='white', command=self.show_margin_view).pack(side='left', padx=3)
+        
+        self.create_button(controls, text="Export CSV", command=self.export_margin_csv,
+                           bg_color="#28a745", font=("Arial", 10, "bold")).pack(side='left', padx=5)
+        
+        self.margin_status_label = tk.Label(controls, text="Run to analyze sale lines",
+                                            font=("Arial", 9), bg='white', fg='#666666')
+        self.margin_status_label.pack(side='right', padx=5)
+        
+        self.margin_totals_label = tk.Label(tab, text="", font=("Arial", 10, "bold"),
+                                            bg='white', fg='#333333', anchor='w')
+        self.margin_totals_label.pack(fill='x', padx=10)
+        
+        self.margin_grids = {}
+        for view, columns in self.MARGIN_VIEWS.items():
+            frame = tk.Frame(tab, bg='white')
+            tree, paged = self.create_grid(frame, columns, list_fetch(self.margin_rows),
+                                           lambda row, c=columns: self.format_margin_row(row, c))
+            tree.tag_configure('below_cost', background="#f5c6cb")
+            self.margin_grids[view] = (frame, paged)
+    
+    def run_margin_report(self):
+        """Analyze the date range's sale lines in a worker thread"""
+        # One analysis at a time; clicks while it runs are ignored
+        if self.margin_worker and self.margin_worker.is_alive():
+            return
+        
+        start_date = self.margin_start_entry.get().strip()
+        end_date = self.margin_end_entry.get().strip()
+        try:
+            datetime.strptime(start_date, '%Y-%m-%d')
+            datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            messagebox.showerror("Error", "Enter the dates as YYYY-MM-DD", parent=self.window)
+            return
+        
+        # Tk widgets are only touched from the main loop, by polling this queue
+        self.margin_queue = queue.Queue()
+        
+        def worker():
+            from utils.margin_analysis import analyze_margins
+            try:
+                start_time = time.perf_counter()
+                report = analyze_margins(
+                    self.db, start_date, end_date,
+                    progress=lambda lines: self.margin_queue.put(('progress', lines))
+                )
+                report['elapsed'] = time.perf_counter() - start_time
+                report['range'] = (start_date, end_date)
+                self.margin_queue.put(('done', report))
+            except Exception as e:
+                self.margin_queue.put(('error', str(e)))
+        
+        self.margin_status_label.config(text="Analyzing sale lines...", fg='#007bff')
+        self.margin_worker = threading.Thread(target=worker, daemon=True)
+        self.margin_worker.start()
+        self.window.after(100, self.poll_margin_queue)
+    
+    def poll_margin_queue(self):
+        """Update status from the margin analysis worker"""
+        try:
+            while True:
+                kind, payload = self.margin_queue.get_nowait()
+                if kind == 'progress':
+                    self.margin_status_label.config(text=f"Caching {payload:,} new sales...", fg='#007bff')
+                elif kind == 'done':
+                    self.show_margin_report(payload)
+                    return
+                else:
+                    self.margin_status_label.config(text="Margin analysis failed", fg='#dc3545')
+                    messagebox.showerror("Error", f"Error analyzing margins: {payload}",
+                                         parent=self.window)
+                    return
+        except queue.Empty:
+            pass
+        except tk.TclError:
+            return  # Window closed
+        
+        self.window.after(100, self.poll_margin_queue)
+    
+    def show_margin_report(self, report):
+        """Show the totals of a finished analysis and the current view"""
+        from utils.margin_analysis import summarize
+        
+        self.margin_report = report
+        self.margin_summaries = {}
+        total = summarize(report['groups'], ())[0] if report['groups'] else None
+        if total:
+            self.margin_totals_label.config(
+                text=f"Sold for ${format_cents(total['revenue'], True)}   "
+                     f"Discounts ${format_cents(total['discount'], True)} "
+                     f"({total['discount_pct'] or 0:.1f}%)   "
+                     f"Margin ${format_cents(total['margin'], True)} ({total['margin_pct'] or 0:.1f}%)   "
+                     f"Below cost: {total['below_cost_lines']:,} lines, "
+                     f"${format_cents(total['below_cost_loss'], True)}"
+            )
+        else:
+            self.margin_totals_label.config(text="No sales in this range")
+        self.margin_status_label.config(
+            text=f"{report['lines']:,} lines ({report['elapsed']:.1f} s)", fg='#666666'
+        )
+        self.show_margin_view()
+    
+    def show_margin_view(self):
+        """Show the chosen grouping of the last analysis"""
+        if not self.margin_report:
+            return
+        from utils.margin_analysis import summarize
+        
+        view = self.margin_view_var.get()
+        if view == 'below_cost':
+            rows = self.margin_report['below_cost']
+        else:
+            if view not in self.margin_summaries:
+                self.margin_summaries[view] = summarize(self.margin_report['groups'], (view,))
+            rows = self.margin_summaries[view]
+        for index, row in enumerate(rows):
+            row['id'] = index
+        
+        if self.margin_view and self.margin_view != view:
+            self.margin_grids[self.margin_view][0].pack_forget()
+        frame, paged = self.margin_grids[view]
+        frame.pack(fill='both', expand=True)
+        self.margin_view = view
+        
+        self.margin_rows[:] = rows
+        paged.load()
+    
+    def format_margin_row(self, row, columns):
+        """Format a margin summary or below-cost line for the columns of its view"""
+        values = []
+        for column_id, _, _, _ in columns:
+            value = row[column_id]
+            if column_id in self.MONEY_COLUMNS:
+                values.append(f"${format_cents(value, True)}")
+            elif column_id in ('discount_pct', 'margin_pct'):
+                values.append('' if value is None else f"{value:.1f}%")
+            else:
+                values.append(value)
+        tags = ['below_cost'] if row.get('below_cost_lines') or 'loss' in row else []
+        return values, tags
+    
+    def export_margin_csv(self):
+        """Save the current margin view as CSV"""
+        if not self.margin_view:
+            messagebox.showwarning("Warning", "Run the report first", parent=self.window)
+            return
+        
+        columns = self.MARGIN_VIEWS[self.margin_view]
+        rows = [[self.export_value(column[0], row[column[0]]) for column in columns]
+                for row in self.margin_rows]
+        start_date, end_date = self.margin_report['range']
+        self.export_csv(f"margins_{self.margin_view}_{start_date}_{end_date}.csv",
+                        [column[1] for column in columns], rows)
+    
+    def close_window(self):
+        """Close the report window"""
+        self.aging_list.cancel()
+        for _, paged in list(self.velocity_grids.values()) + list(self.margin_grids.values()):
+            paged.cancel()
+        self.window.destroy()
+
+# Main function to test the report window
+if __name__ == "__main__":
+    app = ReportWindow()
+    app.window.mainloop()
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from datetime import datetime
 import sys
 import os
@@ -8,7 +8,14 @@ import platform
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config import TERMINAL_ID
 from database.models import DatabaseManager
+from utils.barcode_scanner import clean_scanned_code
+from utils.helpers import to_cents, format_cents
+from gui.item_search import ItemSearchDropdown
+from utils import events
+from utils.receipt_store import render_receipt, load_receipt, queue_receipt
+from utils.print_queue import get_print_queue
 
 class SaleWindow:
     def __init__(self, parent=None):
@@ -22,7 +29,7 @@ class SaleWindow:
         # Current sale data
         self.current_customer = None
         self.sale_items = []  # List of sale items
-        self.total_amount = 0.0
+        self.total_amount = 0  # Cents, like every amount in the cart
         
         # Create window
         self.window = tk.Toplevel(parent) if parent else tk.Tk()
@@ -39,6 +46,10 @@ class SaleWindow:
         # Center window
         self.center_window()
         
+        # Keep the customer's balance current when it changes elsewhere
+        events.subscribe(events.CUSTOMER_CHANGED, self.on_customer_changed)
+        self.window.bind('<Destroy>', self.on_destroy, add='+')
+        
         # Focus on phone entry
         self.phone_entry.focus()
     
@@ -166,6 +177,54 @@ class SaleWindow:
         
         # Total and payment section
         self.create_total_section()
+        
+        # Printer status line
+        self.create_print_status()
+    
+    def create_print_status(self):
+        """Create the printer status line, updated while receipts print in the background"""
+        status_frame = tk.Frame(self.window, bg='white')
+        status_frame.pack(fill='x', padx=10, pady=(0, 5))
+        
+        self.print_status_label = tk.Label(
+            status_frame,
+            text="",
+            font=("Arial", 9),
+            bg='white',
+            fg='#666666'
+        )
+        self.print_status_label.pack(side='left')
+        
+        self.retry_print_btn = self.create_button(
+            status_frame,
+            text="Retry Failed Prints",
+            command=self.retry_failed_prints,
+            bg_color='#ffc107',
+            fg_color='#333333',
+            font=("Arial", 9, "bold")
+        )
+        
+        self.print_status_job = None
+        self.update_print_status()
+    
+    def update_print_status(self):
+        """Show the print queue state, polled so the worker thread never touches Tk"""
+        status = get_print_queue().status()
+        
+        text = status['message'] if status['pending'] or status['failed'] else ""
+        if status['failed']:
+            text += f" | {status['failed']} failed receipt(s) saved"
+            if not self.retry_print_btn.winfo_ismapped():
+                self.retry_print_btn.pack(side='right')
+        elif self.retry_print_btn.winfo_ismapped():
+            self.retry_print_btn.pack_forget()
+        
+        self.print_status_label.config(text=text, fg='#dc3545' if status['failed'] else '#666666')
+        self.print_status_job = self.window.after(500, self.update_print_status)
+    
+    def retry_failed_prints(self):
+        """Send saved failed receipts to the printer again"""
+        get_print_queue().retry_failed()
     
     def create_customer_section(self):
         """Create customer lookup section"""
@@ -256,7 +315,7 @@ class SaleWindow:
         
         tk.Label(
             upc_frame,
-            text="UPC/Barcode:",
+            text="UPC / Search:",
             font=("Arial", 10),
             bg='white',
             fg='#333333'
@@ -273,6 +332,9 @@ class SaleWindow:
         self.upc_entry.pack(side='left', padx=(10, 5))
         self.upc_entry.bind('<Return>', self.add_item_by_upc)
         
+        # Typing a product, brand or description shows matching items
+        self.item_search = ItemSearchDropdown(self.upc_entry, self.db, self.add_catalog_item)
+        
         add_item_btn = self.create_button(
             upc_frame,
             text="Add Item",
@@ -408,6 +470,17 @@ class SaleWindow:
         )
         partial_btn.pack(side='left', padx=5)
         
+        # Reprint the last receipt from its stored copy
+        reprint_btn = self.create_button(
+            button_frame,
+            text="REPRINT LAST",
+            bg_color='#6c757d',
+            fg_color='white',
+            command=self.reprint_last_receipt,
+            **btn_style
+        )
+        reprint_btn.pack(side='left', padx=5)
+        
         # Clear sale button
         clear_btn = self.create_button(
             button_frame,
@@ -431,11 +504,7 @@ class SaleWindow:
         
         if customer:
             self.current_customer = customer
-            balance = self.db.get_customer_balance(customer['id'])
-            self.customer_info_label.config(
-                text=f"Customer: {customer['name']} | Balance: ${balance:.2f}",
-                fg='#28a745'
-            )
+            self.show_customer_balance()
             self.upc_entry.focus()  # Move focus to UPC entry
         else:
             # Ask to add new customer
@@ -462,10 +531,31 @@ class SaleWindow:
                     fg='#28a745'
                 )
                 self.upc_entry.focus()
+                events.publish(events.CUSTOMER_CHANGED, customer_id=customer_id)
                 messagebox.showinfo("Success", f"Customer {name} added successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Error adding customer: {str(e)}")
     
+    def show_customer_balance(self):
+        """Show the current customer's name and outstanding balance"""
+        balance = self.db.get_customer_balance(self.current_customer['id'])
+        self.customer_info_label.config(
+            text=f"Customer: {self.current_customer['name']} | Balance: ${format_cents(balance)}",
+            fg='#28a745'
+        )
+    
+    def on_customer_changed(self, customer_id):
+        """Refresh the balance if the current customer changed in another window"""
+        if self.current_customer and self.current_customer['id'] == customer_id:
+            self.show_customer_balance()
+    
+    def on_destroy(self, event):
+        """Stop listening for changes once the window is gone"""
+        if event.widget is self.window:
+            events.unsubscribe(events.CUSTOMER_CHANGED, self.on_customer_changed)
+            if self.print_status_job:
+                self.window.after_cancel(self.print_status_job)
+    
     def add_item_by_upc(self, event=None):
         """Add item to sale by UPC code"""
         if not self.current_customer:
@@ -473,7 +563,9 @@ class SaleWindow:
             self.phone_entry.focus()
             return
         
-        upc = self.upc_entry.get().strip()
+        self.item_search.cancel()
+        
+        upc = clean_scanned_code(self.upc_entry.get())
         if not upc:
             messagebox.showwarning("Warning", "Please enter a UPC code")
             return
@@ -481,16 +573,30 @@ class SaleWindow:
         # Look up item
         item = self.db.get_item_by_upc(upc)
         if item:
-            self.add_item_to_sale(
-                name=item['name'],
-                upc_code=item['upc_code'],
-                unit_price=item['price'],
-                is_xt_item=False
-            )
-            self.upc_entry.delete(0, tk.END)  # Clear UPC entry
-        else:
+            self.add_catalog_item(item)
+        elif not self.item_search.search_now():
+            # Not a known barcode and no search matches either
             messagebox.showerror("Error", f"Item with UPC {upc} not found")
     
+    def add_catalog_item(self, item):
+        """Add a catalog item found by barcode or search to the sale"""
+        if not self.current_customer:
+            messagebox.showwarning("Warning", "Please select a customer first")
+            self.phone_entry.focus()
+            return
+        
+        self.add_item_to_sale(
+            name=item['name'],
+            upc_code=item['upc_code'],
+            unit_price=item['price'],
+            is_xt_item=False,
+            brand=item['brand'],
+            description=item['description'],
+            cost=item['cost']
+        )
+        self.upc_entry.delete(0, tk.END)  # Clear UPC entry
+        self.upc_entry.focus()
+    
     def add_xt_item(self):
         """Add XT item (manual entry)"""
         if not self.current_customer:
@@ -511,8 +617,13 @@ class SaleWindow:
                 is_xt_item=True
             )
     
-    def add_item_to_sale(self, name, upc_code, unit_price, quantity=1, is_xt_item=False):
-        """Add item to current sale"""
+    def add_item_to_sale(self, name, upc_code, unit_price, quantity=1, is_xt_item=False,
+                         brand=None, description=None, cost=None):
+        """Add item to current sale
+        
+        Catalog items carry a snapshot of brand, description and cost from
+        when they were scanned; it is saved with the sale as-is.
+        """
         # Check if item already exists in sale (only for non-XT items with UPC)
         if not is_xt_item and upc_code:
             for existing_item in self.sale_items:
@@ -532,7 +643,10 @@ class SaleWindow:
             'unit_price': unit_price,
             'discounted_price': unit_price,  # Initially same as unit price
             'is_xt_item': is_xt_item,
-            'total': quantity * unit_price
+            'total': quantity * unit_price,
+            'brand': brand,
+            'description': description,
+            'cost': cost
         }
         
         self.sale_items.append(sale_item)
@@ -547,17 +661,12 @@ class SaleWindow:
         
         # Add sale items
         for item in self.sale_items:
-            # Get full item details if available
             if item['upc_code'] and not item['is_xt_item']:
-                full_item = self.db.get_item_by_upc(item['upc_code'])
-                if full_item:
-                    item_name = full_item.get('product', item['name'])
-                    description = full_item.get('description', '')[:30] + "..." if len(full_item.get('description', '')) > 30 else full_item.get('description', '')
-                    cost = full_item.get('cost', 0)
-                else:
-                    item_name = item['name']
-                    description = ''
-                    cost = 0
+                item_name = item['name']
+                description = item['description'] or ''
+                if len(description) > 30:
+                    description = description[:30] + "..."
+                cost = item['cost'] or 0
             else:
                 # XT item
                 item_name = item['name']
@@ -571,15 +680,15 @@ class SaleWindow:
                 description,
                 upc_display,
                 item['quantity'],
-                f"${cost:.2f}",
-                f"${item['unit_price']:.2f}",
-                f"${item['discounted_price']:.2f}",
-                f"${item['total']:.2f}"
+                f"${format_cents(cost)}",
+                f"${format_cents(item['unit_price'])}",
+                f"${format_cents(item['discounted_price'])}",
+                f"${format_cents(item['total'])}"
             ))
     def update_total(self):
         """Update the total amount"""
         self.total_amount = sum(item['total'] for item in self.sale_items)
-        self.total_label.config(text=f"TOTAL: ${self.total_amount:.2f}")
+        self.total_label.config(text=f"TOTAL: ${format_cents(self.total_amount)}")
     
 
 
@@ -595,10 +704,9 @@ class SaleWindow:
         # Get cost information if available
         cost_info = ""
         full_item = None
-        if current_item['upc_code'] and not current_item['is_xt_item']:
-            full_item = self.db.get_item_by_upc(current_item['upc_code'])
-            if full_item and 'cost' in full_item:
-                cost_info = f"Cost: ${full_item['cost']:.2f}"
+        if current_item['upc_code'] and not current_item['is_xt_item'] and current_item['cost'] is not None:
+            full_item = current_item
+            cost_info = f"Cost: ${format_cents(full_item['cost'])}"
         
         # Detect platform
         is_mac = platform.system() == 'Darwin'
@@ -659,7 +767,7 @@ class SaleWindow:
             nonlocal result
             try:
                 new_qty = int(qty_entry.get())
-                new_price = float(price_entry.get())
+                new_price = to_cents(price_entry.get())
                 if new_qty <= 0 or new_price <= 0:
                     raise ValueError()
                 result = {'quantity': new_qty, 'price': new_price}
@@ -698,7 +806,7 @@ class SaleWindow:
         # Current price info
         current_price_label = tk.Label(
             main_container, 
-            text=f"Current Price: ${current_item['discounted_price']:.2f}", 
+            text=f"Current Price: ${format_cents(current_item['discounted_price'])}", 
             bg='white', 
             font=("Arial", 11), 
             fg='#007bff'
@@ -764,26 +872,26 @@ class SaleWindow:
             borderwidth=1
         )
         price_entry.pack(side='left', padx=(10, 0))
-        price_entry.insert(0, str(current_item['discounted_price']))
+        price_entry.insert(0, format_cents(current_item['discounted_price']))
         
         # Profit/Loss calculation if cost is available
         profit_label = None
         if cost_info and full_item and 'cost' in full_item:
             def update_profit_loss():
                 try:
-                    new_price = float(price_entry.get())
+                    new_price = to_cents(price_entry.get())
                     cost = full_item['cost']
                     profit_loss = new_price - cost
                     profit_percentage = ((profit_loss / cost) * 100) if cost > 0 else 0
                     
                     if profit_loss >= 0:
                         profit_label.config(
-                            text=f"Profit: ${profit_loss:.2f} ({profit_percentage:.1f}%)", 
+                            text=f"Profit: ${format_cents(profit_loss)} ({profit_percentage:.1f}%)", 
                             fg='#28a745'
                         )
                     else:
                         profit_label.config(
-                            text=f"Loss: ${abs(profit_loss):.2f} ({profit_percentage:.1f}%)", 
+                            text=f"Loss: ${format_cents(abs(profit_loss))} ({profit_percentage:.1f}%)", 
                             fg='#dc3545'
                         )
                 except ValueError:
@@ -893,47 +1001,45 @@ class SaleWindow:
             messagebox.showwarning("Warning", "Please add items to the sale")
             return
         
-        paid_amount = 0.0
+        paid_amount = 0
         
         if payment_type == 'fully_paid':
             paid_amount = self.total_amount
         elif payment_type == 'partial':
-            paid_amount = simpledialog.askfloat(
+            paid = simpledialog.askstring(
                 "Partial Payment",
-                f"Total: ${self.total_amount:.2f}\nEnter amount paid:",
-                minvalue=0.0,
-                maxvalue=self.total_amount
+                f"Total: ${format_cents(self.total_amount)}\nEnter amount paid:"
             )
-            if paid_amount is None:
+            if paid is None:
                 return
-        # For 'pay_later', paid_amount remains 0.0
+            try:
+                paid_amount = to_cents(paid)
+                if not 0 <= paid_amount <= self.total_amount:
+                    raise ValueError()
+            except ValueError:
+                messagebox.showwarning("Warning",
+                                       f"Please enter an amount from 0.00 to {format_cents(self.total_amount)}")
+                return
+        # For 'pay_later', paid_amount remains 0
         
         try:
-            # Create sale record
-            sale_id = self.db.create_sale(
+            # Sale and all its lines in one transaction
+            sale_id = self.db.record_sale(
                 customer_id=self.current_customer['id'],
                 total_amount=self.total_amount,
                 paid_amount=paid_amount,
-                payment_status=payment_type
+                payment_status=payment_type,
+                items=self.sale_items,
+                terminal=TERMINAL_ID
             )
             
-            # Add sale items
-            for item in self.sale_items:
-                self.db.add_sale_item(
-                    sale_id=sale_id,
-                    item_name=item['name'],
-                    quantity=item['quantity'],
-                    unit_price=item['unit_price'],
-                    upc_code=item['upc_code'],
-                    discounted_price=item['discounted_price'],
-                    is_xt_item=item['is_xt_item']
-                )
-            
             # Show receipt
             self.show_receipt(sale_id)
             
             # Clear sale for next transaction
+            customer_id = self.current_customer['id']
             self.clear_sale()
+            events.publish(events.CUSTOMER_CHANGED, customer_id=customer_id)
             
             messagebox.showinfo("Success", f"Sale completed! Sale ID: {sale_id}")
             
@@ -941,13 +1047,23 @@ class SaleWindow:
             messagebox.showerror("Error", f"Error processing sale: {str(e)}")
         
     def show_receipt(self, sale_id):
-        """Show receipt for the completed sale"""
+        """Show receipt for the completed sale and store it in the background"""
+        receipt = render_receipt(self.db, sale_id)
+        queue_receipt(self.db, sale_id, receipt)
+        receipt_window = ReceiptWindow(self.window, self.db, sale_id, receipt)
+    
+    def reprint_last_receipt(self):
+        """Show the most recent sale's receipt for reprinting"""
+        sale_id = self.db.get_last_sale_id()
+        if not sale_id:
+            messagebox.showinfo("Info", "No sales to reprint yet")
+            return
         receipt_window = ReceiptWindow(self.window, self.db, sale_id)
     
     def clear_sale(self):
         """Clear current sale"""
         self.sale_items = []
-        self.total_amount = 0.0
+        self.total_amount = 0
         self.current_customer = None
         
         self.phone_entry.delete(0, tk.END)
@@ -1037,7 +1153,7 @@ class EditItemDialog:
         tk.Label(price_frame, text="Price ($):", bg='white', fg='#333333', font=("Arial", 11)).pack(side='left')
         self.price_entry = tk.Entry(price_frame, font=("Arial", 11), width=10, bg='white', fg='black')
         self.price_entry.pack(side='left', padx=(10, 0))
-        self.price_entry.insert(0, str(current_item['discounted_price']))
+        self.price_entry.insert(0, format_cents(current_item['discounted_price']))
         
         # Buttons
         button_frame = tk.Frame(self.dialog, bg='white')
@@ -1058,7 +1174,7 @@ class EditItemDialog:
         """Handle OK button"""
         try:
             new_qty = int(self.qty_entry.get())
-            new_price = float(self.price_entry.get())
+            new_price = to_cents(self.price_entry.get())
             if new_qty <= 0 or new_price <= 0:
                 raise ValueError()
             self.result = {'quantity': new_qty, 'price': new_price}
@@ -1187,7 +1303,7 @@ class XTItemDialog:
             return
         
         try:
-            price = float(price_str)
+            price = to_cents(price_str)
             if price <= 0:
                 raise ValueError("Price must be positive")
         except ValueError:
@@ -1209,9 +1325,10 @@ class XTItemDialog:
 
 class ReceiptWindow:
     """Receipt display and printing window"""
-    def __init__(self, parent, db, sale_id):
+    def __init__(self, parent, db, sale_id, receipt=None):
         self.db = db
         self.sale_id = sale_id
+        self.receipt = receipt
         
         # Detect platform
         self.is_mac = platform.system() == 'Darwin'
@@ -1238,79 +1355,15 @@ class ReceiptWindow:
     
     def create_receipt(self):
         """Create receipt display"""
-        # Get sale data
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        # Get sale info
-        cursor.execute('''
-            SELECT s.total_amount, s.paid_amount, s.payment_status, s.sale_date, c.name, c.phone
-            FROM sales s
-            JOIN customers c ON s.customer_id = c.id
-            WHERE s.id = ?
-        ''', (self.sale_id,))
-        sale_info = cursor.fetchone()
-        
-        # Get sale items
-        sale_items = self.db.get_sale_items(self.sale_id)
-        
-        conn.close()
-        
-        # Calculate tax details
-        from config import RECEIPT_COMPANY_NAME, RECEIPT_ADDRESS
-        
-        subtotal = sale_info[0]  # Total amount includes everything
-        
-        # Create receipt text
-        receipt_text = f"""
-{RECEIPT_COMPANY_NAME.center(48)}
-{RECEIPT_ADDRESS.replace(chr(10), chr(10)).center(48)}
-{'=' * 48}
-
-Sale #: {self.sale_id}
-Date: {sale_info[3][:19] if sale_info[3] else 'N/A'}
-Customer: {sale_info[4]}
-Phone: {sale_info[5]}
-
-{'=' * 48}
-ITEMS:
-{'=' * 48}
-"""
-# In ReceiptWindow.create_receipt(), replace the items section:
-        for item in sale_items:
-            # Get full item details from database
-            full_item = self.db.get_item_by_upc(item['upc_code']) if item['upc_code'] else None
-            
-            if full_item:
-                # Show: UPC, Brand, Product, Description, Price
-                receipt_text += f"""
-        {full_item['upc_code']}
-        {full_item['brand']} {full_item['product']}
-        {full_item['description'][:45]}
-        {item['quantity']} x ${item['discounted_price']:.2f} = ${item['total']:.2f}
-        """
-            else:
-                # XT item or item not found
-                receipt_text += f"""
-        {item['name']}
-        XT ITEM
-        {item['quantity']} x ${item['discounted_price']:.2f} = ${item['total']:.2f}
-        """
-
-
-
+        # Reprints come straight from the stored copy
+        if not self.receipt:
+            self.receipt = load_receipt(self.db, self.sale_id)
+        if not self.receipt:
+            messagebox.showerror("Error", f"Sale #{self.sale_id} not found")
+            self.window.destroy()
+            return
         
-        receipt_text += f"""
-{'=' * 48}
-{'TOTAL:'.ljust(40)}${subtotal:.2f}
-{'PAID:'.ljust(40)}${sale_info[1]:.2f}
-{'BALANCE:'.ljust(40)}${subtotal - sale_info[1]:.2f} 
-Payment: {sale_info[2].replace('_', ' ').title()}
-
-{'=' * 48}
-Thank you for your business!
-{'=' * 48}
-        """
+        receipt_text = self.receipt['text']
         
         # Store receipt text for printing
         self.receipt_text = receipt_text
@@ -1351,6 +1404,19 @@ Thank you for your business!
         )
         print_btn.pack(side='left', padx=5)
         
+        # PDF button
+        pdf_btn = self.create_button(
+            button_frame,
+            text="Save PDF",
+            command=self.save_pdf,
+            bg_color='#007bff',
+            fg_color='white',
+            font=("Arial", 12, "bold"),
+            width=10,
+            height=2
+        )
+        pdf_btn.pack(side='left', padx=5)
+        
         # Close button
         close_btn = self.create_button(
             button_frame,
@@ -1363,24 +1429,42 @@ Thank you for your business!
             height=2
         )
         close_btn.pack(side='left', padx=5)
+        
+        self.print_status_label = tk.Label(
+            self.window,
+            text="",
+            font=("Arial", 9),
+            bg='white',
+            fg='#666666'
+        )
+        self.print_status_label.pack(pady=(0, 5))
     
     def print_receipt(self):
-        """Print receipt to Z-Star printer"""
+        """Queue the receipt for printing without waiting for the printer"""
+        get_print_queue().submit(self.receipt_text, self.receipt['escpos'], self.sale_id)
+        self.print_status_label.config(
+            text="Receipt queued for printing",
+            fg='#28a745'
+        )
+
+    def save_pdf(self):
+        """Save the sale as a full-page PDF receipt or quote"""
+        from utils.pdf_receipts import render_sale_pdf, pdf_file_name
+        
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".pdf",
+            initialfile=pdf_file_name(self.sale_id),
+            filetypes=[("PDF files", "*.pdf")]
+        )
+        if not path:
+            return
+        
         try:
-            from utils.printer import ZStarPrinter
-            printer = ZStarPrinter()
-            
-            success = printer.print_receipt(self.receipt_text)
-            
-            if success:
-                messagebox.showinfo("Print Success", "Receipt sent to printer successfully!")
-            else:
-                messagebox.showerror("Print Error", "Failed to print receipt. Please check your printer connection.")
-                
-        except ImportError:
-            messagebox.showerror("Print Error", "Printer module not found. Please check printer setup.")
+            render_sale_pdf(self.db, self.sale_id, path)
+            self.print_status_label.config(text=f"Saved {os.path.basename(path)}", fg='#28a745')
         except Exception as e:
-            messagebox.showerror("Print Error", f"Error printing receipt: {str(e)}")
+            messagebox.showerror("Error", f"Could not save PDF: {e}")
 
 # Main function to test the sale window
 if __name__ == "__main__":
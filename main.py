@@ -6,6 +6,7 @@ Offline Point of Sale System for Windows/Mac
 Author: Your Name
 """
 
+import multiprocessing
 import sys
 import os
 import tkinter as tk
@@ -76,4 +77,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Process pool workers are spawned; a frozen (PyInstaller) build has to
+    # hand them off here instead of starting another POS window
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -6,6 +6,7 @@ This creates test customers and items in your main pos_system.db
 
 import random
 from database.models import DatabaseManager
+from utils.helpers import to_cents, format_cents
 
 def populate_test_data():
     """Add test customers and items to the main database"""
@@ -94,7 +95,7 @@ def populate_test_data():
         try:
             existing = db.get_item_by_upc(upc)
             if not existing:
-                db.add_item(upc, name, price)
+                db.add_item(upc, name, to_cents(price))
                 items_added += 1
                 print(f"  ✅ Added: {name} (${price}) - UPC: {upc}")
             else:
@@ -141,40 +142,32 @@ def populate_test_data():
                     'quantity': quantity,
                     'unit_price': item['price'],
                     'discounted_price': item['price'],
-                    'is_xt_item': False
+                    'is_xt_item': False,
+                    'brand': item.get('brand'),
+                    'description': item.get('description'),
+                    'cost': item.get('cost')
                 })
             
             # Determine paid amount
             if payment_status == 'fully_paid':
                 paid_amount = total_amount
             elif payment_status == 'partial':
-                paid_amount = round(total_amount * 0.5, 2)  # 50% paid
+                paid_amount = total_amount // 2  # 50% paid
             else:  # pay_later
-                paid_amount = 0.0
+                paid_amount = 0
             
             # Create sale
             try:
-                sale_id = db.create_sale(
+                sale_id = db.record_sale(
                     customer_id=customer['id'],
                     total_amount=total_amount,
                     paid_amount=paid_amount,
-                    payment_status=payment_status
+                    payment_status=payment_status,
+                    items=sale_items_data
                 )
                 
-                # Add sale items
-                for item_data in sale_items_data:
-                    db.add_sale_item(
-                        sale_id=sale_id,
-                        item_name=item_data['name'],
-                        quantity=item_data['quantity'],
-                        unit_price=item_data['unit_price'],
-                        upc_code=item_data['upc_code'],
-                        discounted_price=item_data['discounted_price'],
-                        is_xt_item=item_data['is_xt_item']
-                    )
-                
                 sales_created += 1
-                print(f"  ✅ Created sale #{sale_id} for {customer['name']} - ${total_amount:.2f} ({payment_status})")
+                print(f"  ✅ Created sale #{sale_id} for {customer['name']} - ${format_cents(total_amount)} ({payment_status})")
                 
             except Exception as e:
                 print(f"  ❌ Error creating sale: {str(e)}")
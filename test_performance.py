@@ -21,6 +21,73 @@ def generate_random_item_name():
     
     return f"{random.choice(prefixes)} {random.choice(products)} {random.choice(suffixes)}"
 
+def integer_cents_migration_check():
+    """Check that migrate_integer_cents turns a dollars database into the same amounts in cents"""
+    import os
+    import sqlite3
+    import tempfile
+    from database.models import SCHEMA_VERSION
+    
+    print("=== Integer cents migration check ===\n")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "cents.db")
+        db = DatabaseManager(db_path)
+        
+        customer_ids = [db.add_customer(f"555-{i:07d}", f"Customer {i}") for i in range(50)]
+        for i in range(2000):
+            unit_price = random.randint(1, 99999)
+            quantity = random.randint(1, 4)
+            total_amount = unit_price * quantity
+            payment_status = random.choice(['fully_paid', 'pay_later', 'partial'])
+            paid_amount = {'fully_paid': total_amount, 'pay_later': 0}.get(
+                payment_status, random.randint(0, total_amount))
+            db.record_sale(random.choice(customer_ids), total_amount, paid_amount, payment_status, [{
+                'name': 'Item', 'upc_code': generate_random_upc(), 'quantity': quantity,
+                'unit_price': unit_price, 'discounted_price': None, 'is_xt_item': False,
+                'brand': 'Brand', 'description': '', 'cost': unit_price // 2
+            }])
+        db.apply_payment(customer_ids[0], 12345)
+        db.refresh_sales_rollups()
+        
+        def money_totals():
+            conn = sqlite3.connect(db_path)
+            totals = {
+                f"{table}.{column}": conn.execute(f"SELECT SUM({column}), typeof(MAX({column})) FROM {table}").fetchone()
+                for table, columns in DatabaseManager.MONEY_COLUMNS.items()
+                for column in columns
+            }
+            totals['customer_summary'] = conn.execute(
+                "SELECT SUM(total_sales), SUM(balance_due) FROM customer_summary").fetchone()
+            conn.close()
+            return totals
+        
+        expected = money_totals()
+        
+        # Put the database back to dollars as floats, as it was before migration 13
+        conn = sqlite3.connect(db_path)
+        with conn:
+            for table, columns in DatabaseManager.MONEY_COLUMNS.items():
+                conn.execute(f"UPDATE {table} SET {', '.join(f'{column} = {column} / 100.0' for column in columns)}")
+            conn.execute("UPDATE customer_summary SET total_sales = total_sales / 100.0, "
+                         "balance_due = balance_due / 100.0")
+            conn.execute("PRAGMA user_version = 12")
+        conn.close()
+        
+        start_time = time.time()
+        DatabaseManager(db_path)
+        migrate_time = time.time() - start_time
+        
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
+        actual = money_totals()
+        for name, values in expected.items():
+            assert actual[name] == values, (name, actual[name], values)
+        
+        print(f"✅ {len(expected)} money totals match to the cent after migrating, "
+              f"in {migrate_time:.2f} seconds\n")
+
 def performance_test():
     """Test database performance with 10,000 items"""
     
@@ -36,7 +103,7 @@ def performance_test():
     for i in range(10000):
         upc = generate_random_upc()
         name = generate_random_item_name()
-        price = round(random.uniform(1.0, 999.99), 2)
+        price = random.randint(100, 99999)  # Cents
         
         try:
             db.add_item(upc, name, price)
@@ -81,6 +148,17 @@ def performance_test():
     load_time = time.time() - start_time
     print(f"✅ Loaded {len(all_items)} items in {load_time:.2f} seconds\n")
     
+    # Test 3b: Batch UPC normalization (CSV import path)
+    print("Test 3b: Normalizing 1,000,000 UPC codes to GTIN-14...")
+    from utils.helpers import to_gtin14_batch
+    codes = [generate_random_upc() for _ in range(1000000)]
+    to_gtin14_batch(codes[:1000])  # Warm up NumPy
+    start_time = time.time()
+    to_gtin14_batch(codes)
+    normalize_time = time.time() - start_time
+    print(f"✅ Normalized 1,000,000 codes in {normalize_time:.2f} seconds")
+    print(f"   {1000000 / normalize_time / 1e6:.1f} million codes per second\n")
+    
     # Test 4: Database file size
     import os
     db_size = os.path.getsize("database/test_performance.db")
@@ -104,9 +182,9 @@ def performance_test():
     # Add some sales
     for i in range(500):
         customer_id = random.choice(customer_ids)
-        total_amount = round(random.uniform(10.0, 500.0), 2)
+        total_amount = random.randint(1000, 50000)  # Cents
         payment_status = random.choice(['fully_paid', 'pay_later', 'partial'])
-        paid_amount = total_amount if payment_status == 'fully_paid' else round(random.uniform(0, total_amount), 2)
+        paid_amount = total_amount if payment_status == 'fully_paid' else random.randint(0, total_amount)
         
         sale_id = db.create_sale(customer_id, total_amount, paid_amount, payment_status)
         
@@ -140,4 +218,5 @@ def performance_test():
     print("You can delete this file after reviewing the results.")
 
 if __name__ == "__main__":
+    integer_cents_migration_check()
     performance_test()
\ No newline at end of file
@@ -0,0 +1,398 @@
+"""
+Columnar analytics over the sales history
+
+Reports that aggregate many sales work on NumPy columns instead of looping
+over fetchall() tuples. SalesColumns holds one array per field of sales
+and of sale lines: money in integer cents, sale times in epoch seconds
+(UTC, as sale_date is stored) and UPCs and terminals dictionary-encoded as
+small ints. Lines also carry their sale's time and terminal so they can be
+filtered and grouped without a join.
+
+Only fields fixed at checkout are kept, so the columns are a snapshot on
+disk that only ever grows: one raw file per column, appended with the
+sales past the last sale ID, and a small manifest.json with the row counts
+and dictionaries, written last. Loading maps the files read-only, so a
+report process starts without reading or copying the history. Refreshes
+hold a lock file in the snapshot directory, so only one thread or process
+appends at a time.
+
+group_sum, date_buckets, date_mask and top_k are the primitives reports
+build on; they work on any of the columns.
+
+Usage:
+    python -m utils.analytics [--db pos.db] [-o temp/analytics/]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ANALYTICS_PATH, DATABASE_PATH
+
+# Bumped when the column layout changes, so older snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+SALE_COLUMNS = {
+    'sale_id': np.int64,
+    'time': np.int64,
+    'customer_id': np.int64,
+    'terminal': np.int32,
+    'total_cents': np.int64,
+}
+
+# cost_cents is -1 for lines sold without a cost snapshot
+LINE_COLUMNS = {
+    'line_id': np.int64,
+    'sale_id': np.int64,
+    'time': np.int64,
+    'terminal': np.int32,
+    'upc': np.int32,
+    'brand_id': np.int64,
+    'quantity': np.int64,
+    'unit_cents': np.int64,
+    'price_cents': np.int64,
+    'cost_cents': np.int64,
+    'is_xt': np.bool_,
+}
+
+# date_buckets units and their datetime64 resolution
+BUCKET_UNITS = {'hour': 'h', 'day': 'D', 'month': 'M', 'year': 'Y'}
+
+# One lock per snapshot directory for the threads of this process; the
+# lock file covers other processes
+_snapshot_locks = {}
+_snapshot_locks_lock = threading.Lock()
+
+
+@contextmanager
+def snapshot_lock(path):
+    """Hold the snapshot in ``path`` exclusively, across threads and processes"""
+    path = os.path.abspath(path)
+    with _snapshot_locks_lock:
+        thread_lock = _snapshot_locks.setdefault(path, threading.Lock())
+    with thread_lock:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'refresh.lock'), 'a+b') as file:
+            if os.name == 'nt':
+                import msvcrt
+                file.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK gives up after 10 seconds of retries
+                        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass
+            else:
+                import fcntl
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            # Closing the file releases the lock
+            yield
+
+
+class Dictionary:
+    """Strings encoded as ints, numbered in order of first appearance"""
+
+    def __init__(self, values=None):
+        self.values = list(values or [])
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, strings):
+        """Codes for a sequence of strings, adding new ones"""
+        if not len(strings):
+            return np.empty(0, dtype=np.int32)
+        unique, inverse = np.unique(np.asarray(strings, dtype=str), return_inverse=True)
+        codes = []
+        for value in unique.tolist():
+            if value not in self.codes:
+                self.codes[value] = len(self.values)
+                self.values.append(value)
+            codes.append(self.codes[value])
+        return np.array(codes, dtype=np.int32)[inverse.ravel()]
+
+    def decode(self, codes):
+        """Strings for an array of codes"""
+        return np.array(self.values, dtype=object)[np.asarray(codes)]
+
+    def code(self, value):
+        """Code of one string, or None if it never appeared"""
+        return self.codes.get(value)
+
+
+class SalesColumns:
+    """Sales and sale line columns, cached under ``path`` for one database"""
+
+    def __init__(self, path=ANALYTICS_PATH, db_path=None):
+        self.path = path
+        self.db_path = os.path.abspath(db_path) if db_path else None
+        self.clear()
+
+    def clear(self):
+        """Drop all columns, so the next refresh reads every sale"""
+        self.sales = {name: np.empty(0, dtype=dtype) for name, dtype in SALE_COLUMNS.items()}
+        self.lines = {name: np.empty(0, dtype=dtype) for name, dtype in LINE_COLUMNS.items()}
+        self.terminals = Dictionary()
+        self.upcs = Dictionary()
+        self.last_sale_id = 0
+
+    @classmethod
+    def load(cls, path=ANALYTICS_PATH, db_path=None):
+        """Map the snapshot columns, or start empty if there is no snapshot for this database"""
+        columns = cls(path, db_path)
+        columns.read_manifest()
+        return columns
+
+    def read_manifest(self):
+        """Map the columns the manifest lists, or clear if there is no snapshot for this database"""
+        try:
+            with open(os.path.join(self.path, 'manifest.json'), encoding='utf-8') as file:
+                manifest = json.load(file)
+            if manifest['version'] != SNAPSHOT_VERSION:
+                raise ValueError("old snapshot version")
+            if self.db_path and manifest['db_path'] != self.db_path:
+                raise ValueError("snapshot of another database")
+
+            sales = self._map('sales', SALE_COLUMNS, manifest['sales'])
+            lines = self._map('lines', LINE_COLUMNS, manifest['lines'])
+        except (OSError, ValueError, KeyError):
+            self.clear()
+            return
+
+        self.sales, self.lines = sales, lines
+        self.terminals = Dictionary(manifest['terminals'])
+        self.upcs = Dictionary(manifest['upcs'])
+        self.last_sale_id = manifest['last_sale_id']
+
+    def _file(self, table, name):
+        return os.path.join(self.path, f"{table}_{name}.bin")
+
+    def _map(self, table, dtypes, count):
+        """Columns of a table mapped read-only, ``count`` rows long"""
+        if not count:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in dtypes.items()}
+        # Rows an interrupted append left past the manifest count are not mapped
+        return {name: np.memmap(self._file(table, name), dtype=dtype, mode='r', shape=(count,))
+                for name, dtype in dtypes.items()}
+
+    def refresh(self, db, chunk_size=50000, progress=None) -> int:
+        """Append sales after the watermark from ``db`` and return how many were added
+
+        ``progress`` is called with the number of new sales read so far.
+        """
+        with snapshot_lock(self.path):
+            # Another thread or process may have appended since this snapshot was loaded
+            self.db_path = os.path.abspath(db.db_path)
+            self.read_manifest()
+            if (db.get_last_sale_id() or 0) < self.last_sale_id:
+                # The database was replaced or emptied, start again
+                self.clear()
+            return self._refresh(db, chunk_size, progress)
+
+    def _refresh(self, db, chunk_size, progress):
+        """Append new sales chunk by chunk, with the snapshot lock held"""
+        added = 0
+        for sales, lines in db.iter_new_sales(self.last_sale_id, chunk_size):
+            sale_id, sale_time, customer_id, terminal, total_cents = zip(*sales)
+            new_sales = {
+                'sale_id': np.array(sale_id, dtype=np.int64),
+                'time': np.array(sale_time, dtype=np.int64),
+                'customer_id': np.array(customer_id, dtype=np.int64),
+                'terminal': self.terminals.encode(terminal),
+                'total_cents': np.array(total_cents, dtype=np.int64),
+            }
+
+            new_lines = {name: np.empty(0, dtype=dtype) for name, dtype in LINE_COLUMNS.items()}
+            if lines:
+                line_id, line_sale_id, upc, brand_id, quantity, unit_cents, price_cents, cost_cents, \
+                    is_xt = zip(*lines)
+                line_sale_id = np.array(line_sale_id, dtype=np.int64)
+                # Sales are in ID order, so each line finds its sale by binary search
+                sale_index = np.searchsorted(new_sales['sale_id'], line_sale_id)
+                new_lines = {
+                    'line_id': np.array(line_id, dtype=np.int64),
+                    'sale_id': line_sale_id,
+                    'time': new_sales['time'][sale_index],
+                    'terminal': new_sales['terminal'][sale_index],
+                    'upc': self.upcs.encode(upc),
+                    'brand_id': np.array(brand_id, dtype=np.int64),
+                    'quantity': np.array(quantity, dtype=np.int64),
+                    'unit_cents': np.array(unit_cents, dtype=np.int64),
+                    'price_cents': np.array(price_cents, dtype=np.int64),
+                    'cost_cents': np.array([-1 if cost is None else cost for cost in cost_cents],
+                                           dtype=np.int64),
+                    'is_xt': np.array(is_xt, dtype=np.bool_),
+                }
+
+            # Each chunk is appended as it is read, so an interrupted first
+            # snapshot keeps what it has
+            self.append(new_sales, new_lines, sales[-1][0])
+            added += len(sales)
+            if progress:
+                progress(added)
+        return added
+
+    def append(self, sales, lines, last_sale_id):
+        """Append new rows to the column files, write the manifest and map the result
+
+        The caller holds snapshot_lock, as refresh does.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        if not len(self.sales['sale_id']) and os.path.exists(manifest_path):
+            # Starting over: the old manifest must not describe the new rows
+            os.remove(manifest_path)
+
+        counts = {}
+        for table, dtypes, old, new in (('sales', SALE_COLUMNS, self.sales, sales),
+                                        ('lines', LINE_COLUMNS, self.lines, lines)):
+            count = len(next(iter(old.values())))
+            for name, dtype in dtypes.items():
+                size = count * np.dtype(dtype).itemsize
+                with open(self._file(table, name), 'ab') as file:
+                    # Drop anything past the rows the manifest knows about; a
+                    # file that is the right size is left alone, as readers
+                    # may have it mapped
+                    if os.fstat(file.fileno()).st_size != size:
+                        file.truncate(size)
+                    file.write(np.ascontiguousarray(new[name], dtype=dtype).tobytes())
+            counts[table] = count + len(next(iter(new.values())))
+
+        self.last_sale_id = last_sale_id
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'db_path': self.db_path,
+            'last_sale_id': self.last_sale_id,
+            'sales': counts['sales'],
+            'lines': counts['lines'],
+            'terminals': self.terminals.values,
+            'upcs': self.upcs.values,
+        }
+        temp_path = os.path.join(self.path, 'manifest.json.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        os.replace(temp_path, manifest_path)
+
+        self.sales = self._map('sales', SALE_COLUMNS, counts['sales'])
+        self.lines = self._map('lines', LINE_COLUMNS, counts['lines'])
+
+    def lines_between(self, start_date=None, end_date=None, catalog_only=False):
+        """Line columns for sales between two dates, 'YYYY-MM-DD' inclusive"""
+        mask = date_mask(self.lines['time'], start_date, end_date)
+        if catalog_only:
+            mask &= ~self.lines['is_xt']
+        return {name: values[mask] for name, values in self.lines.items()}
+
+    def sales_between(self, start_date=None, end_date=None):
+        """Sale columns for sales between two dates, 'YYYY-MM-DD' inclusive"""
+        mask = date_mask(self.sales['time'], start_date, end_date)
+        return {name: values[mask] for name, values in self.sales.items()}
+
+
+def get_sales_columns(db, path=ANALYTICS_PATH, progress=None):
+    """Map the snapshot for a database and append any sales since it was taken"""
+    columns = SalesColumns.load(path, db.db_path)
+    columns.refresh(db, progress=progress)
+    return columns
+
+
+def group_sum(keys, values):
+    """Sum values for each distinct key
+
+    ``keys`` is an array, or a tuple of arrays to group by their
+    combination; ``values`` is an array or a list of arrays. Returns
+    (unique keys, sums) in the same shapes, keys in ascending order.
+    Integer values are summed exactly (below 2**53, a trillion dollars in
+    cents) and come back as int64.
+    """
+    multiple_keys = isinstance(keys, tuple)
+    if multiple_keys:
+        uniques, inverses = zip(*(np.unique(key, return_inverse=True) for key in keys))
+        combined = np.ravel_multi_index([inverse.ravel() for inverse in inverses],
+                                        [len(unique) for unique in uniques])
+        codes, groups = np.unique(combined, return_inverse=True)
+        unique_keys = tuple(unique[index] for unique, index in
+                            zip(uniques, np.unravel_index(codes, [len(unique) for unique in uniques])))
+    else:
+        unique_keys, groups = np.unique(keys, return_inverse=True)
+        codes = unique_keys
+    groups = groups.ravel()
+
+    multiple_values = isinstance(values, (list, tuple))
+    sums = []
+    for value in (values if multiple_values else [values]):
+        value = np.asarray(value)
+        total = np.bincount(groups, weights=value, minlength=len(codes))
+        if value.dtype.kind in 'iub':
+            total = np.rint(total).astype(np.int64)
+        sums.append(total)
+    return unique_keys, (sums if multiple_values else sums[0])
+
+
+def date_buckets(times, unit='day'):
+    """Bucket epoch seconds by 'hour', 'day', 'week' (from Monday), 'month' or 'year'
+
+    Returns datetime64 values; np.datetime_as_string turns them into labels.
+    """
+    times = np.asarray(times).astype('datetime64[s]')
+    if unit == 'week':
+        days = times.astype('datetime64[D]')
+        # 1970-01-01 was a Thursday, three days after a Monday
+        return days - (days.astype(np.int64) + 3) % 7
+    return times.astype(f'datetime64[{BUCKET_UNITS[unit]}]')
+
+
+def date_mask(times, start_date=None, end_date=None):
+    """True for epoch seconds from start_date to end_date, 'YYYY-MM-DD' inclusive"""
+    mask = np.ones(len(times), dtype=bool)
+    if start_date:
+        mask &= times >= np.datetime64(start_date, 's').astype(np.int64)
+    if end_date:
+        mask &= times < (np.datetime64(end_date, 'D') + 1).astype('datetime64[s]').astype(np.int64)
+    return mask
+
+
+def top_k(values, k, largest=True):
+    """Indices of the k largest (or smallest) values, in order"""
+    values = np.asarray(values)
+    if k >= len(values):
+        order = np.argsort(values, kind='stable')
+        return order[::-1] if largest else order
+    if largest:
+        candidates = np.argpartition(-values, k)[:k]
+        return candidates[np.argsort(-values[candidates], kind='stable')]
+    candidates = np.argpartition(values, k)[:k]
+    return candidates[np.argsort(values[candidates], kind='stable')]
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Write or bring up to date the columnar sales snapshot")
+    parser.add_argument('-o', '--output', default=ANALYTICS_PATH, help="Snapshot directory")
+    parser.add_argument('--db', default=DATABASE_PATH, help="Database file")
+    args = parser.parse_args()
+
+    from database.models import DatabaseManager
+
+    db = DatabaseManager(args.db)
+    start_time = time.perf_counter()
+    columns = SalesColumns.load(args.output, db.db_path)
+    added = columns.refresh(db, progress=lambda count: print(f"   {count:,} new sales", end='\r'))
+    elapsed = time.perf_counter() - start_time
+
+    print(f"✅ {added:,} new sales appended in {elapsed:.1f} seconds")
+    print(f"   {len(columns.sales['sale_id']):,} sales and {len(columns.lines['line_id']):,} lines "
+          f"up to sale #{columns.last_sale_id}")
+    print(f"📁 {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Barcode image decoding for receiving paperwork
+
+Cleans keyboard-wedge scanner input, and decodes every image in a directory
+(vendor packing slips, shelf tags) with pyzbar in a process pool, mapping
+each decoded code to a catalog item and writing the results to a CSV file.
+
+Usage:
+    python -m utils.barcode_scanner <image_dir> [-o results.csv] [-w workers]
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BARCODE_PREFIX, BARCODE_SUFFIX
+from utils.helpers import normalize_upc, bounded_map, format_cents
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.gif', '.webp')
+
+RESULT_COLUMNS = ['image', 'symbology', 'barcode', 'upc_code', 'found',
+                  'brand', 'product', 'description', 'price', 'error']
+
+
+def clean_scanned_code(raw: str) -> str:
+    """Strip scanner prefix/suffix characters and normalize the barcode"""
+    code = raw.strip()
+    if BARCODE_PREFIX and code.startswith(BARCODE_PREFIX):
+        code = code[len(BARCODE_PREFIX):]
+    if BARCODE_SUFFIX and code.endswith(BARCODE_SUFFIX):
+        code = code[:-len(BARCODE_SUFFIX)]
+    return normalize_upc(code)
+
+
+def iter_image_files(directory):
+    """Yield image file paths in a directory, sorted by name"""
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and name.lower().endswith(IMAGE_EXTENSIONS):
+            yield path
+
+
+def _load_grayscale(path):
+    """Load an image as a 2D grayscale array"""
+    try:
+        import cv2
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError("Unreadable image")
+        return image
+    except ImportError:
+        # Fall back to Pillow when OpenCV is not installed
+        from PIL import Image
+        with Image.open(path) as image:
+            return image.convert('L').copy()
+
+
+def decode_image(path):
+    """Decode all barcodes in one image file
+
+    Runs inside a worker process, so only the small list of decoded codes
+    travels back to the parent - never the image itself.
+    """
+    from pyzbar import pyzbar
+
+    try:
+        image = _load_grayscale(path)
+        codes = [
+            (symbol.type, symbol.data.decode('ascii', errors='replace'))
+            for symbol in pyzbar.decode(image)
+        ]
+        return {'image': path, 'codes': codes, 'error': None}
+    except Exception as e:
+        return {'image': path, 'codes': [], 'error': str(e)}
+
+
+def decode_directory(directory, workers=None, max_in_flight=None):
+    """Decode every image in a directory and yield results in file name order
+
+    Only ``max_in_flight`` images are queued at once, so memory stays flat
+    no matter how many files the directory holds.
+    """
+    # Fail fast in the parent if pyzbar or the zbar library is missing
+    from pyzbar import pyzbar  # noqa: F401
+
+    yield from bounded_map(decode_image, iter_image_files(directory), workers, max_in_flight)
+
+
+def write_results_csv(results, db, output_path):
+    """Look up decoded codes in the catalog and stream rows to a CSV file
+
+    Returns a dict with image, code and match counts.
+    """
+    stats = {'images': 0, 'codes': 0, 'matched': 0, 'errors': 0}
+    item_cache = {}
+
+    with open(output_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(RESULT_COLUMNS)
+
+        for result in results:
+            stats['images'] += 1
+            image_name = os.path.basename(result['image'])
+
+            if result['error']:
+                stats['errors'] += 1
+                writer.writerow([image_name, '', '', '', False, '', '', '', '', result['error']])
+                continue
+
+            if not result['codes']:
+                writer.writerow([image_name, '', '', '', False, '', '', '', '', 'No barcode found'])
+                continue
+
+            for symbology, data in result['codes']:
+                stats['codes'] += 1
+
+                # Packing slips repeat the same UPC often, only look it up once
+                if data not in item_cache:
+                    item_cache[data] = db.get_item_by_upc(data)
+                item = item_cache[data]
+
+                if item:
+                    stats['matched'] += 1
+                    writer.writerow([
+                        image_name, symbology, data, item['upc_code'], True,
+                        item['brand'], item['product'], item['description'],
+                        format_cents(item['price']), ''
+                    ])
+                else:
+                    writer.writerow([image_name, symbology, data, normalize_upc(data),
+                                     False, '', '', '', '', ''])
+
+    return stats
+
+
+def decode_directory_to_csv(directory, output_path, db=None, workers=None, progress=None):
+    """Decode a directory of images and write the results CSV
+
+    ``progress`` is called with the number of images decoded so far.
+    """
+    if db is None:
+        from database.models import DatabaseManager
+        db = DatabaseManager()
+
+    def results_with_progress():
+        for count, result in enumerate(decode_directory(directory, workers), 1):
+            yield result
+            if progress:
+                progress(count)
+
+    return write_results_csv(results_with_progress(), db, output_path)
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Decode barcodes from a directory of images")
+    parser.add_argument('directory', help="Directory containing images")
+    parser.add_argument('-o', '--output', default='barcode_results.csv', help="Results CSV path")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: number of CPU cores)")
+    parser.add_argument('--db', default=None, help="Database path")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+
+    from database.models import DatabaseManager
+    db = DatabaseManager(args.db) if args.db else DatabaseManager()
+
+    stats = decode_directory_to_csv(
+        args.directory, args.output, db=db, workers=args.workers,
+        progress=lambda count: print(f"  Decoded {count} images...") if count % 100 == 0 else None
+    )
+
+    print(f"✅ Decoded {stats['images']} images, {stats['codes']} barcodes "
+          f"({stats['matched']} matched catalog items, {stats['errors']} errors)")
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Change notifications between open windows
+
+A window that changes data publishes an event and every window that shows
+that data refreshes just the affected rows. All windows share one Tk main
+loop, so callbacks run synchronously on the publishing thread; only
+publish from the Tk thread.
+
+Usage:
+    events.subscribe(events.CUSTOMER_CHANGED, self.on_customer_changed)
+    events.publish(events.CUSTOMER_CHANGED, customer_id=customer_id)
+"""
+
+from collections import defaultdict
+
+# A customer's details, sales or balance changed: customer_id=<id>
+CUSTOMER_CHANGED = 'customer_changed'
+
+_subscribers = defaultdict(list)
+
+
+def subscribe(event, callback):
+    """Call ``callback(**data)`` whenever ``event`` is published"""
+    if callback not in _subscribers[event]:
+        _subscribers[event].append(callback)
+
+
+def unsubscribe(event, callback):
+    """Stop calling a callback, e.g. when its window closes"""
+    if callback in _subscribers[event]:
+        _subscribers[event].remove(callback)
+
+
+def publish(event, **data):
+    """Notify every subscriber of an event"""
+    # Copy so callbacks can unsubscribe while we iterate
+    for callback in list(_subscribers[event]):
+        callback(**data)
@@ -0,0 +1,390 @@
+"""
+Helpers - UPC/EAN/GTIN normalization, check digits, phone numbers, money
+and process pool batches
+
+Every barcode is keyed by its GTIN-14 form: UPC-A, EAN-13, EAN-8 and
+GTIN-14 codes are left-padded with zeros to 14 digits and UPC-E codes are
+expanded to UPC-A first. An 11 digit code is a UPC-A that lost its leading
+zero (Excel does this), so it pads to the same GTIN as the 12 digit code.
+
+The scalar functions are used for scans and single lookups. The ``_batch``
+functions take a list or array of codes and do the same work with NumPy
+for CSV imports.
+
+Money is stored and added up as integer cents. to_cents parses what a
+user or a CSV file gives as dollars, format_cents is for display.
+
+Usage:
+    python -m utils.helpers     (checks the barcode and money functions against known values)
+"""
+
+import multiprocessing
+import os
+import sys
+from collections import deque
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+GTIN_LENGTH = 14
+
+# Lengths that are zero padded straight to GTIN-14
+_PADDED_LENGTHS = (8, 11, 12, 13, 14)
+
+
+def clean_code(code) -> str:
+    """Strip whitespace and the spaces/dashes printed inside barcodes"""
+    if code is None:
+        return ''
+    return str(code).strip().replace(' ', '').replace('-', '')
+
+
+def gtin_check_digit(body: str) -> int:
+    """Compute the GS1 check digit for a code body (all digits except the check)"""
+    total = 0
+    for position, digit in enumerate(reversed(body)):
+        total += int(digit) * (3 if position % 2 == 0 else 1)
+    return (10 - total % 10) % 10
+
+
+def is_valid_gtin(code) -> bool:
+    """Check that a UPC-A/EAN-13/EAN-8/GTIN-14/UPC-E code has a correct check digit"""
+    gtin = to_gtin14(code)
+    if gtin is None:
+        return False
+    return gtin_check_digit(gtin[:-1]) == int(gtin[-1])
+
+
+def expand_upce(code: str) -> Optional[str]:
+    """Expand a UPC-E code to its 12 digit UPC-A form
+
+    Accepts 6 digits (no number system or check digit), 7 digits (number
+    system plus 6) or 8 digits (number system, 6 digits and check digit).
+    Returns None if the code is not UPC-E or the check digit is wrong.
+    """
+    code = clean_code(code)
+    if not code.isdigit() or len(code) not in (6, 7, 8):
+        return None
+
+    if len(code) == 6:
+        code = '0' + code
+    number_system = code[0]
+    if number_system not in '01':
+        return None
+
+    d1, d2, d3, d4, d5, d6 = code[1:7]
+    if d6 in '012':
+        body = f"{number_system}{d1}{d2}{d6}0000{d3}{d4}{d5}"
+    elif d6 == '3':
+        body = f"{number_system}{d1}{d2}{d3}00000{d4}{d5}"
+    elif d6 == '4':
+        body = f"{number_system}{d1}{d2}{d3}{d4}00000{d5}"
+    else:
+        body = f"{number_system}{d1}{d2}{d3}{d4}{d5}0000{d6}"
+
+    check = gtin_check_digit(body)
+    if len(code) == 8 and int(code[7]) != check:
+        return None
+    return body + str(check)
+
+
+def _upc_a_from_short_code(code: str) -> Optional[str]:
+    """Return the 12 digit UPC-A for UPC-E and 11 digit codes, else None"""
+    if len(code) == 11:
+        return '0' + code
+    if len(code) in (6, 7):
+        return expand_upce(code)
+    if len(code) == 8 and gtin_check_digit(code[:-1]) != int(code[-1]):
+        # Not a valid EAN-8, so try it as a full 8 digit UPC-E
+        return expand_upce(code)
+    return None
+
+
+def to_gtin14(code) -> Optional[str]:
+    """Normalize a barcode to GTIN-14, or None if it is not a numeric barcode"""
+    code = clean_code(code)
+    if not code.isdigit():
+        return None
+
+    upc_a = _upc_a_from_short_code(code)
+    if upc_a:
+        return upc_a.zfill(GTIN_LENGTH)
+    if len(code) in _PADDED_LENGTHS:
+        return code.zfill(GTIN_LENGTH)
+    return None
+
+
+def canonical_code(code) -> str:
+    """Return the unique lookup key for a barcode
+
+    Numeric barcodes use their GTIN-14, anything else (store SKUs) is
+    matched exactly after stripping whitespace.
+    """
+    return to_gtin14(code) or ('' if code is None else str(code).strip())
+
+
+def normalize_upc(code) -> str:
+    """Normalize a barcode to the form stored in items.upc_code
+
+    UPC-E and 11 digit codes become 12 digit UPC-A, other numeric codes
+    keep their length. Non-numeric codes (store SKUs) are only stripped.
+    """
+    code = clean_code(code)
+    if not code.isdigit():
+        return code
+    return _upc_a_from_short_code(code) or code
+
+
+def phone_digits(phone) -> str:
+    """Digits of a phone number, for indexed prefix/suffix search"""
+    return ''.join(ch for ch in str(phone or '') if ch.isdigit())
+
+
+def to_cents(amount) -> int:
+    """Dollars - a number or text like '$1,234.5' - to integer cents, half up
+
+    Raises ValueError for text that is not an amount.
+    """
+    if isinstance(amount, int):
+        return amount * 100
+    text = str(amount).strip().replace('$', '').replace(',', '')
+    try:
+        # str() of a float is its shortest repr, so 0.1 + 0.2 gives 30 cents
+        return int(Decimal(text).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Not an amount: {amount!r}") from None
+
+
+def format_cents(cents, thousands: bool = False) -> str:
+    """Integer cents as dollars for display, '1234.50' (or '1,234.50')"""
+    sign = '-' if cents < 0 else ''
+    dollars, cents = divmod(abs(int(cents)), 100)
+    return f"{sign}{dollars:{',' if thousands else ''}}.{cents:02d}"
+
+
+# Batch (NumPy) versions
+
+def _right_aligned_digits(codes, width):
+    """Right-align numeric codes into an (n, width) uint8 digit matrix
+
+    Returns the zero padded codes, the digit matrix, the code lengths and a
+    mask of rows that are all digits and at most ``width`` long. Other rows
+    are left as zeros for the caller to handle.
+    """
+    import numpy as np
+
+    # np.strings is the fast ufunc string API in NumPy 2, np.char before that
+    strings = getattr(np, 'strings', np.char)
+
+    arr = np.asarray(codes, dtype=np.str_).ravel()
+    n = len(arr)
+    chars_per_row = arr.dtype.itemsize // 4
+    if n == 0 or chars_per_row == 0:
+        return (np.full(n, '', dtype=f'U{width}'), np.zeros((n, width), dtype=np.uint8),
+                np.zeros(n, dtype=np.int64), np.zeros(n, dtype=bool))
+
+    # NumPy unicode strings are UCS-4 padded with NULs, view them as code points
+    chars = arr.view(np.uint32).reshape(n, chars_per_row)
+    lengths = strings.str_len(arr)
+    ok = ((chars - 48 <= 9) | (chars == 0)).all(axis=1) & (lengths > 0) & (lengths <= width)
+
+    # Digits are ASCII, so the low byte of each UCS-4 code point is enough
+    padded = strings.zfill(arr, width).astype(f'U{width}')
+    low_byte = 0 if sys.byteorder == 'little' else 3
+    digits = padded.view(np.uint8).reshape(n, width, 4)[:, :, low_byte] - np.uint8(48)
+    digits[~ok] = 0
+
+    return padded, digits, lengths, ok
+
+
+def _check_digits(body_digits):
+    """Vectorized check digits for a right-aligned digit matrix of code bodies"""
+    import numpy as np
+
+    # Rightmost body digit has weight 3, then alternating 1 and 3
+    weight_3 = body_digits[:, ::-2].sum(axis=1, dtype=np.int32)
+    weight_1 = body_digits[:, -2::-2].sum(axis=1, dtype=np.int32)
+    return ((10 - (3 * weight_3 + weight_1) % 10) % 10).astype(np.uint8)
+
+
+def to_gtin14_batch(codes):
+    """Normalize many barcodes to GTIN-14 at once
+
+    Returns a NumPy array of 14 character strings, with '' for codes that
+    are not numeric barcodes. Plain numeric codes are handled entirely in
+    NumPy; UPC-E and codes with spaces or dashes take the scalar path.
+    """
+    import numpy as np
+
+    arr = np.asarray(codes, dtype=np.str_).ravel()
+    result, digits, lengths, ok = _right_aligned_digits(arr, GTIN_LENGTH)
+
+    # Valid EAN-8 stays EAN-8, anything else 8 digits long may be UPC-E
+    ean8_ok = _check_digits(digits[:, :-1]) == digits[:, -1]
+    fast = ok & np.isin(lengths, _PADDED_LENGTHS) & ((lengths != 8) | ean8_ok)
+    result[~fast] = ''
+
+    for index in np.flatnonzero(~fast):
+        result[index] = to_gtin14(arr[index]) or ''
+
+    return result
+
+
+def canonical_code_batch(codes):
+    """Batch version of canonical_code, returns a NumPy string array"""
+    import numpy as np
+
+    strings = getattr(np, 'strings', np.char)
+    arr = np.asarray(codes, dtype=np.str_).ravel()
+    gtins = to_gtin14_batch(arr)
+    return np.where(gtins == '', strings.strip(arr), gtins)
+
+
+def is_valid_gtin_batch(codes):
+    """Return a boolean array, True where a code normalizes and its check digit is correct"""
+    import numpy as np
+
+    gtins = to_gtin14_batch(codes)
+    _, digits, _, ok = _right_aligned_digits(gtins, GTIN_LENGTH)
+    valid = ok & (np.char.str_len(gtins) == GTIN_LENGTH)
+    return valid & (_check_digits(digits[:, :-1]) == digits[:, -1])
+
+
+def gtin_check_digit_batch(bodies):
+    """Compute check digits for many code bodies (up to 13 digits each)
+
+    Returns an int array with -1 where a body is not numeric.
+    """
+    import numpy as np
+
+    _, digits, _, ok = _right_aligned_digits(bodies, GTIN_LENGTH - 1)
+    checks = _check_digits(digits).astype(np.int64)
+    checks[~ok] = -1
+    return checks
+
+
+# Process pool batches
+
+def bounded_map(function, iterable, workers=None, max_in_flight=None,
+                initializer=None, initargs=()):
+    """Run function over iterable in a process pool, yielding results in input order
+
+    Only ``max_in_flight`` calls are queued at once, so memory stays flat
+    no matter how long the input is. ``initializer`` runs once in each
+    worker, for per-process state such as a database connection.
+
+    Workers are spawned, not forked: callers include threads of the GUI
+    process, and forking a process with other threads running can copy
+    a held lock into the worker and deadlock it.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for item in iterable:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+# Self-check
+
+# (code as scanned or typed, GTIN-14 or None, check digit valid)
+GTIN_VECTORS = [
+    ('036000291452', '00036000291452', True),     # UPC-A
+    ('36000291452', '00036000291452', True),      # UPC-A that lost its leading zero
+    ('0 36000 29145 2', '00036000291452', True),  # Printed with spaces
+    ('036000291453', '00036000291453', False),    # Wrong check digit
+    ('4006381333931', '04006381333931', True),    # EAN-13
+    ('96385074', '00000096385074', True),         # EAN-8
+    ('10012345678902', '10012345678902', True),   # GTIN-14
+    ('04252614', '00042100005264', True),         # UPC-E, number system and check digit
+    ('0425261', '00042100005264', True),          # UPC-E without check digit
+    ('425261', '00042100005264', True),           # UPC-E digits only
+    ('01234565', '00000001234565', True),         # Also a valid EAN-8, which wins
+    ('01234566', '00000001234566', False),        # Neither a valid EAN-8 nor UPC-E
+    ('012345678', None, False),                   # 9 digits, not a barcode length
+    ('SKU-42', None, False),                      # Store SKU
+    ('', None, False),
+]
+
+# (amount as typed or stored, cents)
+CENTS_VECTORS = [
+    ('12.34', 1234),
+    ('$1,234.5', 123450),
+    (' 7 ', 700),
+    (5, 500),
+    (19.99, 1999),
+    (0.1 + 0.2, 30),       # 0.30000000000000004
+    (2.675, 268),          # Half up on the decimal, where round(2.675 * 100) gives 267
+    ('0.005', 1),
+    ('0.0049', 0),
+    ('-1.005', -101),
+    (59.970000000000006, 5997),
+]
+
+
+def _self_check():
+    """Check the barcode and money functions against known values, and batch against scalar"""
+    import random
+    import numpy as np
+
+    for code, gtin, valid in GTIN_VECTORS:
+        assert to_gtin14(code) == gtin, (code, to_gtin14(code), gtin)
+        assert is_valid_gtin(code) == valid, (code, valid)
+        assert canonical_code(code) == (gtin or code.strip()), code
+    assert expand_upce('04252614') == '042100005264'
+    assert expand_upce('04252615') is None  # Wrong check digit
+    assert expand_upce('01234565') == '012345000065'
+    assert normalize_upc('36000291452') == '036000291452'
+    assert normalize_upc('0425261') == '042100005264'
+    assert [gtin_check_digit(body) for body in ('03600029145', '400638133393', '9638507')] == [2, 1, 4]
+    print(f"✅ {len(GTIN_VECTORS)} known barcodes")
+
+    # Random codes of every length and shape, plus the vectors
+    random.seed(27)
+    codes = [code for code, _, _ in GTIN_VECTORS]
+    for _ in range(20000):
+        code = ''.join(random.choices('0123456789', k=random.randint(1, 15)))
+        shape = random.random()
+        if shape < 0.05:
+            code = code[:3] + '-' + code[3:]
+        elif shape < 0.1:
+            code = ' ' + code + ' '
+        elif shape < 0.15:
+            code = 'X' + code
+        codes.append(code)
+
+    gtins = to_gtin14_batch(codes)
+    assert gtins.tolist() == [to_gtin14(code) or '' for code in codes]
+    assert canonical_code_batch(codes).tolist() == [canonical_code(code) for code in codes]
+    assert is_valid_gtin_batch(codes).tolist() == [is_valid_gtin(code) for code in codes]
+    bodies = [code for code in codes if code.isdigit() and len(code) < GTIN_LENGTH]
+    assert gtin_check_digit_batch(bodies).tolist() == [gtin_check_digit(body) for body in bodies]
+    assert gtin_check_digit_batch(['12a', '']).tolist() == [-1, -1]
+    assert to_gtin14_batch(np.array([], dtype=str)).tolist() == []
+    print(f"✅ Batch and scalar agree on {len(codes):,} codes")
+
+    for amount, cents in CENTS_VECTORS:
+        assert to_cents(amount) == cents, (amount, to_cents(amount), cents)
+    for text in ('', 'abc', '1.2.3', None):
+        try:
+            to_cents(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"to_cents accepted {text!r}")
+    assert format_cents(-5) == '-0.05'
+    assert format_cents(123456789, True) == '1,234,567.89'
+    for cents in list(range(-1000, 1000)) + random.sample(range(10 ** 12), 1000):
+        assert to_cents(format_cents(cents, True)) == cents, cents
+        assert to_cents(cents / 100) == cents, cents
+    print(f"✅ {len(CENTS_VECTORS)} known amounts, and cents round trip through dollars")
+
+
+if __name__ == "__main__":
+    _self_check()
@@ -0,0 +1,166 @@
+"""
+Margin and discount analysis of sale lines
+
+Every catalog sale line in a date range is measured against its list
+price (unit_price) and the cost snapshotted at checkout: how deep the
+cashier discounted it, the margin left, and whether it sold below cost.
+Lines come from the cached sale columns in utils.analytics and are
+summed per (day, terminal, brand) with group_sum, so Python only loops
+over groups, never lines. Money is in integer cents throughout.
+
+Lines without a cost snapshot count toward discounts but not margins.
+
+Usage:
+    python -m utils.margin_analysis --from 2024-01-01 --to 2024-12-31 [--by brand] [-o margins.csv]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATABASE_PATH
+from utils.analytics import get_sales_columns, group_sum, date_buckets
+from utils.helpers import format_cents
+
+# Sums kept per group, in this order
+MEASURES = ['lines', 'units', 'list_revenue', 'revenue', 'discount', 'costed_revenue', 'cost',
+            'below_cost_lines', 'below_cost_loss']
+
+# Measures that are counts rather than money
+COUNT_MEASURES = ('lines', 'units', 'below_cost_lines')
+
+# Money columns of a summary row, in cents
+MONEY_COLUMNS = [measure for measure in MEASURES if measure not in COUNT_MEASURES] + ['margin']
+
+GROUP_KEYS = ('day', 'terminal', 'brand')
+
+def add_ratios(row):
+    """Add discount %, margin and margin % to a row of summed measures"""
+    row['margin'] = row['costed_revenue'] - row['cost']
+    row['discount_pct'] = (round(row['discount'] * 100 / row['list_revenue'], 1)
+                           if row['list_revenue'] else None)
+    row['margin_pct'] = (round(row['margin'] * 100 / row['costed_revenue'], 1)
+                         if row['costed_revenue'] else None)
+    return row
+
+
+def analyze_margins(db, start_date, end_date, columns=None, progress=None):
+    """Discounts and margins of catalog sale lines from start_date to end_date
+
+    Returns {'groups', 'below_cost', 'lines'}: groups has one row per
+    day, terminal and brand with the MEASURES and their ratios; below_cost
+    lists every line sold under its cost. ``columns`` is a SalesColumns
+    already up to date; otherwise the cache is refreshed first, calling
+    ``progress`` with the number of new sales read.
+    """
+    columns = columns or get_sales_columns(db, progress=progress)
+    lines = columns.lines_between(start_date, end_date, catalog_only=True)
+
+    quantity, price, cost = lines['quantity'], lines['price_cents'], lines['cost_cents']
+    list_revenue = quantity * lines['unit_cents']
+    revenue = quantity * price
+    has_cost = cost >= 0
+    cost = np.where(has_cost, cost, 0)
+    below_cost = has_cost & (price < cost)
+
+    keys, sums = group_sum(
+        (date_buckets(lines['time'], 'day'), lines['terminal'], lines['brand_id']),
+        [
+            np.ones_like(quantity),
+            quantity,
+            list_revenue,
+            revenue,
+            list_revenue - revenue,
+            np.where(has_cost, revenue, 0),
+            quantity * cost,
+            below_cost,
+            np.where(below_cost, (cost - price) * quantity, 0),
+        ]
+    )
+    days, terminals, brand_ids = keys
+    brands = db.get_sale_text(set(brand_ids.tolist()) - {0})
+
+    groups = []
+    for day, terminal, brand_id, *values in zip(np.datetime_as_string(days).tolist(),
+                                                columns.terminals.decode(terminals).tolist(),
+                                                brand_ids.tolist(), *(total.tolist() for total in sums)):
+        row = {'day': day, 'terminal': terminal, 'brand': brands.get(brand_id, '')}
+        row.update(zip(MEASURES, values))
+        groups.append(add_ratios(row))
+
+    below_cost_lines = []
+    for line in db.get_sale_lines(lines['line_id'][below_cost].tolist()).values():
+        line['loss'] = (line['cost'] - line['discounted_price']) * line['quantity']
+        below_cost_lines.append(line)
+    below_cost_lines.sort(key=lambda line: (line['sale_date'], line['sale_id']))
+
+    return {'groups': groups, 'below_cost': below_cost_lines, 'lines': len(quantity)}
+
+
+def summarize(groups, by=('brand',)):
+    """Add up analyze_margins groups over some of GROUP_KEYS, e.g. ('terminal',)"""
+    totals = {}
+    for row in groups:
+        key = tuple(row[name] for name in by)
+        total = totals.setdefault(key, dict.fromkeys(MEASURES, 0))
+        for measure in MEASURES:
+            total[measure] += row[measure]
+
+    summary = []
+    for key in sorted(totals):
+        row = dict(zip(by, key))
+        row.update(totals[key])
+        summary.append(add_ratios(row))
+    return summary
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Discount and margin analysis of sale lines")
+    parser.add_argument('--from', dest='start_date', required=True, help="First day, YYYY-MM-DD")
+    parser.add_argument('--to', dest='end_date', required=True, help="Last day, YYYY-MM-DD")
+    parser.add_argument('--by', default='brand',
+                        help=f"Comma separated grouping from {', '.join(GROUP_KEYS)} (default: brand)")
+    parser.add_argument('-o', '--output', default=None, help="Write the summary to this CSV file")
+    parser.add_argument('--db', default=DATABASE_PATH, help="Database file")
+    args = parser.parse_args()
+
+    by = tuple(name.strip() for name in args.by.split(','))
+    if not set(by) <= set(GROUP_KEYS):
+        parser.error(f"--by must be made of {', '.join(GROUP_KEYS)}")
+
+    from database.models import DatabaseManager
+
+    start_time = time.perf_counter()
+    report = analyze_margins(DatabaseManager(args.db), args.start_date, args.end_date)
+    summary = summarize(report['groups'], by)
+    elapsed = time.perf_counter() - start_time
+
+    total = summarize(report['groups'], ())[0] if report['groups'] else None
+    print(f"✅ {report['lines']:,} lines in {elapsed:.1f} seconds")
+    if total:
+        print(f"   Revenue ${format_cents(total['revenue'], True)}, "
+              f"discounts ${format_cents(total['discount'], True)} ({total['discount_pct'] or 0:.1f}%), "
+              f"margin ${format_cents(total['margin'], True)} ({total['margin_pct'] or 0:.1f}%)")
+        print(f"   {total['below_cost_lines']:,} lines below cost, "
+              f"${format_cents(total['below_cost_loss'], True)} under cost")
+
+    if args.output:
+        columns = list(by) + MEASURES + ['discount_pct', 'margin', 'margin_pct']
+        with open(args.output, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows({name: format_cents(value) if name in MONEY_COLUMNS else value
+                              for name, value in row.items()} for row in summary)
+        print(f"📁 {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
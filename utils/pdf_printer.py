@@ -0,0 +1,62 @@
+"""
+PDF receipt printer
+
+Writes each receipt as a one-page PDF sized like 80 mm thermal paper, for
+shops without a receipt printer or for emailing receipts. reportlab is
+imported when the first receipt is written.
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import PRINTER_PDF_PATH
+
+# 80 mm paper, 72 points per inch
+PAPER_WIDTH = 80 / 25.4 * 72
+MARGIN = 10
+FONT_NAME = "Courier"
+FONT_SIZE = 7
+LINE_HEIGHT = 8.5
+
+
+class PdfPrinter:
+    """Printer backend that saves receipts as PDF files"""
+
+    def __init__(self, output_path=PRINTER_PDF_PATH):
+        self.output_path = output_path
+        self.count = 0
+
+    def print_receipt(self, receipt_text, escpos=None):
+        """Write a receipt to a new PDF file, returns True on success"""
+        try:
+            self.write_pdf(receipt_text)
+            return True
+        except Exception as e:
+            print(f"PDF print error: {e}")
+            return False
+
+    def write_pdf(self, receipt_text, path=None):
+        """Write a receipt PDF and return its path"""
+        from reportlab.pdfgen import canvas
+
+        os.makedirs(self.output_path, exist_ok=True)
+        if path is None:
+            self.count += 1
+            path = os.path.join(self.output_path,
+                                f"receipt_{time.strftime('%Y%m%d_%H%M%S')}_{self.count}.pdf")
+
+        lines = receipt_text.strip('\n').split('\n')
+        height = len(lines) * LINE_HEIGHT + 2 * MARGIN
+        pdf = canvas.Canvas(path, pagesize=(PAPER_WIDTH, height))
+        text = pdf.beginText(MARGIN, height - MARGIN - FONT_SIZE)
+        text.setFont(FONT_NAME, FONT_SIZE, leading=LINE_HEIGHT)
+        for line in lines:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+        pdf.save()
+        return path
@@ -0,0 +1,315 @@
+"""
+Full-page PDF receipts and quotes
+
+Renders a sale from DatabaseManager.get_sale_for_receipt as a letter-size
+PDF (contractor quotes, emailed receipts), and renders batches of sales -
+a date range or one customer's tickets - in a process pool.
+
+The page layout, fonts and logo are prepared once per process by
+get_layout() and reused for every document that process renders. Batch
+workers open their own database connection, so only sale IDs go to the
+workers and only a small result dict comes back.
+
+Usage:
+    python -m utils.pdf_receipts [--start 2024-01-01] [--end 2024-01-31]
+                                 [--customer PHONE] [-o dir] [-w workers]
+"""
+
+import argparse
+import os
+import sys
+import time
+from functools import lru_cache
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (DATABASE_PATH, RECEIPT_COMPANY_NAME, RECEIPT_ADDRESS, RECEIPT_LOGO_PATH,
+                    PDF_DOCUMENT_TITLE, PDF_OUTPUT_PATH, PDF_FONT_PATH)
+from utils.helpers import bounded_map, format_cents
+
+MARGIN = 54
+ROW_HEIGHT = 16
+DESCRIPTION_HEIGHT = 11
+LOGO_HEIGHT = 48
+
+
+class PdfLayout:
+    """Page geometry, fonts and static header content for one document title"""
+
+    def __init__(self, title, font_path=PDF_FONT_PATH, logo_path=RECEIPT_LOGO_PATH):
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.utils import ImageReader
+        from reportlab.pdfbase import pdfmetrics
+
+        self.title = title
+        self.page_width, self.page_height = letter
+        self.string_width = pdfmetrics.stringWidth
+
+        if font_path:
+            from reportlab.pdfbase.ttfonts import TTFont
+            name = os.path.splitext(os.path.basename(font_path))[0]
+            pdfmetrics.registerFont(TTFont(name, font_path))
+            self.font = self.bold_font = name
+        else:
+            self.font = 'Helvetica'
+            self.bold_font = 'Helvetica-Bold'
+
+        self.logo = None
+        if logo_path and os.path.exists(logo_path):
+            self.logo = ImageReader(logo_path)
+            logo_width, logo_height = self.logo.getSize()
+            self.logo_size = (LOGO_HEIGHT * logo_width / logo_height, LOGO_HEIGHT)
+
+        # Item table columns: (heading, x, alignment)
+        right = self.page_width - MARGIN
+        self.columns = [
+            ('UPC', MARGIN, 'left'),
+            ('Item', MARGIN + 95, 'left'),
+            ('Qty', right - 150, 'right'),
+            ('Price', right - 80, 'right'),
+            ('Total', right, 'right'),
+        ]
+        self.item_width = right - 185 - (MARGIN + 95)
+        self.bottom = MARGIN + 30
+
+    def fit(self, text, width, font, size):
+        """Cut text so it fits a column width"""
+        text = text or ''
+        if self.string_width(text, font, size) <= width:
+            return text
+        while text and self.string_width(text + '...', font, size) > width:
+            text = text[:-1]
+        return text + '...'
+
+
+@lru_cache(maxsize=4)
+def get_layout(title=PDF_DOCUMENT_TITLE):
+    """Get this process's layout for a title, building it on first use"""
+    return PdfLayout(title)
+
+
+def draw_letterhead(pdf, layout, reference, date, customer, page_number=1):
+    """Logo, company, document title, reference, date and customer; returns the next y"""
+    top = layout.page_height - MARGIN
+    right = layout.page_width - MARGIN
+    y = top
+
+    if layout.logo is not None:
+        width, height = layout.logo_size
+        pdf.drawImage(layout.logo, MARGIN, top - height, width, height, mask='auto')
+        y = top - height - 6
+
+    pdf.setFont(layout.bold_font, 16)
+    pdf.drawString(MARGIN, y - 16, RECEIPT_COMPANY_NAME)
+    pdf.setFont(layout.font, 10)
+    pdf.drawString(MARGIN, y - 30, RECEIPT_ADDRESS)
+
+    pdf.setFont(layout.bold_font, 20)
+    pdf.drawRightString(right, top - 20, layout.title)
+    pdf.setFont(layout.font, 10)
+    pdf.drawRightString(right, top - 36, reference)
+    pdf.drawRightString(right, top - 50, date)
+    if page_number > 1:
+        pdf.drawRightString(right, top - 64, f"Page {page_number}")
+
+    y -= 54
+    pdf.setFont(layout.bold_font, 10)
+    pdf.drawString(MARGIN, y, "Customer:")
+    pdf.setFont(layout.font, 10)
+    pdf.drawString(MARGIN + 60, y, customer)
+    return y - 26
+
+
+def draw_table_headings(pdf, layout, columns, y):
+    """Bold column headings over a rule; columns are (heading, x, alignment)"""
+    pdf.setFont(layout.bold_font, 9)
+    for heading, x, align in columns:
+        if align == 'right':
+            pdf.drawRightString(x, y, heading)
+        else:
+            pdf.drawString(x, y, heading)
+    pdf.line(MARGIN, y - 4, layout.page_width - MARGIN, y - 4)
+    return y - ROW_HEIGHT - 2
+
+
+def _draw_page_header(pdf, layout, sale, page_number):
+    """Letterhead and the item table headings; returns the next y"""
+    y = draw_letterhead(pdf, layout, f"#{sale['id']}",
+                        sale['sale_date'][:19] if sale['sale_date'] else '',
+                        f"{sale['customer_name']}   {sale['customer_phone']}", page_number)
+    return draw_table_headings(pdf, layout, layout.columns, y)
+
+
+def _draw_item(pdf, layout, item, y):
+    """One item row, with the description underneath; returns the next y"""
+    x_upc, x_item, x_qty, x_price, x_total = (x for _, x, _ in layout.columns)
+    if item['product'] is not None:
+        title = f"{item['brand'] or ''} {item['product']}".strip()
+    else:
+        title = f"{item['name']} (XT)"
+
+    pdf.setFont(layout.font, 9)
+    pdf.drawString(x_upc, y, item['upc_code'] or '')
+    pdf.drawString(x_item, y, layout.fit(title, layout.item_width, layout.font, 9))
+    pdf.drawRightString(x_qty, y, str(item['quantity']))
+    pdf.drawRightString(x_price, y, f"${format_cents(item['discounted_price'])}")
+    pdf.drawRightString(x_total, y, f"${format_cents(item['total'])}")
+
+    if item['product'] is not None and item['description']:
+        y -= DESCRIPTION_HEIGHT
+        pdf.setFont(layout.font, 7.5)
+        pdf.setFillGray(0.4)
+        pdf.drawString(x_item, y, layout.fit(item['description'], layout.item_width,
+                                             layout.font, 7.5))
+        pdf.setFillGray(0)
+    return y - ROW_HEIGHT
+
+
+def draw_sale(pdf, layout, sale):
+    """Draw a sale on a canvas, adding pages as the item list needs them"""
+    right = layout.page_width - MARGIN
+    page_number = 1
+    y = _draw_page_header(pdf, layout, sale, page_number)
+
+    for item in sale['items']:
+        if y < layout.bottom + DESCRIPTION_HEIGHT:
+            pdf.showPage()
+            page_number += 1
+            y = _draw_page_header(pdf, layout, sale, page_number)
+        y = _draw_item(pdf, layout, item, y)
+
+    # Totals need four rows; keep them on one page
+    if y < layout.bottom + 4 * ROW_HEIGHT:
+        pdf.showPage()
+        page_number += 1
+        y = _draw_page_header(pdf, layout, sale, page_number)
+
+    total = sale['total_amount']
+    paid = sale['paid_amount']
+    pdf.line(right - 200, y + ROW_HEIGHT - 4, right, y + ROW_HEIGHT - 4)
+    for label, amount, font in (('Total', total, layout.bold_font),
+                                ('Paid', paid, layout.font),
+                                ('Balance', total - paid, layout.bold_font)):
+        pdf.setFont(font, 10)
+        pdf.drawString(right - 200, y, label)
+        pdf.drawRightString(right, y, f"${format_cents(amount)}")
+        y -= ROW_HEIGHT
+    pdf.setFont(layout.font, 9)
+    pdf.drawString(right - 200, y, f"Payment: {sale['payment_status'].replace('_', ' ').title()}")
+
+    pdf.setFont(layout.font, 9)
+    pdf.drawCentredString(layout.page_width / 2, MARGIN, "Thank you for your business!")
+    pdf.showPage()
+
+
+def write_sale_pdf(sale, path, title=PDF_DOCUMENT_TITLE):
+    """Write one sale dict to a PDF file and return the path"""
+    from reportlab.pdfgen import canvas
+
+    layout = get_layout(title)
+    pdf = canvas.Canvas(path, pagesize=(layout.page_width, layout.page_height))
+    pdf.setTitle(f"{title.title()} #{sale['id']}")
+    pdf.setAuthor(RECEIPT_COMPANY_NAME)
+    draw_sale(pdf, layout, sale)
+    pdf.save()
+    return path
+
+
+def render_sale_pdf(db, sale_id, path, title=PDF_DOCUMENT_TITLE):
+    """Write a stored sale to a PDF file, returns the path or None if the sale does not exist"""
+    sale = db.get_sale_for_receipt(sale_id)
+    if not sale:
+        return None
+    return write_sale_pdf(sale, path, title)
+
+
+def pdf_file_name(sale_id, title=PDF_DOCUMENT_TITLE):
+    """File name used for a sale's PDF in batch output"""
+    return f"{title.lower()}_{sale_id:06d}.pdf"
+
+
+# Batch rendering - worker state is per process
+_worker = {}
+
+
+def _init_worker(db_path, output_dir, title):
+    """Process pool initializer: open the database and build the layout once"""
+    from database.models import DatabaseManager
+
+    _worker['db'] = DatabaseManager(db_path)
+    _worker['output_dir'] = output_dir
+    _worker['title'] = title
+    get_layout(title)
+
+
+def _render_worker(sale_id):
+    """Render one sale in a worker and report the result"""
+    start_time = time.perf_counter()
+    path = os.path.join(_worker['output_dir'], pdf_file_name(sale_id, _worker['title']))
+    try:
+        if render_sale_pdf(_worker['db'], sale_id, path, _worker['title']) is None:
+            raise ValueError("Sale not found")
+        return {'sale_id': sale_id, 'path': path, 'bytes': os.path.getsize(path),
+                'seconds': time.perf_counter() - start_time, 'error': None}
+    except Exception as e:
+        return {'sale_id': sale_id, 'path': None, 'bytes': 0,
+                'seconds': time.perf_counter() - start_time, 'error': str(e)}
+
+
+def render_pdf_batch(db_path, sale_ids, output_dir=PDF_OUTPUT_PATH, title=PDF_DOCUMENT_TITLE,
+                     workers=None):
+    """Render sales to PDF files and yield a result dict per sale, in order
+
+    ``workers=1`` renders in this process without starting a pool.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if workers == 1:
+        _init_worker(db_path, output_dir, title)
+        yield from map(_render_worker, sale_ids)
+        return
+
+    yield from bounded_map(_render_worker, sale_ids, workers,
+                           initializer=_init_worker, initargs=(db_path, output_dir, title))
+
+
+def main():
+    """Render a date range or a customer's sales to PDF files"""
+    from database.models import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Render sales to PDF receipts or quotes")
+    parser.add_argument('--start', help="First sale date, YYYY-MM-DD")
+    parser.add_argument('--end', help="Last sale date, YYYY-MM-DD")
+    parser.add_argument('--customer', help="Only this customer's sales (phone number)")
+    parser.add_argument('--title', default=PDF_DOCUMENT_TITLE, help="Document title, e.g. RECEIPT")
+    parser.add_argument('-o', '--output', default=PDF_OUTPUT_PATH, help="Output directory")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--db', default=DATABASE_PATH, help="Database file")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    customer_id = None
+    if args.customer:
+        customer = db.get_customer_by_phone(args.customer)
+        if not customer:
+            print(f"❌ No customer with phone {args.customer}")
+            sys.exit(1)
+        customer_id = customer['id']
+
+    sale_ids = db.get_sale_ids(args.start, args.end, customer_id)
+    print(f"Rendering {len(sale_ids)} documents to {args.output}...")
+
+    start_time = time.perf_counter()
+    errors = 0
+    for result in render_pdf_batch(args.db, sale_ids, args.output, args.title, args.workers):
+        if result['error']:
+            errors += 1
+            print(f"❌ Sale #{result['sale_id']}: {result['error']}")
+    elapsed = time.perf_counter() - start_time
+
+    print(f"✅ {len(sale_ids) - errors} PDFs in {elapsed:.2f} seconds, {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+In-process print queue
+
+Receipts are printed by one worker thread, in the order they were sent, so
+the window that sent them never waits on the printer. A job that fails is
+retried with exponential backoff; if it still fails it is saved as a JSON
+file under TEMP_PATH/print_jobs and kept there, across restarts, until it
+is retried from the failed-job list and prints.
+
+Windows show progress by polling status() from a Tk ``after`` loop; the
+worker thread never touches Tk.
+"""
+
+import base64
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TEMP_PATH
+from utils.printer import get_printer
+
+FAILED_JOBS_PATH = os.path.join(TEMP_PATH, "print_jobs")
+
+# Seconds to wait before each retry of a failing job
+RETRY_DELAYS = (1, 2, 4, 8)
+
+
+def print_job(printer, job):
+    """Send one job to a printer, returns True on success"""
+    if hasattr(printer, 'send') and job.get('escpos'):
+        from utils.receipt_images import add_receipt_images  # NumPy, loaded on first print
+        # Direct printers raise on failure, so the job keeps the real error
+        printer.send(add_receipt_images(job['escpos'], job.get('sale_id')))
+        return True
+    return printer.print_receipt(job['text'])
+
+
+class PrintQueue:
+    """Print jobs run in order on a worker thread, with retries and a failed-job list"""
+
+    def __init__(self, printer_factory=get_printer, failed_path=FAILED_JOBS_PATH,
+                 retry_delays=RETRY_DELAYS):
+        self.printer_factory = printer_factory
+        self.printer = None
+        self.failed_path = failed_path
+        self.retry_delays = retry_delays
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.pending = 0
+        self.queued_ids = set()
+        self.message = "Printer ready"
+
+        os.makedirs(self.failed_path, exist_ok=True)
+
+    def submit(self, text, escpos=None, sale_id=None):
+        """Queue a receipt and return its job ID immediately"""
+        job = {
+            'id': uuid.uuid4().hex,
+            'sale_id': sale_id,
+            'text': text,
+            'escpos': escpos,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'error': None
+        }
+        self._enqueue(job)
+        return job['id']
+
+    def _enqueue(self, job):
+        """Add a job and start the worker if needed"""
+        with self.lock:
+            self.pending += 1
+            self.queued_ids.add(job['id'])
+            self._set_message(f"Printing ({self.pending} in queue)...")
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping.clear()
+                self.thread = threading.Thread(target=self.run, name="print-queue", daemon=True)
+                self.thread.start()
+        self.jobs.put(job)
+
+    def run(self):
+        """Worker loop: print jobs one at a time, in order"""
+        while not self.stopping.is_set():
+            try:
+                job = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if self._print_with_retry(job):
+                    self._remove_failed_file(job)
+                    message = f"Printed sale #{job['sale_id']}" if job['sale_id'] else "Printed"
+                else:
+                    self._save_failed(job)
+                    message = f"Print failed: {job['error']}"
+            finally:
+                with self.lock:
+                    self.pending -= 1
+                    self.queued_ids.discard(job['id'])
+                self.jobs.task_done()
+            self._set_message(self._queue_message(message))
+
+    def _print_with_retry(self, job):
+        """Try a job, backing off between attempts; returns True once printed"""
+        for attempt, delay in enumerate((0,) + tuple(self.retry_delays)):
+            if delay:
+                self._set_message(f"Printer not responding, retrying in {delay}s "
+                                  f"(attempt {attempt + 1} of {len(self.retry_delays) + 1})")
+                if self.stopping.wait(delay):
+                    job['error'] = "Print queue stopped"
+                    return False
+            try:
+                if self.printer is None:
+                    self.printer = self.printer_factory()
+                if print_job(self.printer, job):
+                    return True
+                job['error'] = "Printer did not accept the job"
+            except Exception as e:
+                job['error'] = str(e)
+        return False
+
+    def _queue_message(self, message):
+        """Append the remaining queue length to a status message"""
+        with self.lock:
+            pending = self.pending
+        return f"{message} ({pending} in queue)" if pending else message
+
+    def _set_message(self, message):
+        """Update the status line shown by windows"""
+        self.message = message
+
+    # Failed jobs
+    def _job_file(self, job):
+        """Path of a job's failed-job file"""
+        return os.path.join(self.failed_path, f"{job['id']}.json")
+
+    def _save_failed(self, job):
+        """Write a failed job to disk so it survives a restart"""
+        data = dict(job)
+        if data['escpos'] is not None:
+            data['escpos'] = base64.b64encode(data['escpos']).decode('ascii')
+        with open(self._job_file(job), 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+
+    def _remove_failed_file(self, job):
+        """Delete a job's failed-job file once it has printed"""
+        try:
+            os.remove(self._job_file(job))
+        except FileNotFoundError:
+            pass
+
+    def failed_jobs(self):
+        """Failed jobs saved on disk, oldest first"""
+        jobs = []
+        for path in glob.glob(os.path.join(self.failed_path, "*.json")):
+            try:
+                with open(path, encoding='utf-8') as file:
+                    job = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if job.get('escpos') is not None:
+                job['escpos'] = base64.b64decode(job['escpos'])
+            jobs.append(job)
+        return sorted(jobs, key=lambda job: job['created_at'])
+
+    def retry_failed(self):
+        """Queue every failed job again, returns how many were queued"""
+        with self.lock:
+            queued_ids = set(self.queued_ids)
+        jobs = [job for job in self.failed_jobs() if job['id'] not in queued_ids]
+        for job in jobs:
+            job['error'] = None
+            self._enqueue(job)
+        return len(jobs)
+
+    def discard_failed(self):
+        """Delete all failed jobs"""
+        for job in self.failed_jobs():
+            self._remove_failed_file(job)
+
+    def status(self):
+        """Current state for display: pending count, failed count and a message"""
+        with self.lock:
+            pending = self.pending
+        failed = len(glob.glob(os.path.join(self.failed_path, "*.json")))
+        return {'pending': pending, 'failed': failed, 'message': self.message}
+
+    def wait(self):
+        """Block until every queued job has printed or failed"""
+        self.jobs.join()
+
+    def stop(self):
+        """Stop the worker after the current job"""
+        self.stopping.set()
+
+
+_print_queue = None
+
+
+def get_print_queue():
+    """Get the application's shared print queue"""
+    global _print_queue
+    if _print_queue is None:
+        _print_queue = PrintQueue()
+    return _print_queue
@@ -0,0 +1,276 @@
+"""
+Receipt printers
+
+Every backend has ``print_receipt(receipt_text, escpos=None) -> bool``.
+Backends that talk ESC/POS directly also have ``send(data)``, which raises
+on failure. get_printer() picks the backend named by config.PRINTER_NAME:
+
+    "spooler" or "default"  OS print spooler (lp/lpr/print), default printer
+    "escpos"                direct ESC/POS to config.PRINTER_DEVICE
+    "pdf"                   PDF files in config.PRINTER_PDF_PATH (needs reportlab)
+    "null"                  discard output, for benchmarks
+    any other name          OS print spooler, printer with that name
+
+Backends are imported on first print, so optional dependencies such as
+reportlab or pyserial are never loaded at startup.
+"""
+
+import importlib
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (RECEIPT_WIDTH, PRINTER_NAME, PRINTER_DEVICE, PRINTER_BAUDRATE,
+                    PRINTER_TIMEOUT, PRINTER_ENCODING)
+from utils.receipt_generator import receipt_to_escpos, ESC_DRAWER_KICK
+
+class ZStarPrinter:
+    """Z-Star thermal printer utility"""
+    
+    def __init__(self, printer_name="default"):
+        self.width = RECEIPT_WIDTH
+        self.printer_name = printer_name
+    
+    def format_line(self, text, align='left'):
+        """Format a line for the receipt width"""
+        if len(text) > self.width:
+            # If text is too long, truncate it
+            return text[:self.width]
+        
+        if align == 'center':
+            return text.center(self.width)
+        elif align == 'right':
+            return text.rjust(self.width)
+        else:
+            return text.ljust(self.width)
+    
+    def format_two_column(self, left_text, right_text):
+        """Format two columns on one line"""
+        available_width = self.width - len(right_text)
+        if len(left_text) > available_width - 1:
+            left_text = left_text[:available_width - 4] + "..."
+        
+        spaces_needed = self.width - len(left_text) - len(right_text)
+        return left_text + " " * spaces_needed + right_text
+    
+    def create_separator(self, char='-'):
+        """Create a separator line"""
+        return char * self.width
+    
+    def print_receipt(self, receipt_text, escpos=None):
+        """Print receipt to Z-Star printer through the OS spooler"""
+        try:
+            system = platform.system()
+            
+            if system == "Windows":
+                self._print_windows(receipt_text)
+            elif system == "Darwin":  # macOS
+                self._print_macos(receipt_text)
+            else:  # Linux
+                self._print_linux(receipt_text)
+                
+            return True
+        except Exception as e:
+            print(f"Printing error: {e}")
+            return False
+    
+    def _print_windows(self, receipt_text):
+        """Print on Windows"""
+        # Create temporary file
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
+            temp_file.write(receipt_text)
+            temp_file_path = temp_file.name
+        
+        try:
+            # Print using Windows print command
+            if self.printer_name == "default":
+                subprocess.run(['print', temp_file_path], check=True, shell=True)
+            else:
+                subprocess.run(['print', f'/D:{self.printer_name}', temp_file_path], check=True, shell=True)
+        finally:
+            # Clean up temp file
+            os.unlink(temp_file_path)
+    
+    def _print_macos(self, receipt_text):
+        """Print on macOS"""
+        # Create temporary file
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
+            temp_file.write(receipt_text)
+            temp_file_path = temp_file.name
+        
+        try:
+            # Print using lpr command
+            if self.printer_name == "default":
+                subprocess.run(['lpr', temp_file_path], check=True)
+            else:
+                subprocess.run(['lpr', '-P', self.printer_name, temp_file_path], check=True)
+        finally:
+            # Clean up temp file
+            os.unlink(temp_file_path)
+    
+    def _print_linux(self, receipt_text):
+        """Print on Linux"""
+        # Create temporary file
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
+            temp_file.write(receipt_text)
+            temp_file_path = temp_file.name
+        
+        try:
+            # Print using lp command
+            if self.printer_name == "default":
+                subprocess.run(['lp', temp_file_path], check=True)
+            else:
+                subprocess.run(['lp', '-d', self.printer_name, temp_file_path], check=True)
+        finally:
+            # Clean up temp file
+            os.unlink(temp_file_path)
+
+
+class EscPosPrinter:
+    """Direct ESC/POS thermal printer without the OS spooler
+    
+    Writes pre-encoded byte buffers straight to a USB printer device file,
+    a serial port or a network printer's raw TCP port (9100). The
+    connection is opened on first use and kept open between receipts; if a
+    write fails it is reopened once before giving up.
+    """
+    
+    def __init__(self, device=PRINTER_DEVICE, baudrate=PRINTER_BAUDRATE, timeout=PRINTER_TIMEOUT):
+        self.device = device
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.connection = None
+        self.lock = threading.Lock()
+    
+    def _open(self):
+        """Open the connection described by the device string"""
+        if self.device.startswith('tcp://'):
+            host, _, port = self.device[len('tcp://'):].partition(':')
+            conn = socket.create_connection((host, int(port or 9100)), timeout=self.timeout)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return conn
+        
+        if self.device.upper().startswith('COM') or '/tty' in self.device:
+            import serial  # pyserial, only needed for serial printers
+            return serial.Serial(self.device, self.baudrate, timeout=self.timeout,
+                                 write_timeout=self.timeout)
+        
+        # USB printer class device, e.g. /dev/usb/lp0
+        return open(self.device, 'wb', buffering=0)
+    
+    def _write(self, data):
+        """Write all bytes to the open connection"""
+        if isinstance(self.connection, socket.socket):
+            self.connection.sendall(data)
+        else:
+            self.connection.write(data)
+            if hasattr(self.connection, 'flush'):
+                self.connection.flush()
+    
+    def send(self, data):
+        """Send a pre-encoded ESC/POS buffer, reconnecting once on failure"""
+        if not self.device:
+            raise ValueError("No printer device configured (config.PRINTER_DEVICE)")
+        
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.connection is None:
+                        self.connection = self._open()
+                    self._write(data)
+                    return
+                except OSError:
+                    self._close()
+                    if attempt:
+                        raise
+    
+    def print_receipt(self, receipt_text, escpos=None):
+        """Print a receipt, using its stored ESC/POS bytes if given"""
+        try:
+            if escpos is None:
+                escpos = receipt_to_escpos(receipt_text, PRINTER_ENCODING)
+            self.send(escpos)
+            return True
+        except Exception as e:
+            print(f"Printing error: {e}")
+            return False
+    
+    def open_cash_drawer(self):
+        """Kick the cash drawer open"""
+        self.send(ESC_DRAWER_KICK)
+    
+    def _close(self):
+        """Close the connection, ignoring errors"""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except OSError:
+                pass
+            self.connection = None
+    
+    def close(self):
+        """Close the printer connection"""
+        with self.lock:
+            self._close()
+
+
+class NullPrinter:
+    """Printer that discards everything, for benchmarks and printer-less setups"""
+    
+    def __init__(self):
+        self.receipts = 0
+        self.bytes_sent = 0
+    
+    def send(self, data):
+        """Count and discard an ESC/POS buffer"""
+        self.receipts += 1
+        self.bytes_sent += len(data)
+    
+    def print_receipt(self, receipt_text, escpos=None):
+        """Count and discard a receipt"""
+        self.send(escpos if escpos is not None else receipt_text.encode('utf-8'))
+        return True
+
+
+# Backend name -> "module:factory", imported on first use
+PRINTER_BACKENDS = {
+    'spooler': 'utils.printer:ZStarPrinter',
+    'default': 'utils.printer:ZStarPrinter',
+    'escpos': 'utils.printer:EscPosPrinter',
+    'pdf': 'utils.pdf_printer:PdfPrinter',
+    'null': 'utils.printer:NullPrinter',
+}
+
+_printers = {}
+_printers_lock = threading.Lock()
+
+
+def register_backend(name, target):
+    """Add or replace a backend, given as "module:factory" """
+    PRINTER_BACKENDS[name.lower()] = target
+
+
+def get_printer(name=None):
+    """Get the shared printer for a backend name, creating it on first use
+    
+    Instances are kept, so ESC/POS connections stay open between receipts.
+    Names that are not registered backends are OS printer names.
+    """
+    name = name or PRINTER_NAME
+    with _printers_lock:
+        if name not in _printers:
+            target = PRINTER_BACKENDS.get(name.lower())
+            if target is None:
+                _printers[name] = ZStarPrinter(printer_name=name)
+            else:
+                module_name, factory_name = target.split(':')
+                factory = getattr(importlib.import_module(module_name), factory_name)
+                _printers[name] = factory()
+        return _printers[name]
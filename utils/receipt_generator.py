@@ -0,0 +1,206 @@
+"""
+Receipt text layout
+
+Turns the dict returned by DatabaseManager.get_sale_for_receipt into the
+receipt text shown on screen and the ESC/POS bytes sent to thermal
+printers. Rendering does no database or printer I/O, so it can run
+anywhere a sale dict is available.
+
+A layout is compiled once per width, encoding and shop header by
+compile_receipt(): the header and footer are rendered and encoded up
+front, and each sale only formats its own lines and joins them.
+format_z_report lays out the end-of-day Z-report for the same printers.
+"""
+
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import RECEIPT_COMPANY_NAME, RECEIPT_ADDRESS, RECEIPT_WIDTH, PRINTER_ENCODING
+from utils.helpers import format_cents
+
+
+# ESC/POS control sequences
+ESC_INIT = b'\x1b@'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+# GS V 66 0: feed to the cutter and make a partial cut
+ESC_FEED_AND_CUT = b'\x1dVB\x00'
+# ESC p 0 25 250: pulse the cash drawer kick-out connector (pin 2)
+ESC_DRAWER_KICK = b'\x1bp\x00\x19\xfa'
+
+# Receipt lines printed in bold
+BOLD_PREFIXES = ('TOTAL:', 'BALANCE:')
+
+
+def receipt_to_escpos(receipt_text, encoding=PRINTER_ENCODING, open_drawer=False):
+    """Encode receipt text as the ESC/POS byte stream sent to a thermal printer
+
+    The company name and totals are printed bold, and the paper is cut at
+    the end. ``open_drawer`` also kicks the cash drawer open.
+    """
+    lines = receipt_text.strip('\n').split('\n')
+    company_line = next((index for index, line in enumerate(lines) if line.strip()), None)
+
+    output = [ESC_INIT]
+    for index, line in enumerate(lines):
+        data = line.encode(encoding, errors='replace') + b'\n'
+        if index == company_line or line.startswith(BOLD_PREFIXES):
+            data = ESC_BOLD_ON + data + ESC_BOLD_OFF
+        output.append(data)
+    output.append(ESC_FEED_AND_CUT)
+    if open_drawer:
+        output.append(ESC_DRAWER_KICK)
+
+    return b''.join(output)
+
+
+def fit(text, width):
+    """Cut text to the receipt width"""
+    return text if len(text) <= width else text[:width]
+
+
+def two_column(left, right, width):
+    """Left text and right-aligned text on one line, truncating the left side"""
+    space = width - len(right) - 1
+    if len(left) > space:
+        left = left[:max(space - 3, 0)] + "..."
+    return f"{left:<{width - len(right)}}{right}"
+
+
+class ReceiptTemplate:
+    """Receipt layout compiled for one width, encoding and shop header
+
+    render() returns the receipt text and its ESC/POS bytes together;
+    the bytes match receipt_to_escpos() of the text.
+    """
+
+    def __init__(self, width=RECEIPT_WIDTH, encoding=PRINTER_ENCODING,
+                 company_name=RECEIPT_COMPANY_NAME, address=RECEIPT_ADDRESS):
+        self.width = width
+        self.encoding = encoding
+        self.rule = '=' * width
+
+        rule = self.rule
+        company = fit(company_name, width).center(width)
+        address = fit(address, width).center(width)
+
+        # Static parts, rendered and encoded once
+        self.header_text = f"{company}\n{address}\n{rule}\n\n"
+        self.header_bytes = (ESC_INIT + ESC_BOLD_ON + self._encode(company + '\n') + ESC_BOLD_OFF
+                             + self._encode(f"{address}\n{rule}\n\n"))
+        self.items_heading = f"\n{rule}\nITEMS:\n{rule}\n"
+        footer = f"\n{rule}\n{'Thank you for your business!'.center(width).rstrip()}\n{rule}"
+        self.footer_text = footer
+        self.footer_bytes = self._encode(footer + '\n') + ESC_FEED_AND_CUT
+
+        # Totals lines are bold on paper; the escape codes are ASCII, so they
+        # are formatted into the string and encoded with the rest of the sale
+        self.bold_on = ESC_BOLD_ON.decode('ascii')
+        self.bold_off = ESC_BOLD_OFF.decode('ascii')
+        self.label_width = width - 12
+
+    def _encode(self, text):
+        """Encode text for the printer, replacing characters it cannot print"""
+        if text.isascii():
+            # Code pages used by receipt printers are ASCII supersets, and
+            # the ASCII codec is much faster than a charmap one
+            return text.encode('ascii')
+        return text.encode(self.encoding, errors='replace')
+
+    def format_item(self, item):
+        """One sale line: UPC, brand and product, description, then quantity and total"""
+        width = self.width
+        amount = f"${format_cents(item['total'])}"
+        quantity = two_column(f"  {item['quantity']} x ${format_cents(item['discounted_price'])}", amount, width)
+        if item['product'] is not None:
+            title = fit(f"{item['brand'] or ''} {item['product']}".strip(), width)
+            description = fit(item['description'] or '', width)
+            return f"{item['upc_code']}\n{title}\n{description}\n{quantity}\n"
+        # XT item (manual entry)
+        return f"{fit(item['name'], width)}\nXT ITEM\n{quantity}\n"
+
+    def format_body(self, sale):
+        """Sale details and item lines, everything between header and totals"""
+        sale_date = sale['sale_date'][:19] if sale['sale_date'] else 'N/A'
+        customer = fit(f"Customer: {sale['customer_name']}", self.width)
+        return ''.join([
+            f"Sale #: {sale['id']}\nDate: {sale_date}\n"
+            f"{customer}\nPhone: {sale['customer_phone']}\n",
+            self.items_heading,
+            *map(self.format_item, sale['items'])
+        ])
+
+    def format_totals(self, sale, bold_on='', bold_off=''):
+        """Totals block, with the TOTAL and BALANCE lines wrapped in bold codes if given"""
+        total = sale['total_amount']
+        paid = sale['paid_amount']
+        label_width = self.label_width
+        payment = sale['payment_status'].replace('_', ' ').title()
+        return (f"{self.rule}\n"
+                f"{bold_on}{'TOTAL:':<{label_width}}{'$' + format_cents(total):>12}\n{bold_off}"
+                f"{'PAID:':<{label_width}}{'$' + format_cents(paid):>12}\n"
+                f"{bold_on}{'BALANCE:':<{label_width}}{'$' + format_cents(total - paid):>12}\n{bold_off}"
+                f"Payment: {payment}\n")
+
+    def render_text(self, sale):
+        """Receipt text for display"""
+        return ''.join((self.header_text, self.format_body(sale), self.format_totals(sale),
+                        self.footer_text))
+
+    def render(self, sale):
+        """Receipt text and ESC/POS bytes for a sale"""
+        middle = self.format_body(sale) + self.format_totals(sale, self.bold_on, self.bold_off)
+        escpos = b''.join((self.header_bytes, self._encode(middle), self.footer_bytes))
+        middle = middle.replace(self.bold_on, '').replace(self.bold_off, '')
+        return ''.join((self.header_text, middle, self.footer_text)), escpos
+
+
+@lru_cache(maxsize=16)
+def compile_receipt(width=RECEIPT_WIDTH, encoding=PRINTER_ENCODING,
+                    company_name=RECEIPT_COMPANY_NAME, address=RECEIPT_ADDRESS):
+    """Get the compiled receipt layout for a width, encoding and shop header"""
+    return ReceiptTemplate(width, encoding, company_name, address)
+
+
+def format_receipt(sale, company_name=RECEIPT_COMPANY_NAME, address=RECEIPT_ADDRESS,
+                   width=RECEIPT_WIDTH):
+    """Render a sale from get_sale_for_receipt as receipt text"""
+    return compile_receipt(width, PRINTER_ENCODING, company_name, address).render_text(sale)
+
+
+def format_z_report(report, company_name=RECEIPT_COMPANY_NAME, address=RECEIPT_ADDRESS,
+                    width=RECEIPT_WIDTH):
+    """Render a report from get_z_report as receipt text, with sales by hour"""
+    totals = report['totals']
+    rule = '=' * width
+    lines = [
+        company_name.center(width).rstrip(),
+        address.center(width).rstrip(),
+        rule,
+        "Z-REPORT".center(width).rstrip(),
+        two_column("Day:", report['day'], width),
+        rule,
+        two_column("Sales:", str(totals['sale_count']), width),
+        two_column("Catalog items:", str(totals['catalog_items']), width),
+        two_column("XT items:", str(totals['xt_items']), width),
+        '-' * width,
+        two_column("Paid at checkout:", f"${format_cents(totals['paid'])}", width),
+        two_column("Put on account:", f"${format_cents(totals['on_account'])}", width),
+        two_column("TOTAL:", f"${format_cents(totals['gross'])}", width),
+        rule,
+    ]
+    if report['hours']:
+        lines.append(fit(f"{'Hour':<6}{'Sales':>7}{'Items':>7}{'Gross':>12}", width))
+        for hour in report['hours']:
+            lines.append(fit(f"{hour['hour'][11:13] + ':00':<6}{hour['sale_count']:>7}"
+                             f"{hour['catalog_items'] + hour['xt_items']:>7}"
+                             f"{format_cents(hour['gross']):>12}", width))
+    else:
+        lines.append("No sales")
+    lines += [rule, f"Printed {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,100 @@
+"""
+Stored receipts - render once at checkout, reprint from the stored copy
+
+Checkout queues the sale ID and a background thread renders the receipt and
+stores its text and ESC/POS bytes, zlib-compressed, in the receipts table.
+Finishing a sale never waits on rendering, and reprints are a single
+primary key read. Sales without a stored receipt (older sales, one still
+in the queue, or one apply_payment dropped because its balance changed)
+are rendered and stored on first use.
+"""
+
+import atexit
+import queue
+import threading
+from typing import Dict, Optional
+
+from utils.receipt_generator import compile_receipt
+
+
+def render_receipt(db, sale_id) -> Optional[Dict]:
+    """Render a sale's receipt text and ESC/POS bytes, or None if the sale does not exist"""
+    sale = db.get_sale_for_receipt(sale_id)
+    if not sale:
+        return None
+
+    text, escpos = compile_receipt().render(sale)
+    return {'sale_id': sale_id, 'text': text, 'escpos': escpos}
+
+
+def store_receipt(db, sale_id) -> Optional[Dict]:
+    """Render a receipt and save it in the receipts table"""
+    receipt = render_receipt(db, sale_id)
+    if receipt:
+        db.save_receipt(sale_id, receipt['text'], receipt['escpos'])
+    return receipt
+
+
+def load_receipt(db, sale_id) -> Optional[Dict]:
+    """Get a receipt for display or reprint, rendering it only if not stored yet"""
+    return db.get_stored_receipt(sale_id) or store_receipt(db, sale_id)
+
+
+class ReceiptWriter:
+    """Background thread that renders and stores receipts for one database"""
+
+    def __init__(self, db):
+        self.db = db
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, sale_id, receipt=None):
+        """Queue a receipt to be stored, rendering it first if not given"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="receipt-writer", daemon=True)
+                self.thread.start()
+        self.queue.put((sale_id, receipt))
+
+    def run(self):
+        """Store queued receipts until the program exits"""
+        while True:
+            sale_id, receipt = self.queue.get()
+            try:
+                if receipt:
+                    self.db.save_receipt(sale_id, receipt['text'], receipt['escpos'])
+                else:
+                    store_receipt(self.db, sale_id)
+            except Exception as e:
+                # Not fatal - load_receipt renders it again on first reprint
+                print(f"Error storing receipt for sale #{sale_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Wait until every queued receipt is stored"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+
+_writers = {}
+
+
+def queue_receipt(db, sale_id, receipt=None):
+    """Store a sale's receipt in the background, once the sale is committed
+
+    Pass the receipt from render_receipt if it was already rendered for
+    display, so the writer thread only compresses and saves it.
+    """
+    writer = _writers.get(db.db_path)
+    if writer is None:
+        writer = _writers[db.db_path] = ReceiptWriter(db)
+    writer.submit(sale_id, receipt)
+
+
+@atexit.register
+def flush_receipts():
+    """Finish writing queued receipts before the program exits"""
+    for writer in list(_writers.values()):
+        writer.flush()
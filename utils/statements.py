@@ -0,0 +1,296 @@
+"""
+Customer statements for accounts receivable
+
+Writes a statement - open sales, aging and amount due - as text and PDF
+for every customer with a sale made by the statement date still unpaid,
+plus a manifest.csv listing each file. Customers are read from the open
+sales index a page at a time and handed to
+worker processes in those pages; each worker reads the open sales for its
+customers and writes the files, and the parent streams the manifest. Only
+a few pages are in flight at once, so memory stays flat however many
+customers owe money.
+
+Usage:
+    python -m utils.statements [--date 2024-01-31] [-o dir] [-w workers]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import date
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATABASE_PATH, RECEIPT_COMPANY_NAME, RECEIPT_ADDRESS, STATEMENT_PATH
+from utils.helpers import bounded_map, format_cents
+
+STATEMENT_WIDTH = 72
+
+MANIFEST_COLUMNS = ['customer_id', 'name', 'phone', 'amount_due', 'open_sales',
+                    'oldest_days', 'text_file', 'pdf_file', 'error']
+
+
+def iter_statement_customers(db, page_size=100, as_of=None):
+    """Yield pages of customers with a balance as of a date, by customer ID"""
+    after_id = None
+    while True:
+        page = db.get_statement_customers(after_id, page_size, as_of)
+        if not page:
+            return
+        yield page
+        after_id = page[-1]['id']
+
+
+def aging(open_sales):
+    """Amount due in each aging bucket, as (label, cents) pairs
+
+    The buckets are DatabaseManager.AGING_BUCKETS, as on the A/R aging
+    report: a sale falls in the last bucket whose lower bound it is older than.
+    """
+    from database.models import DatabaseManager
+
+    buckets = DatabaseManager.AGING_BUCKETS
+    totals = {label: 0 for _, label, _ in buckets}
+    for sale in open_sales:
+        label = buckets[0][1]
+        for _, bucket_label, min_days in buckets[1:]:
+            if sale['age_days'] > min_days:
+                label = bucket_label
+        totals[label] += sale['balance']
+    return list(totals.items())
+
+
+def format_statement_text(customer, open_sales, statement_date, width=STATEMENT_WIDTH):
+    """Render a statement as plain text"""
+    rule = '=' * width
+    amount_due = sum(sale['balance'] for sale in open_sales)
+
+    lines = [
+        RECEIPT_COMPANY_NAME.center(width).rstrip(),
+        RECEIPT_ADDRESS.center(width).rstrip(),
+        rule,
+        f"{'STATEMENT':<{width - 18}}{statement_date:>18}",
+        f"Customer: {customer['name']}",
+        f"Phone: {customer['phone']}",
+        rule,
+        f"{'Sale #':<10}{'Date':<12}{'Total':>12}{'Paid':>12}{'Balance':>12}{'Days':>8}",
+        '-' * width,
+    ]
+    for sale in open_sales:
+        lines.append(
+            f"{sale['id']:<10}{(sale['sale_date'] or '')[:10]:<12}"
+            f"{format_cents(sale['total_amount']):>12}{format_cents(sale['paid_amount']):>12}"
+            f"{format_cents(sale['balance']):>12}{sale['age_days']:>8}"
+        )
+    lines.append('-' * width)
+
+    buckets = aging(open_sales)
+    lines.append(''.join(f"{label:>{width // len(buckets)}}" for label, _ in buckets))
+    lines.append(''.join(f"{format_cents(amount):>{width // len(buckets)}}" for _, amount in buckets))
+    lines += [
+        rule,
+        f"{'AMOUNT DUE:':<{width - 14}}{'$' + format_cents(amount_due):>14}",
+        rule,
+        "Please bring this statement with your payment.",
+        "Thank you for your business!",
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def draw_statement(pdf, layout, customer, open_sales, statement_date):
+    """Draw a statement on a canvas, adding pages as the sale list needs them"""
+    from utils.pdf_receipts import MARGIN, ROW_HEIGHT, draw_letterhead, draw_table_headings
+
+    right = layout.page_width - MARGIN
+    columns = [
+        ('Sale #', MARGIN, 'left'),
+        ('Date', MARGIN + 70, 'left'),
+        ('Total', right - 240, 'right'),
+        ('Paid', right - 160, 'right'),
+        ('Balance', right - 80, 'right'),
+        ('Days', right, 'right'),
+    ]
+    customer_line = f"{customer['name']}   {customer['phone']}"
+
+    def new_page(page_number):
+        y = draw_letterhead(pdf, layout, f"Account #{customer['id']}", statement_date,
+                            customer_line, page_number)
+        return draw_table_headings(pdf, layout, columns, y)
+
+    page_number = 1
+    y = new_page(page_number)
+    for sale in open_sales:
+        if y < layout.bottom:
+            pdf.showPage()
+            page_number += 1
+            y = new_page(page_number)
+        values = (str(sale['id']), (sale['sale_date'] or '')[:10],
+                  f"${format_cents(sale['total_amount'])}", f"${format_cents(sale['paid_amount'])}",
+                  f"${format_cents(sale['balance'])}", str(sale['age_days']))
+        pdf.setFont(layout.font, 9)
+        for (_, x, align), value in zip(columns, values):
+            if align == 'right':
+                pdf.drawRightString(x, y, value)
+            else:
+                pdf.drawString(x, y, value)
+        y -= ROW_HEIGHT
+
+    # Aging and amount due stay together
+    if y < layout.bottom + 4 * ROW_HEIGHT:
+        pdf.showPage()
+        page_number += 1
+        y = new_page(page_number)
+
+    buckets = aging(open_sales)
+    column_width = (right - MARGIN) / len(buckets)
+    pdf.line(MARGIN, y + ROW_HEIGHT - 4, right, y + ROW_HEIGHT - 4)
+    for index, (label, amount) in enumerate(buckets):
+        x = MARGIN + column_width * (index + 1)
+        pdf.setFont(layout.bold_font, 9)
+        pdf.drawRightString(x, y, label)
+        pdf.setFont(layout.font, 9)
+        pdf.drawRightString(x, y - ROW_HEIGHT, f"${format_cents(amount)}")
+
+    y -= 2.5 * ROW_HEIGHT
+    pdf.setFont(layout.bold_font, 12)
+    pdf.drawString(right - 200, y, "Amount due")
+    pdf.drawRightString(right, y, f"${format_cents(sum(amount for _, amount in buckets))}")
+
+    pdf.setFont(layout.font, 9)
+    pdf.drawCentredString(layout.page_width / 2, MARGIN, "Please bring this statement "
+                          "with your payment. Thank you for your business!")
+    pdf.showPage()
+
+
+def write_statement_pdf(customer, open_sales, statement_date, path):
+    """Write one statement PDF and return the path"""
+    from reportlab.pdfgen import canvas
+    from utils.pdf_receipts import get_layout
+
+    layout = get_layout('STATEMENT')
+    pdf = canvas.Canvas(path, pagesize=(layout.page_width, layout.page_height))
+    pdf.setTitle(f"Statement {statement_date} - {customer['name']}")
+    pdf.setAuthor(RECEIPT_COMPANY_NAME)
+    draw_statement(pdf, layout, customer, open_sales, statement_date)
+    pdf.save()
+    return path
+
+
+# Worker processes - state is per process
+_worker = {}
+
+
+def _init_worker(db_path, output_dir, statement_date, pdf):
+    """Process pool initializer: open the database once per worker"""
+    from database.models import DatabaseManager
+
+    _worker['db'] = DatabaseManager(db_path)
+    _worker['output_dir'] = output_dir
+    _worker['statement_date'] = statement_date
+    _worker['pdf'] = pdf
+
+
+def _statement_worker(customers):
+    """Write statements for a page of customers and return their manifest rows"""
+    db = _worker['db']
+    output_dir = _worker['output_dir']
+    statement_date = _worker['statement_date']
+
+    open_sales_by_customer = db.get_open_sales([customer['id'] for customer in customers],
+                                               statement_date)
+    rows = []
+    for customer in customers:
+        if not open_sales_by_customer[customer['id']]:
+            # Paid off since the page was read, nothing to state
+            continue
+        row = {'customer_id': customer['id'], 'name': customer['name'],
+               'phone': customer['phone'], 'amount_due': 0, 'open_sales': 0,
+               'oldest_days': 0, 'text_file': '', 'pdf_file': '', 'error': ''}
+        try:
+            open_sales = open_sales_by_customer[customer['id']]
+            row['amount_due'] = sum(sale['balance'] for sale in open_sales)
+            row['open_sales'] = len(open_sales)
+            row['oldest_days'] = open_sales[0]['age_days'] if open_sales else 0
+
+            name = f"statement_{customer['id']:06d}"
+            with open(os.path.join(output_dir, name + '.txt'), 'w', encoding='utf-8') as file:
+                file.write(format_statement_text(customer, open_sales, statement_date))
+            row['text_file'] = name + '.txt'
+
+            if _worker['pdf']:
+                write_statement_pdf(customer, open_sales, statement_date,
+                                    os.path.join(output_dir, name + '.pdf'))
+                row['pdf_file'] = name + '.pdf'
+        except Exception as e:
+            row['error'] = str(e)
+        rows.append(row)
+    return rows
+
+
+def run_statements(db_path=DATABASE_PATH, statement_date=None, output_path=STATEMENT_PATH,
+                   workers=None, pdf=True, page_size=100, progress=None):
+    """Write statements for every customer with a balance
+
+    Files go to ``output_path/<statement date>/`` with a manifest.csv.
+    ``progress`` is called with the number of statements written so far.
+    Returns a dict with counts, the amount due in cents and the output directory.
+    """
+    from database.models import DatabaseManager
+
+    statement_date = statement_date or date.today().isoformat()
+    output_dir = os.path.join(output_path, statement_date)
+    os.makedirs(output_dir, exist_ok=True)
+
+    db = DatabaseManager(db_path)
+    pages = iter_statement_customers(db, page_size, statement_date)
+    initargs = (db_path, output_dir, statement_date, pdf)
+    if workers == 1:
+        _init_worker(*initargs)
+        results = map(_statement_worker, pages)
+    else:
+        results = bounded_map(_statement_worker, pages, workers,
+                              initializer=_init_worker, initargs=initargs)
+
+    stats = {'statements': 0, 'errors': 0, 'amount_due': 0, 'output_dir': output_dir}
+    with open(os.path.join(output_dir, 'manifest.csv'), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=MANIFEST_COLUMNS)
+        writer.writeheader()
+        for rows in results:
+            # amount_due stays in cents until it is written out in dollars
+            writer.writerows({**row, 'amount_due': format_cents(row['amount_due'])} for row in rows)
+            for row in rows:
+                stats['statements'] += 1
+                stats['amount_due'] += row['amount_due']
+                if row['error']:
+                    stats['errors'] += 1
+            if progress:
+                progress(stats['statements'])
+
+    return stats
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Write statements for customers with a balance")
+    parser.add_argument('--date', default=None, help="Statement date, YYYY-MM-DD (default: today)")
+    parser.add_argument('-o', '--output', default=STATEMENT_PATH, help="Output directory")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--no-pdf', action='store_true', help="Write text statements only")
+    parser.add_argument('--db', default=DATABASE_PATH, help="Database file")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    stats = run_statements(args.db, args.date, args.output, args.workers, not args.no_pdf)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"✅ {stats['statements']} statements, ${format_cents(stats['amount_due'], True)} due, "
+          f"{stats['errors']} errors, in {elapsed:.1f} seconds")
+    print(f"📁 {os.path.abspath(stats['output_dir'])}")
+
+
+if __name__ == "__main__":
+    main()